@@ -0,0 +1,3 @@
+# cyberdrill – jádro CyberDrill (simulace, síť, mise) bez závislosti na Pythonista UI
+# front end pro Pythonistu: cyberdrill.app (načítá se jen při spuštění s UI); headless běh: cyberdrill.headless
+__version__ = "4.0"
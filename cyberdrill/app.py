@@ -0,0 +1,364 @@
+# cyberdrill/app.py – Pythonista front end (ui, clipboard); jádro se importuje bez něj
+import os, tempfile
+import ui, clipboard
+
+from .util import err_str, clamp, as_int, now_stamp
+from .missions import default_catalog, mission_by_code
+from .clock import RealClock
+from .game import GameState, _FREE_CMDS
+from .sim import SeriesWindow
+from .journal import EventJournal, LogStore
+from .headless import save_recording
+
+def _scroll_tv_to_end(tv):
+    try:
+        if hasattr(tv, "content_size") and hasattr(tv, "content_offset"):
+            y = max(0, tv.content_size[1] - tv.height)
+            tv.content_offset = (0, y)
+    except Exception as e:
+        print("[ERR] scroll_to_end:", err_str(e))
+
+# ========== graf ==========
+class GraphView(ui.View):
+    # historie v SeriesWindow (10 min při 1 ticku/s); cesty se staví jen při změně dat nebo velikosti,
+    # dlouhé série se zmenší na šířku v pixelech (min/max bucket na sloupec)
+    def __init__(self, history=600):
+        super().__init__()
+        self.req=SeriesWindow(history); self.ratio=SeriesWindow(history); self.bg_color=(0.08,0.08,0.08)
+        self._cache=None
+    def update_data(self, req_list, ratio_list, append=False):
+        if not append: self.req.clear(); self.ratio.clear()
+        elif not req_list and not ratio_list: return
+        self.req.extend(req_list or ()); self.ratio.extend(ratio_list or ())
+        self.set_needs_display()
+    def _paths(self):
+        key=(self.req.version, self.ratio.version, self.width, self.height)
+        if self._cache and self._cache[0]==key: return self._cache[1]
+        inset=6; w=max(1,self.width-2*inset); h=max(1,self.height-2*inset); x0=inset; y0=inset
+        req_max=max(1, self.req.max(1)); rat_max=max(1.0, self.ratio.max(1.0))
+        def to_path(series,smax):
+            n=len(series)
+            if n<=1: return None
+            p=ui.Path(); first=True
+            for i,v in series.downsample(w):
+                x=x0+(i/(n-1.0))*w; y=y0+h - clamp(v/smax,0.0,1.0)*h
+                if first: p.move_to(x,y); first=False
+                else: p.line_to(x,y)
+            return p
+        grid=ui.Path()
+        for frac in (0.25,0.5,0.75):
+            y=y0+h*(1.0-frac); grid.move_to(x0,y); grid.line_to(x0+w,y)
+        out=(grid, to_path(self.req,req_max), to_path(self.ratio,rat_max),
+             f"req/s max≈{int(req_max)}   SYN/ACK max≈{round(rat_max,2)}", (x0+4,y0+4,w-8,16))
+        self._cache=(key,out)
+        return out
+    def draw(self):
+        if not len(self.req) and not len(self.ratio): return
+        grid,p_req,p_ratio,label,rect=self._paths()
+        ui.set_color((0.18,0.18,0.18)); grid.stroke()
+        if p_req: ui.set_color((1,1,1)); p_req.stroke()
+        if p_ratio: ui.set_color((0.4,0.7,1.0)); p_ratio.stroke()
+        ui.set_color((0.85,0.85,0.85))
+        ui.draw_string(label, rect=rect, font=('Menlo',10), color=(0.85,0.85,0.85))
+
+# ========== UI ==========
+class ProgressBar(ui.View):
+    def __init__(self):
+        super().__init__(); self._p=1.0
+        self.bg=ui.View(background_color=(0.25,0.25,0.25))
+        self.fg=ui.View(background_color=(0.2,0.7,0.3))
+        self.add_subview(self.bg); self.add_subview(self.fg)
+    def set_progress(self,p):
+        self._p=max(0.0,min(1.0,float(p)))
+        try:
+            w=self.width if self.width>1 else 1; h=self.height if self.height>1 else 1
+            self.fg.frame=(0,0,self._p*w,h)
+        except Exception as e: print("[ERR] progressbar:", err_str(e))
+    def layout(self):
+        self.bg.frame=(0,0,self.width,self.height); self.set_progress(self._p)
+
+class UIAdapter:
+    def __init__(self, app): self.app=app
+    def log(self, s, user=False):
+        try:
+            self.app._append_console(s)
+        except Exception as e: print("[ERR] ui-log:", err_str(e), "|", repr(s))
+    def header(self, t, score, total):
+        try:
+            self.app.header.text=f"Čas: {max(0,t):>3}s    Skóre: {score:>4}"
+            self.app.time_bar.set_progress(float(max(0,t))/max(1,total))
+        except Exception as e: print("[ERR] header:", err_str(e))
+    def ids_step(self, ids_label, step_str):
+        self.app.step_lbl.text=step_str; self.app.ids_lbl.text="IDS: "+ids_label
+        if ids_label=="CLEAN": self.app.ids_lbl.text_color=(0.6,1.0,0.6)
+        elif ids_label=="SUSPECT": self.app.ids_lbl.text_color=(1.0,0.9,0.5)
+        else: self.app.ids_lbl.text_color=(1.0,0.5,0.5)
+    def graph(self, req, ratio, append=False): self.app.graph.update_data(req, ratio, append)
+    def finish(self, score, t, rank):
+        self.log(f"[SYS] Konec. Skóre {score}, zbylý čas {t}s, hodnost: {rank}")
+
+class App(ui.View):
+    def __init__(self):
+        super().__init__(); self.background_color='black'
+        self.missions=default_catalog().codes(); self.state=None; self.diff='Normal'
+        self.clock=RealClock()     # jeden plánovač pro ticky her, selftest i překreslení konzole
+        try: self.journal=EventJournal(os.path.join(os.path.expanduser('~/Documents'), 'CyberDrill_journal'))
+        except Exception as e: self.journal=None; print("[ERR] journal:", err_str(e))
+
+        # header
+        self.title_lbl=ui.Label(text="CyberDrill 4.0", text_color='white', font=('Menlo',16))
+        self.step_lbl=ui.Label(text_color='white', font=('Menlo',13))
+        self.ids_lbl=ui.Label(text_color=(0.7,0.9,0.7), font=('Menlo',13))
+        self.time_bar=ProgressBar(); self.header=ui.Label(text_color='white', font=('Menlo',14))
+
+        # mission + diff
+        self.picker=ui.SegmentedControl(); self.picker.segments=list(self.missions); self.picker.selected_index=0
+        self.diff_ctrl=ui.SegmentedControl(); self.diff_ctrl.segments=['Easy','Normal','Hard','Insane']; self.diff_ctrl.selected_index=1
+        def _on_diff(sender): self.diff=sender.segments[sender.selected_index]
+        self.diff_ctrl.action=_on_diff
+
+        # buttons
+        self.btn_start=ui.Button(title='Start', action=self.on_start)
+        self.btn_reset=ui.Button(title='Reset', action=self.on_reset)
+        self.btn_help=ui.Button(title='Help', action=self.toggle_help)
+        self.btn_selftest=ui.Button(title='SelfTest', action=self.on_selftest)
+        self.btn_save=ui.Button(title='Save', action=self.on_save_log)
+        self.btn_copy=ui.Button(title='Copy', action=self.on_copy_log)
+
+        # graph
+        self.graph=GraphView()
+
+        # tabs
+        self.tab=ui.SegmentedControl()
+        self.tab.segments=['Console','Help','Net']
+        self.tab.selected_index=0
+        self.tab.action=self.on_tab
+
+        # console + help view
+        self.console=ui.TextView(); self.console.background_color=(0.05,0.05,0.05)
+        self.console.text_color=(0.85,1.0,0.85); self.console.font=('Menlo',14); self.console.editable=False
+        # konzole vykresluje jen posledních console_lines řádků; celá historie je v log_store
+        self.console_lines=400; self._render_timer=None
+        self.log_store=LogStore(cap=5000, spill_path=os.path.join(tempfile.gettempdir(), f"cyberdrill_log_{os.getpid()}.txt"))
+
+        self.help_panel=ui.TextView(); self.help_panel.background_color=(0.08,0.08,0.08)
+        self.help_panel.text_color=(0.85,0.85,0.85); self.help_panel.font=('Menlo',13)
+        self.help_panel.editable=False; self.help_panel.hidden=True
+
+        # NET panel
+        self.net_panel=ui.View(background_color=(0.08,0.08,0.12)); self.net_panel.hidden=True
+        self.ip_tf=ui.TextField(placeholder='host (IP)', text_color='white', background_color=(0.1,0.1,0.1))
+        self.port_tf=ui.TextField(placeholder='port', text_color='white', background_color=(0.1,0.1,0.1))
+        self.code_tf=ui.TextField(placeholder='code/PIN', text_color='white', background_color=(0.1,0.1,0.1))
+        self.btn_host=ui.Button(title='Host', action=self.on_net_host)
+        self.btn_join=ui.Button(title='Join', action=self.on_net_join)
+        self.btn_leave=ui.Button(title='Leave', action=self.on_net_leave)
+        self.peers_lbl=ui.Label(text='Peers: -', text_color='white', font=('Menlo',12))
+        for v in [self.ip_tf,self.port_tf,self.code_tf,self.btn_host,self.btn_join,self.btn_leave,self.peers_lbl]:
+            self.net_panel.add_subview(v)
+
+        # quick + input
+        self.quick=[ui.Button(title='') for _ in range(5)]
+        for b in self.quick: b.action=self.on_quick
+        self.btn_prev=ui.Button(title='◀︎', action=self.on_hist_prev)
+        self.btn_next=ui.Button(title='▶︎', action=self.on_hist_next)
+        self.btn_clearlog=ui.Button(title='Clear', action=self.on_clear_log)
+        self.input=ui.TextField(); self.input.autocorrection_type=False
+        try: self.input.autocapitalization_type=ui.AUTOCAPITALIZE_NONE
+        except: pass
+        self.input.font=('Menlo',14); self.input.text_color='white'; self.input.background_color=(0.1,0.1,0.1)
+        self.input.clear_button_mode='while_editing'; self.input.action=self.on_submit
+        self.btn_enter=ui.Button(title='Enter', action=self.on_submit_button)
+
+        # add views
+        for v in [self.title_lbl,self.step_lbl,self.ids_lbl,self.time_bar,self.header,
+                  self.picker,self.diff_ctrl,self.btn_start,self.btn_reset,self.btn_help,self.btn_selftest,self.btn_save,self.btn_copy,
+                  self.graph,self.tab,self.console,self.help_panel,self.net_panel,
+                  *self.quick,self.btn_prev,self.btn_next,self.btn_clearlog,self.input,self.btn_enter]:
+            self.add_subview(v)
+
+        for v in [self.title_lbl,self.step_lbl,self.ids_lbl,self.time_bar,self.header,self.picker,self.diff_ctrl,self.graph,self.tab,self.console,self.help_panel,self.net_panel,self.input]:
+            v.flex='W'
+        self.console.flex='WH'; self.help_panel.flex='WH'; self.net_panel.flex='W'; self.graph.flex='W'
+
+        self._init_header()
+        self._populate_quick(None)
+
+    def _init_header(self):
+        self.header.text="Čas:   0s    Skóre:    0"; self.time_bar.set_progress(1.0)
+        self._println(f"[SYS] Vyber misi ({'/'.join(self.missions)}), zvol obtížnost a dej Start.")
+        self._println("[SYS] Záložky dole: Console / Help / Net. Export logu: Save / Copy.")
+
+    def layout(self):
+        W,H=self.width,self.height; pad=10; row=24; btn=70; small=64
+        y=pad
+        self.title_lbl.frame=(pad,y,W-2*pad,row); y+=row+2
+        self.step_lbl.frame=(pad,y,(W-2*pad)//2,row); self.ids_lbl.frame=(pad+(W-2*pad)//2,y,(W-2*pad)//2,row); y+=row+2
+        self.time_bar.frame=(pad,y,W-2*pad,6); y+=10
+        self.header.frame=(pad,y,W-2*pad,row); y+=row+2
+
+        # horní řádek: picker + diff + 6 tlačítek (Start/Reset/Help/SelfTest/Save/Copy)
+        self.picker.frame=(pad,y,W-3*pad-6*btn-160,row)
+        self.diff_ctrl.frame=(self.picker.x+self.picker.width+6,y,150,row)
+        self.btn_start.frame=(W-pad-6*btn-2*pad,y,btn,row)
+        self.btn_reset.frame=(W-pad-5*btn-1*pad,y,btn,row)
+        self.btn_help.frame =(W-pad-4*btn,y,btn,row)
+        self.btn_selftest.frame=(W-pad-3*btn,y,btn,row)
+        self.btn_save.frame=(W-pad-2*btn,y,btn,row)
+        self.btn_copy.frame=(W-pad-1*btn,y,btn,row)
+        y+=row+6
+
+        self.graph.frame=(pad,y,W-2*pad,120); y+=120+6
+
+        self.tab.frame=(pad,y,220,row); y+=row+4
+        area_h=int(H*0.34)
+        self.console.frame=(pad,y,W-2*pad,area_h)
+        self.help_panel.frame=(pad,y,W-2*pad,area_h)
+        self.net_panel.frame=(pad,y,W-2*pad,area_h)
+        # net panel layout
+        nx=pad; ny=8
+        self.ip_tf.frame=(nx,ny,180,28); self.port_tf.frame=(nx+186,ny,90,28); self.code_tf.frame=(nx+280,ny,120,28)
+        self.btn_host.frame=(nx+406,ny,small,28); self.btn_join.frame=(nx+406+small+6,ny,small,28); self.btn_leave.frame=(nx+406+2*(small+6),ny,small,28)
+        self.peers_lbl.frame=(nx, ny+34, W-2*pad-10, 24)
+
+        y += area_h + 6
+
+        qw=(W-2*pad-5*6)/5.0; qh=28
+        for i,b in enumerate(self.quick): b.frame=(pad+i*(qw+6), y, qw, qh)
+        y += qh + 6
+
+        self.btn_prev.frame=(pad, y, 40, qh); self.btn_next.frame=(pad+44, y, 40, qh)
+        self.btn_clearlog.frame=(pad+88, y, 60, qh)
+        self.input.frame=(pad+152, y, W - (pad+152) - (pad+btn), qh)
+        self.btn_enter.frame=(W-pad-btn, y, btn, qh)
+
+        self.title_lbl.text = "CyberDrill 4.0" if not self.state else f"{self.state.mission.code} · {self.state.mission.name}"
+
+    # helpers
+    def _println(self, msg):
+        try: self._append_console(msg)
+        except Exception as e: print("[ERR] println:", err_str(e))
+
+    def _append_console(self, s):
+        # zápisy se sbírají a konzole se překreslí nejvýš jednou za snímek
+        self.log_store.append(s)
+        if self._render_timer is None:
+            self._render_timer=self.clock.call_later(1/30.0, self._render_console, name="render")
+
+    def _render_console(self):
+        self._render_timer=None
+        try:
+            self.console.text="\n".join(self.log_store.tail(self.console_lines))+"\n"
+            _scroll_tv_to_end(self.console)
+        except Exception as e: print("[ERR] render console:", err_str(e))
+
+    def _clear_console(self):
+        self.log_store.clear(); self.console.text=""
+
+    def will_close(self):
+        try:
+            if self.state: self.state.stop(); self.state.net.leave()
+            self.log_store.clear()
+            if self.journal: self.journal.close()
+        except Exception as e: print("[ERR] will_close:", err_str(e))
+
+    # UI callbacks
+    def on_start(self, sender):
+        try:
+            idx=max(0,self.picker.selected_index); m=mission_by_code(self.missions[idx])
+            if self.state: self.state.stop()
+            self._clear_console(); self.help_panel.hidden=False; self.net_panel.hidden=True; self.tab.selected_index=0
+            self.title_lbl.text=f"{m.code} · {m.name}"
+            self.state=GameState(m, UIAdapter(self), diff_name=self.diff, on_push_state=self._update_net_ui, journal=self.journal,
+                                 clock=self.clock)
+            self.help_panel.text=f"{m.name}\n\n{m.description}\n\nPovolené příkazy:\n- "+"\n- ".join(sorted(set(m.allowed+['selftest',*_FREE_CMDS])))
+            self._populate_quick(m)
+            self._update_net_ui()
+        except Exception as e:
+            self._println("[ERR] start: " + err_str(e))
+
+    def on_reset(self, sender):
+        if self.state: self.state.stop()
+        self._clear_console(); self.graph.update_data([], [])
+        self._init_header(); self._println("[SYS] Resetováno. Zvol misi a dej Start.")
+        self._populate_quick(None); self._update_net_ui()
+
+    def on_submit(self, sender):
+        try:
+            if self.state:
+                txt=self.input.text or ""; self.input.text=""; self.state.submit(txt)
+        except Exception as e:
+            self._println("[ERR] submit: " + err_str(e))
+    def on_submit_button(self, sender): self.on_submit(sender)
+
+    def toggle_help(self, sender):
+        # jen přepni tab
+        idx = self.tab.selected_index
+        self.tab.selected_index = 1 if idx != 1 else 0
+        self.on_tab(self.tab)
+
+    def on_tab(self, sender):
+        t = sender.segments[sender.selected_index]
+        self.console.hidden = (t!='Console')
+        self.help_panel.hidden = (t!='Help')
+        self.net_panel.hidden = (t!='Net')
+
+    def on_quick(self, sender):
+        if self.state and sender.title: self.input.text = sender.title
+    def on_hist_prev(self, sender):
+        if self.state: self.input.text = self.state.history_prev()
+    def on_hist_next(self, sender):
+        if self.state: self.input.text = self.state.history_next()
+    def on_clear_log(self, sender):
+        self._clear_console()
+
+    # Export logů
+    def on_save_log(self, sender):
+        try:
+            name=f"CyberDrill_{now_stamp()}.txt"
+            path=os.path.join(os.path.expanduser('~/Documents'), name)
+            with open(path,'w',encoding='utf-8') as f:
+                self.log_store.export(f)
+            if self.state: save_recording(self.state.recording(), path[:-4]+".replay.json")
+            self._println(f"[SYS] Log uložen: {name}")
+        except Exception as e:
+            self._println("[ERR] save: " + err_str(e))
+
+    def on_copy_log(self, sender):
+        try:
+            clipboard.set(self.log_store.text())
+            self._println("[SYS] Log zkopírován do schránky.")
+        except Exception as e:
+            self._println("[ERR] copy: " + err_str(e))
+
+    # Selftest
+    def on_selftest(self, sender):
+        if not self.state:
+            self._println("[SYS] Nejprve zvol misi a stiskni Start."); return
+        self.state.run_selftest()
+
+    # Net panel
+    def on_net_host(self, sender):
+        if not self.state: self._println("[NET] Nejprve Start."); return
+        port=as_int(self.port_tf.text or "50555",50555); code=self.code_tf.text or ""
+        ok,msg=self.state.net.host(port=port, code=code); self._println("[NET] "+msg); self._update_net_ui()
+    def on_net_join(self, sender):
+        if not self.state: self._println("[NET] Nejprve Start."); return
+        host=self.ip_tf.text or ""; port=as_int(self.port_tf.text or "50555",50555); code=self.code_tf.text or ""
+        ok,msg=self.state.net.join(host=host, port=port, code=code); self._println("[NET] "+msg)
+        if ok: self.state.net.request_sync(); self._update_net_ui()
+    def on_net_leave(self, sender):
+        if not self.state: return
+        self.state.net.leave(); self._println("[NET] Odpojeno"); self._update_net_ui()
+
+    def _update_net_ui(self):
+        if not self.state:
+            self.peers_lbl.text="Peers: -"; return
+        role = "HOST" if self.state.net.is_host() else ("CLIENT" if self.state.net.is_client() else "-")
+        peers = ", ".join(self.state.net.list_peers()) or "-"
+        self.peers_lbl.text=f"Role: {role}   Peers: {peers}"
+
+    def _populate_quick(self, mission):
+        arr = (mission.quick if mission else None) or ["status","help","selftest","clear","map"]
+        for i,b in enumerate(self.quick):
+            b.title = arr[i] if i<len(arr) else ""
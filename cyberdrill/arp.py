@@ -0,0 +1,119 @@
+# cyberdrill/arp.py – ARP tabulka segmentu s indexy: IP→MAC, MAC→IP (multimapa), seřazené IP, kolize
+import bisect
+
+# adresy se drží jako int (65k hostů = pár MB místo desítek); text jen pro výpis
+def ip_to_int(ip):
+    parts = ip.split(".")
+    if len(parts) != 4: raise ValueError(f"neplatná IP: {ip}")
+    n = 0
+    for p in parts:
+        b = int(p)
+        if not 0 <= b <= 255: raise ValueError(f"neplatná IP: {ip}")
+        n = (n << 8) | b
+    return n
+
+def int_to_ip(n): return f"{n >> 24}.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}"
+
+def mac_to_int(mac):
+    parts = mac.replace("-", ":").split(":")
+    if len(parts) != 6: raise ValueError(f"neplatná MAC: {mac}")
+    return int("".join(f"{int(p, 16):02X}" for p in parts), 16)
+
+def int_to_mac(n): return ":".join(f"{(n >> s) & 255:02X}" for s in range(40, -8, -8))
+
+def parse_cidr(cidr):
+    # "10.20.0.0/16" → (první, poslední+1); samotná IP = /32
+    ip, _, bits = cidr.partition("/")
+    bits = int(bits) if bits else 32
+    if not 0 <= bits <= 32: raise ValueError(f"neplatná maska: {cidr}")
+    size = 1 << (32 - bits); lo = ip_to_int(ip) & ~(size - 1) & 0xFFFFFFFF
+    return lo, lo + size
+
+_OUI = 0xAABBCC << 24       # MAC seedovaných hostů = AA:BB:CC + spodních 24 bitů IP
+
+class ArpTable:
+    # kolize se udržují průběžně při zápisu: dup = MAC u víc IP, spoof = MAC jiná než známá vazba
+    # (seedovaný host má vazbu danou vzorcem, takže known-good tabulka nestojí žádnou paměť)
+    def __init__(self):
+        self.ip2mac = {}            # ip -> mac
+        self.mac2ip = {}            # mac -> ip | set(ip) (set až od druhé IP)
+        self.order = []             # seřazené IP pro stránkování a CIDR filtr (bisect)
+        self.bad = {}               # ip -> "dup" | "spoof" | "dup+spoof"
+        self.seeded = (0, 0)        # rozsah IP se známou vazbou
+
+    def __len__(self): return len(self.ip2mac)
+
+    def seed(self, net="192.168.0.0/24", hosts=20, first=2):
+        lo, hi = parse_cidr(net); start = lo + first
+        n = max(0, min(int(hosts), hi - 1 - start))
+        self.seeded = (start, start + n)
+        for ip in range(start, start + n): self.set(ip, _OUI | (ip & 0xFFFFFF))
+        return n
+
+    def expected(self, ip):
+        lo, hi = self.seeded
+        return _OUI | (ip & 0xFFFFFF) if lo <= ip < hi else None
+
+    def set(self, ip, mac):
+        old = self.ip2mac.get(ip)
+        if old == mac: return
+        touched = [ip]
+        if old is None:
+            i = bisect.bisect_left(self.order, ip)
+            if i == len(self.order): self.order.append(ip)      # seed jde vzestupně → append
+            else: self.order.insert(i, ip)
+        else:
+            touched += self._unlink(old, ip)
+        self.ip2mac[ip] = mac
+        cur = self.mac2ip.get(mac)
+        if cur is None: self.mac2ip[mac] = ip
+        else:
+            if not isinstance(cur, set): cur = self.mac2ip[mac] = {cur}
+            touched += cur; cur.add(ip)
+        for t in touched: self._check(t)
+
+    def remove(self, ip):
+        mac = self.ip2mac.pop(ip, None)
+        if mac is None: return
+        del self.order[bisect.bisect_left(self.order, ip)]
+        self.bad.pop(ip, None)
+        for t in self._unlink(mac, ip): self._check(t)
+
+    def _unlink(self, mac, ip):
+        # odebere ip z MAC; vrací IP, které na té MAC zůstaly (jejich kolize se přepočítají)
+        cur = self.mac2ip.get(mac)
+        if not isinstance(cur, set):
+            self.mac2ip.pop(mac, None); return []
+        cur.discard(ip)
+        if len(cur) == 1:
+            (rest,) = cur; self.mac2ip[mac] = rest; return [rest]
+        return list(cur)
+
+    def _check(self, ip):
+        mac = self.ip2mac[ip]; exp = self.expected(ip)
+        dup = isinstance(self.mac2ip.get(mac), set); spoof = exp is not None and mac != exp
+        if dup or spoof: self.bad[ip] = "dup+spoof" if dup and spoof else ("dup" if dup else "spoof")
+        else: self.bad.pop(ip, None)
+
+    def ips_for(self, mac):
+        cur = self.mac2ip.get(mac)
+        return [] if cur is None else sorted(cur) if isinstance(cur, set) else [cur]
+
+    def collisions(self):
+        return [(ip, self.ip2mac[ip], self.bad[ip]) for ip in sorted(self.bad)]
+
+    def page(self, page=1, size=20, net=None, mac=None, bad=False):
+        # → (řádky [(ip, mac, důvod|None)], počet vyhovujících); filtry: CIDR, přesná MAC, jen kolize
+        if mac is not None: rows = self.ips_for(mac)
+        elif bad: rows = sorted(self.bad)
+        else: rows = self.order
+        if net is not None:
+            lo, hi = net
+            if rows is self.order:
+                a = bisect.bisect_left(rows, lo); b = bisect.bisect_left(rows, hi); total = b - a
+                start = a + (page - 1) * size
+                sel = rows[start:min(b, start + size)]
+                return [(ip, self.ip2mac[ip], self.bad.get(ip)) for ip in sel], total
+            rows = [ip for ip in rows if lo <= ip < hi]
+        total = len(rows); sel = rows[(page - 1) * size:page * size]
+        return [(ip, self.ip2mac[ip], self.bad.get(ip)) for ip in sel], total
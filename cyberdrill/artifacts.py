@@ -0,0 +1,172 @@
+# cyberdrill/artifacts.py – ověřování balíčků pro supply-chain cvičení: proudové SHA-256 artefaktů,
+# manifest SHA256SUMS (formát sha256sum) + podpis manifestu, paralelní ověření a cache digestů
+#
+# Model důvěry cache: digest z cache se použije místo hashování, takže cache musí být mimo dosah toho,
+# kdo může měnit repozitář. Leží proto v datech aplikace (util.data_dir, soubor podle absolutní cesty
+# kořene), ne v repozitáři. Záznam platí jen pro stejné (size, mtime_ns, ctime_ns, inode): mtime jde
+# vrátit přes `touch -r`, ctime ne a nahrazený soubor má jiný inode. Kdo může zapisovat do dat aplikace
+# (stejný uživatel), cache obejde – proti němu chrání jen ověření bez cache (cache=False).
+import os, json, hmac, hashlib, time
+
+from .util import err_str, data_dir
+
+MANIFEST = "SHA256SUMS"
+SIGNATURE = "SHA256SUMS.sig"    # hex HMAC-SHA256 manifestu klíčem repozitáře
+DRILL_KEY = b"cyberdrill-drill-key"
+_BUF = 1 << 20
+
+def sha256_file(path):
+    # proudově po 1 MB (hashlib uvolňuje GIL → vlákna hashují paralelně); 3.11+ file_digest
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, "file_digest"): return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256(); buf = bytearray(_BUF); view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n: return h.hexdigest()
+            h.update(view[:n])
+
+def sign_manifest(data, key=DRILL_KEY):
+    return hmac.new(key, data, hashlib.sha256).hexdigest()
+
+def parse_manifest(data):
+    # "<sha256>  <soubor>" (i "*<soubor>" binárního režimu) → {soubor: digest}
+    out = {}
+    for line in data.decode("utf-8", "replace").splitlines():
+        digest, _, name = line.strip().partition(" ")
+        name = name.strip().lstrip("*")
+        if len(digest) == 64 and name: out[name] = digest.lower()
+    return out
+
+class DigestCache:
+    # (cesta, size, mtime_ns, ctime_ns, inode) → sha256; digesty, které prošly podepsaným manifestem, se
+    # pamatují zvlášť (obsahová adresa: stejný obsah jinde = už ověřený). path=None → jen v paměti relace.
+    def __init__(self, path=None, root=None):
+        self.path = path; self.root = root; self.files = {}; self.verified = {}
+        self.hashed = 0; self.hashed_bytes = 0; self.dirty = False
+        if path:
+            try:
+                with open(path, encoding='utf-8') as f: d = json.load(f)
+                if d.get("v") == 2 and d.get("root") == root:
+                    self.files = d.get("files", {}); self.verified = d.get("verified", {})
+            except (OSError, ValueError): pass
+
+    def lookup(self, key, st):
+        e = self.files.get(key)
+        if e is not None and e[:4] == [st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino]: return e[4]
+        return None
+
+    def store(self, key, st, digest):
+        self.files[key] = [st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino, digest]; self.dirty = True
+
+    def mark_verified(self, digest, where):
+        if self.verified.get(digest) != where: self.verified[digest] = where; self.dirty = True
+
+    def save(self):
+        if not (self.path and self.dirty): return
+        import tempfile
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"v": 2, "root": self.root, "files": self.files, "verified": self.verified}, f,
+                          separators=(",", ":"))
+            os.replace(tmp, self.path); self.dirty = False
+        except OSError as e: print("[ERR] digest cache:", err_str(e))
+
+class ArtifactRepo:
+    # kořen/<balíček>/{SHA256SUMS, SHA256SUMS.sig, artefakty…}; cache_dir=None → util.data_dir("digests"),
+    # cache=False → cache jen v paměti relace
+    def __init__(self, root, key=DRILL_KEY, jobs=None, cache=True, cache_dir=None):
+        self.root = os.path.abspath(root); self.key = key; self.jobs = jobs; path = None
+        if cache:
+            name = hashlib.sha256(self.root.encode('utf-8', 'surrogateescape')).hexdigest()[:24] + ".json"
+            try: path = os.path.join(cache_dir or data_dir("digests"), name)
+            except OSError as e: print("[ERR] digest cache:", err_str(e))
+        self.cache = DigestCache(path, self.root)
+
+    def packages(self):
+        try: return sorted(e.name for e in os.scandir(self.root)
+                           if e.is_dir() and os.path.isfile(os.path.join(e.path, MANIFEST)))
+        except OSError: return []
+
+    def digest(self, rel):
+        # sha256 artefaktu (rel vůči kořeni); beze změny (size, mtime) → z cache, jinak proudově
+        path = os.path.join(self.root, rel); st = os.stat(path)
+        d = self.cache.lookup(rel, st)
+        if d is None: d = sha256_file(path); self._stored(rel, st, d)
+        return d
+
+    def _stored(self, rel, st, d):
+        self.cache.store(rel, st, d); self.cache.hashed += 1; self.cache.hashed_bytes += st.st_size
+
+    def _files(self, name):
+        d = os.path.join(self.root, name)
+        return sorted(os.path.join(name, f) for f in os.listdir(d) if f not in (MANIFEST, SIGNATURE)
+                      and os.path.isfile(os.path.join(d, f)))
+
+    def verify(self, name):
+        # → {"name", "state": ok|invalid|unknown, "sig": valid|invalid|missing, "files", "bad": [(soubor, důvod)]}
+        d = os.path.join(self.root, name)
+        if not os.path.isfile(os.path.join(d, MANIFEST)):
+            return {"name": name, "state": "unknown", "sig": "missing", "files": 0, "bad": [], "known": 0}
+        with open(os.path.join(d, MANIFEST), 'rb') as f: data = f.read()
+        try:
+            with open(os.path.join(d, SIGNATURE), encoding='utf-8') as f: sig = f.read().strip()
+            sig_state = "valid" if hmac.compare_digest(sig, sign_manifest(data, self.key)) else "invalid"
+        except OSError: sig_state = "missing"
+        expected = parse_manifest(data); bad = []; files = self._files(name); ok = []; known = 0
+        for rel in files:
+            fname = os.path.basename(rel); want = expected.pop(fname, None)
+            if want is None: bad.append((fname, "není v manifestu")); continue
+            try: got = self.digest(rel)
+            except OSError as e: bad.append((fname, err_str(e))); continue
+            if got != want: bad.append((fname, f"sha256 {got[:12]}… ≠ {want[:12]}…"))
+            else: ok.append(got); known += got in self.cache.verified
+        bad.extend((fname, "chybí") for fname in sorted(expected))
+        state = "ok" if sig_state == "valid" and not bad else "invalid"
+        if state == "ok":
+            for digest in ok: self.cache.mark_verified(digest, name)
+        return {"name": name, "state": state, "sig": sig_state, "files": len(files), "bad": bad, "known": known}
+
+    def verify_many(self, names=None):
+        # → (výsledky, statistika); artefakty mimo cache se nejdřív zahashují v poolu vláken,
+        # manifesty se pak ověří už z cache. Cache se uloží jen když přibyly digesty.
+        t0 = time.perf_counter(); names = self.packages() if names is None else list(names)
+        c = self.cache; h0, b0 = c.hashed, c.hashed_bytes; todo = []; total = 0
+        for name in names:
+            try: rels = self._files(name)
+            except OSError: continue
+            for rel in rels:
+                total += 1
+                try: st = os.stat(os.path.join(self.root, rel))
+                except OSError: continue
+                if c.lookup(rel, st) is None: todo.append((rel, st))
+        jobs = (os.cpu_count() or 1) if self.jobs is None else max(1, int(self.jobs))
+        if jobs > 1 and len(todo) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            def work(t):
+                try: return sha256_file(os.path.join(self.root, t[0]))
+                except OSError: return None
+            with ThreadPoolExecutor(max_workers=jobs) as ex: digests = list(ex.map(work, todo))
+            for (rel, st), d in zip(todo, digests):
+                if d is not None: self._stored(rel, st, d)
+        res = [self.verify(name) for name in names]
+        c.save(); hashed = c.hashed - h0
+        return res, {"packages": len(res), "files": total, "hashed": hashed, "cached": total - hashed,
+                     "hashed_bytes": c.hashed_bytes - b0, "wall_s": time.perf_counter() - t0}
+
+def make_repo(root, packages=("repoA", "repoB", "repoX"), tampered=("repoX",), files=3, size=65536, seed=0, key=DRILL_KEY):
+    # cvičný repozitář: podepsané balíčky; u tampered se po podpisu manifestu podvrhne první artefakt
+    import random
+    rng = random.Random(seed)
+    for name in packages:
+        d = os.path.join(root, name); os.makedirs(d, exist_ok=True); lines = []
+        for i in range(files):
+            fname = f"{name}-1.{i}.tar.gz"; data = rng.randbytes(size)
+            with open(os.path.join(d, fname), 'wb') as f: f.write(data)
+            lines.append(f"{hashlib.sha256(data).hexdigest()}  {fname}\n")
+        manifest = "".join(lines).encode()
+        with open(os.path.join(d, MANIFEST), 'wb') as f: f.write(manifest)
+        with open(os.path.join(d, SIGNATURE), 'w', encoding='utf-8') as f: f.write(sign_manifest(manifest, key) + "\n")
+        if name in tampered:
+            with open(os.path.join(d, f"{name}-1.0.tar.gz"), 'r+b') as f: f.seek(size // 2); f.write(b"\x90" * 32)
+    return root
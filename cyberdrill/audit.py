@@ -0,0 +1,225 @@
+# cyberdrill/audit.py – audit/syslog log pro insider cvičení: mmap soubory, proudové čtení po řádcích,
+# sloupce (offset, čas, uživatel, zdrojová IP) v array + indexy uživatel / IP / časový koš
+import os, re, mmap, array, bisect, calendar, time
+
+from .arp import ip_to_int, int_to_ip
+from .missions import MISSIONS_DIR
+
+# čas: ISO 8601, syslog ("Jan  3 03:14:07", rok z mtime souboru), auditd "audit(1700000000.123:…)",
+# cvičný formát "at=03:14" (sekundy dne)
+_ISO = re.compile(rb"(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d)(?::(\d\d))?")
+_SYSLOG = re.compile(rb"([A-Z][a-z]{2}) +(\d{1,2}) (\d\d):(\d\d):(\d\d)")
+_AUDITD = re.compile(rb"audit\((\d+)")
+_AT = re.compile(rb"\b(?:at|time)=(\d\d?):(\d\d)(?::(\d\d))?")
+_USER = re.compile(rb'(?:\buser=|\bacct="?|\bsudo: +|\bfor (?:invalid user )?)([\w.@$-]+)')
+_SRC = re.compile(rb"(?:\bfrom[= ]|\baddr=|\bsrc=|\brhost=)(\d{1,3}(?:\.\d{1,3}){3})\b")
+_MONTH_NAMES = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+_MONTHS = {m.encode(): i for i,m in enumerate(_MONTH_NAMES, 1)}
+BUCKET = 300                    # časový koš indexu (s)
+_CHUNK = 2500                   # řádků na jeden krok čtení na pozadí (~10 ms)
+DRILL_LINES = ("user=bob cmd='rm -rf /secure' from=10.0.0.23 at=03:14",
+               "user=alice cmd='kubectl get secrets' from=10.0.0.42 at=03:16")
+
+def parse_since(s, ref=None):
+    # "03:14" (vůči dni posledního záznamu `ref`), "2024-01-03", "2024-01-03T03:14", epoch → sekundy
+    s = s.strip()
+    if s.isdigit(): return int(s)
+    m = _ISO.fullmatch(s.encode()) or _ISO.fullmatch((s + " 00:00").encode())
+    if m:
+        y, mo, d, h, mi, sec = (int(x or 0) for x in m.groups())
+        return calendar.timegm((y, mo, d, h, mi, sec))
+    parts = s.split(":")
+    if 2 <= len(parts) <= 3 and all(p.isdigit() for p in parts):
+        h, mi, sec = (int(p) for p in parts + ["0"] * (3 - len(parts)))
+        day = 0 if ref is None or ref < 86400 else ref - ref % 86400
+        return day + h * 3600 + mi * 60 + sec
+    raise ValueError(f"neplatný čas: {s} (HH:MM, YYYY-MM-DD[THH:MM] nebo epoch)")
+
+class AuditLog:
+    # řádek n: segment (soubor / vestavěné řádky) + offset; sloupce jsou paralelní array, indexy drží
+    # čísla řádků vzestupně (array 'I'), takže průnik i stránkování nic nekopírují
+    def __init__(self, bucket=BUCKET):
+        self.bucket = bucket
+        self.segs = []              # (první řádek, buffer, rok pro syslog)
+        self.seg_start = array.array('Q')
+        self.off = array.array('Q'); self.ts = array.array('q')
+        self.user = array.array('I'); self.src = array.array('I')
+        self.users = [""]; self.user_code = {b"": 0}
+        self.by_user = {}; self.by_src = {}; self.by_bucket = {}
+        self.monotonic = True       # čas neklesá → --since = bisect ve sloupci ts
+        self._pending = []          # [buffer, pozice, rok] ještě nedočtených segmentů
+        self._size = 0              # bajtů ve všech segmentech (průběh čtení)
+        self._day = {}; self._ip = {}
+
+    def __len__(self): return len(self.off)
+
+    @classmethod
+    def from_setup(cls, cfg=None):
+        # setup "audit": {"files": ["auth.log", …], "builtin": true}; relativní cesty vůči packs/
+        cfg = cfg if isinstance(cfg, dict) else {}
+        log = cls()
+        if cfg.get("builtin", True): log.add_lines(DRILL_LINES)
+        files = cfg.get("files", ())
+        for p in [files] if isinstance(files, str) else files: log.add_file(os.path.join(MISSIONS_DIR, p))
+        return log
+
+    @property
+    def complete(self): return not self._pending
+
+    def add_lines(self, lines):
+        self._add_seg("\n".join(lines).encode() + b"\n", time.gmtime().tm_year)
+
+    def add_file(self, path):
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else b""
+        self._add_seg(buf, time.gmtime(st.st_mtime).tm_year)
+
+    def _add_seg(self, buf, year):
+        self._pending.append([buf, 0, year]); self._size += len(buf)
+
+    def progress(self):
+        # podíl přečtených bajtů 0..1
+        left = sum(len(buf) - pos for buf, pos, _ in self._pending)
+        return 1.0 - left / self._size if self._size else 1.0
+
+    def close(self):
+        # uvolní mmapy souborů; nedočtené segmenty se zahodí
+        for buf in [s[1] for s in self.segs] + [p[0] for p in self._pending]:
+            if isinstance(buf, mmap.mmap) and not buf.closed: buf.close()
+        self._pending = []
+
+    def warm(self): return self.ingest(_CHUNK)
+
+    def ingest(self, budget=None):
+        # proudové čtení: nejvýš `budget` řádků (None = vše); True = všechno načteno
+        left = budget
+        while self._pending and (left is None or left > 0):
+            seg = self._pending[0]; buf, pos, year = seg
+            if pos == 0:
+                self.segs.append((len(self.off), buf, year)); self.seg_start.append(len(self.off))
+            n = self._parse(buf, pos, year, left)
+            seg[1] = pos = n[0]
+            if left is not None: left -= n[1]
+            if pos >= len(buf): self._pending.pop(0)
+        return self.complete
+
+    def _parse(self, buf, pos, year, limit):
+        off = self.off; tsc = self.ts; uc = self.user; sc = self.src
+        by_user = self.by_user; by_src = self.by_src; by_bucket = self.by_bucket
+        codes = self.user_code; ipc = self._ip; bucket = self.bucket
+        user_s = _USER.search; src_s = _SRC.search; when = self._when
+        find = buf.find; end = len(buf); done = 0; last = tsc[-1] if tsc else None
+        while pos < end and (limit is None or done < limit):
+            eol = find(b"\n", pos)
+            if eol == -1: eol = end
+            if eol > pos:
+                line = buf[pos:eol]; n = len(off); off.append(pos)
+                t = when(line, year)
+                if last is not None and t < last: self.monotonic = False
+                last = t; tsc.append(t)
+                m = user_s(line); u = m.group(1) if m else b""
+                c = codes.get(u)
+                if c is None: c = codes[u] = len(self.users); self.users.append(u.decode("utf-8", "replace"))
+                uc.append(c)
+                m = src_s(line); ip = 0
+                if m:
+                    ip = ipc.get(m.group(1))
+                    if ip is None:
+                        try: ip = ip_to_int(m.group(1).decode())
+                        except ValueError: ip = 0
+                        ipc[m.group(1)] = ip
+                sc.append(ip)
+                a = by_user.get(c)
+                if a is None: a = by_user[c] = array.array('I')
+                a.append(n)
+                a = by_src.get(ip)
+                if a is None: a = by_src[ip] = array.array('I')
+                a.append(n)
+                b = t // bucket; a = by_bucket.get(b)
+                if a is None: a = by_bucket[b] = array.array('I')
+                a.append(n)
+                done += 1
+            pos = eol + 1
+        return pos, done
+
+    def _when(self, line, year):
+        c = line[:1]
+        if c.isdigit():
+            m = _ISO.match(line)
+            if m: return self._day_sec(m.group(1, 2, 3), m.group(4), m.group(5), m.group(6))
+        elif c.isupper():
+            m = _SYSLOG.match(line)
+            if m and m.group(1) in _MONTHS:
+                return self._day_sec((year, _MONTHS[m.group(1)], m.group(2)), m.group(3), m.group(4), m.group(5))
+        m = _AUDITD.search(line)
+        if m: return int(m.group(1))
+        m = _AT.search(line)
+        if m: return int(m.group(1)) * 3600 + int(m.group(2)) * 60 + int(m.group(3) or 0)
+        return self.ts[-1] if self.ts else 0        # bez času: jako předchozí řádek
+
+    def _day_sec(self, ymd, h, mi, s):
+        day = self._day.get(ymd)
+        if day is None: day = self._day[ymd] = calendar.timegm((int(ymd[0]), int(ymd[1]), int(ymd[2]), 0, 0, 0))
+        return day + int(h) * 3600 + int(mi) * 60 + int(s or 0)
+
+    def line(self, n):
+        seg = self.segs[bisect.bisect_right(self.seg_start, n) - 1]; buf = seg[1]; pos = self.off[n]
+        eol = buf.find(b"\n", pos)
+        return buf[pos:eol if eol != -1 else len(buf)].decode("utf-8", "replace").rstrip("\r")
+
+    def query(self, user=None, src=None, since=None, budget=_CHUNK):
+        # → vzestupná čísla řádků (range nebo list); vybere nejmenší kandidátní množinu, zbytek filtruje sloupci.
+        # Dokud log není načtený, dočte nejvýš `budget` řádků (None = vše) a odpoví nad tím, co už je
+        # v indexech – výsledek je částečný (complete == False), zbytek dočte krok na pozadí
+        self.ingest(budget)
+        n = len(self.off); cands = []; checks = []
+        if user is not None:
+            c = self.user_code.get(user.encode(), -1)
+            cands.append(self.by_user.get(c, ())); checks.append((self.user, c))
+        if src is not None:
+            ip = ip_to_int(src)
+            cands.append(self.by_src.get(ip, ())); checks.append((self.src, ip))
+        if since is not None:
+            t = parse_since(since, self.ts[-1] if n else None) if isinstance(since, str) else int(since)
+            if self.monotonic: cands.append(range(bisect.bisect_left(self.ts, t), n))
+            else:
+                keys = sorted(k for k in self.by_bucket if k >= t // self.bucket)
+                rows = sorted(i for k in keys for i in self.by_bucket[k] if self.ts[i] >= t)
+                cands.append(rows)
+            ts = self.ts; since_ok = lambda i: ts[i] >= t
+        else: since_ok = None
+        if not cands: return range(n)
+        base = min(cands, key=len)
+        if len(cands) == 1: return base
+        rows = [i for i in base if all(col[i] == v for col, v in checks)]
+        return [i for i in rows if since_ok(i)] if since_ok and not isinstance(base, range) else rows
+
+    def top(self, index, k=5):
+        # nejčastější uživatelé / zdroje podle délky indexu
+        items = sorted(((len(v), key) for key, v in index.items() if key), reverse=True)[:k]
+        if index is self.by_user: return [(self.users[c], cnt) for cnt, c in items]
+        return [(int_to_ip(ip), cnt) for cnt, ip in items]
+
+    def nbytes(self):
+        cols = sum(a.itemsize * len(a) for a in (self.off, self.ts, self.user, self.src))
+        idx = sum(a.itemsize * len(a) for d in (self.by_user, self.by_src, self.by_bucket) for a in d.values())
+        return cols + idx
+
+def write_log(path, n=1000000, seed=0, users=500, insiders=("bob",)):
+    # syntetický auth/audit log (syslog + cvičné řádky), čas vzestupně; insider se hlásí v noci z jedné IP
+    import random
+    rng = random.Random(seed); t = calendar.timegm((2024, 1, 1, 0, 0, 0))
+    names = [f"u{i:03d}" for i in range(users)] + list(insiders)
+    cmds = ("ls", "cat /etc/hosts", "kubectl get pods", "git pull", "vim notes.txt", "tar czf /tmp/x.tgz /secure")
+    with open(path, 'w', encoding='utf-8', newline="\n") as f:
+        for i in range(int(n)):
+            t += rng.randrange(0, 3)
+            st = time.gmtime(t); u = rng.choice(names); ip = f"10.0.{rng.randrange(4)}.{rng.randrange(1, 255)}"
+            if u in insiders: ip = "10.0.0.23"
+            stamp = f"{_MONTH_NAMES[st.tm_mon - 1]} {st.tm_mday:2d} {st.tm_hour:02d}:{st.tm_min:02d}:{st.tm_sec:02d}"
+            if i % 3:
+                f.write(f"{stamp} bastion sshd[{1000 + i % 9000}]: Accepted publickey for {u} from {ip} port {rng.randrange(30000, 60000)} ssh2\n")
+            else:
+                f.write(f"{stamp} bastion audit: user={u} cmd='{rng.choice(cmds)}' from={ip}\n")
+    os.utime(path, (t, t))          # syslog nemá rok – bere se z mtime souboru
@@ -0,0 +1,198 @@
+# cyberdrill/clock.py – jeden plánovač termínů (halda) nad vyměnitelnou časovou základnou:
+# VirtualClock (ruční krok / zrychlený čas), WallClock (monotonic, smyčku řídí vlastník), RealClock (Pythonista, ui.delay)
+import abc, time, heapq, collections
+
+# ========== handle a statistiky ==========
+class Timer:
+    # handle naplánovaného callbacku; cancel() je O(1), zrušené termíny se z haldy vyhazují líně
+    __slots__ = ("due", "fn", "interval", "name", "stats", "start", "fired", "late", "cancelled", "_sched", "_queued")
+    def __init__(self, sched, due, fn, interval=None, name=None, stats=None):
+        self._sched = sched; self.due = due; self.fn = fn; self.interval = interval
+        self.name = name or "-"; self.stats = stats
+        self.start = due; self.fired = 0; self.late = 0.0; self.cancelled = False; self._queued = False
+
+    @property
+    def active(self): return self._queued and not self.cancelled
+
+    def cancel(self):
+        if self.cancelled: return
+        self.cancelled = True
+        if self._queued: self._sched._live -= 1
+
+class TimerStats:
+    # late = zpoždění spuštění proti termínu (u periodických = drift proti mřížce start+k*interval),
+    # cost = doba běhu callbacku; obojí v sekundách hodin, drží se posledních `keep` vzorků
+    def __init__(self, keep=1024):
+        self.n = 0; self.late = collections.deque(maxlen=keep); self.cost = collections.deque(maxlen=keep)
+        self.late_max = 0.0; self.cost_sum = 0.0
+
+    def add(self, late, cost):
+        self.n += 1; self.late.append(late); self.cost.append(cost); self.cost_sum += cost
+        if late > self.late_max: self.late_max = late
+
+    def summary(self):
+        late = sorted(self.late); k = len(late)
+        return {"n": self.n, "late_ms_avg": sum(late)/k*1000.0 if k else 0.0,
+                "late_ms_p99": late[min(k-1, int(0.99*k))]*1000.0 if k else 0.0, "late_ms_max": self.late_max*1000.0,
+                "cost_ms_avg": self.cost_sum/self.n*1000.0 if self.n else 0.0,
+                "cost_ms_max": max(self.cost, default=0.0)*1000.0}
+
+# ========== plánovač ==========
+class Scheduler(abc.ABC):
+    # halda (due, seq, Timer); stejný termín → pořadí naplánování. Periodické termíny jedou pevnou mřížkou
+    # (start + k*interval), takže se zpoždění jednoho ticku nesčítá do dalších; opožděné se dohání.
+    # Časovou základnu (now) dodává podtřída – VirtualClock, WallClock.
+    def __init__(self):
+        self._q = []; self._seq = 0; self._live = 0
+        self.stats = {}             # jméno termínu -> TimerStats
+
+    @abc.abstractmethod
+    def now(self): ...
+
+    def call_later(self, delay, fn, name=None, stats=None):
+        return self._push(Timer(self, self.now() + max(0.0, float(delay)), fn, None, name, stats))
+
+    def call_every(self, interval, fn, name=None, first=None, stats=None):
+        interval = float(interval)
+        if interval <= 0: raise ValueError(f"interval musí být > 0: {interval}")
+        first = interval if first is None else max(0.0, float(first))
+        return self._push(Timer(self, self.now() + first, fn, interval, name, stats))
+
+    def pending(self): return self._live
+
+    def next_due(self):
+        q = self._q
+        while q and q[0][2].cancelled: heapq.heappop(q)
+        return q[0][0] if q else None
+
+    def report(self):
+        return {name: s.summary() for name,s in sorted(self.stats.items())}
+
+    # interní
+    def _push(self, t):
+        self._seq += 1; t._queued = True; self._live += 1
+        heapq.heappush(self._q, (t.due, self._seq, t)); self._armed(t.due)
+        return t
+
+    def _armed(self, due): pass     # RealClock: přeplánuje probuzení, je-li nový termín nejbližší
+
+    def _pop(self):
+        self.next_due()
+        t = heapq.heappop(self._q)[2]; t._queued = False; self._live -= 1
+        return t
+
+    def _fire(self, t, late):
+        t.fired += 1; t.late = late; c0 = time.perf_counter()
+        try: t.fn()
+        finally:
+            stats = self.stats if t.stats is None else t.stats
+            s = stats.get(t.name)
+            if s is None: s = stats[t.name] = TimerStats()
+            s.add(late, time.perf_counter() - c0)
+        if t.interval and not t.cancelled:
+            t.due = t.start + t.fired * t.interval; self._push(t)
+
+class VirtualClock(Scheduler):
+    # virtuální čas skáče na další termín; speed=None → co nejrychleji (ruční krok), 1.0 → reálný čas, 10.0 → 10×
+    def __init__(self, speed=None):
+        super().__init__()
+        self.speed = float(speed) if speed else None
+        self.t = 0.0; self._wall0 = None
+
+    def now(self): return self.t
+
+    def step(self):
+        if self.next_due() is None: return False
+        t = self._pop(); late = 0.0
+        if self.speed:
+            if self._wall0 is None: self._wall0 = time.monotonic() - self.t / self.speed
+            wait = self._wall0 + t.due / self.speed - time.monotonic()
+            if wait > 0: time.sleep(wait)
+            else: late = -wait * self.speed
+        self.t = max(self.t, t.due)
+        self._fire(t, late)
+        return True
+
+    def run(self, until=None, stop=None):
+        # until → zastaví před prvním termínem za hranicí (lock-step: run(until=k) pro k = 1, 2, …)
+        while True:
+            if stop and stop(): return
+            due = self.next_due()
+            if due is None or (until is not None and due > until): return
+            self.step()
+
+class WallClock(Scheduler):
+    # monotonic čas od vytvoření; vlastník smyčky volá run_due() a čeká nejvýš wait(cap)
+    def __init__(self):
+        super().__init__()
+        self._t0 = time.monotonic()
+
+    def now(self): return time.monotonic() - self._t0
+
+    def wait(self, cap=0.5):
+        due = self.next_due()
+        return cap if due is None else min(cap, max(0.0, due - self.now()))
+
+    def run_due(self):
+        n = 0
+        while True:
+            due = self.next_due()
+            if due is None: return n
+            now = self.now()
+            if due > now: return n
+            self._fire(self._pop(), now - due); n += 1
+
+class RealClock(WallClock):
+    # Pythonista: jediné probuzení přes ui.delay na nejbližší termín; ui.delay nejde zrušit,
+    # proto každé probuzení nese token a přeplánovaná (zastaralá) se jen ignorují
+    def __init__(self, delay=None):
+        super().__init__()
+        if delay is None:
+            import ui
+            delay = ui.delay
+        self._delay = delay; self._wake_at = None; self._token = 0; self._running = False
+
+    def _armed(self, due):
+        if self._running or (self._wake_at is not None and self._wake_at <= due): return
+        self._wake_at = due; self._token += 1; token = self._token
+        self._delay(lambda: self._wake(token), max(0.0, due - self.now()))
+
+    def _wake(self, token):
+        if token != self._token: return
+        self._wake_at = None; self._running = True
+        try: self.run_due()
+        finally:
+            self._running = False
+            due = self.next_due()
+            if due is not None: self._armed(due)
+
+def default_clock():
+    # Pythonista → RealClock (budí se přes ui.delay); bez modulu ui (Linux, CI) WallClock, jehož smyčku
+    # (run_due / wait) řídí volající – jádro se tak dá vytvořit i bez UI
+    try: import ui
+    except ImportError: return WallClock()
+    return RealClock(ui.delay)
+
+class ClockView:
+    # pohled jedné relace na sdílený plánovač: stejné termíny (lock-step), ale vlastní statistiky
+    def __init__(self, sched):
+        self.sched = sched; self.stats = {}
+
+    def now(self): return self.sched.now()
+    def call_later(self, delay, fn, name=None):
+        return self.sched.call_later(delay, fn, name, stats=self.stats)
+    def call_every(self, interval, fn, name=None, first=None):
+        return self.sched.call_every(interval, fn, name, first, stats=self.stats)
+    def report(self):
+        return {name: s.summary() for name,s in sorted(self.stats.items())}
+
+def merge_stats(stats_dicts, keep=4096):
+    # sloučí statistiky více pohledů (relací) podle jména termínu
+    out = {}
+    for stats in stats_dicts:
+        for name,s in stats.items():
+            m = out.get(name)
+            if m is None: m = out[name] = TimerStats(keep)
+            m.n += s.n; m.late.extend(s.late); m.cost.extend(s.cost)
+            m.cost_sum += s.cost_sum; m.late_max = max(m.late_max, s.late_max)
+    return out
@@ -0,0 +1,142 @@
+# cyberdrill/detect.py – streamové detektory anomálií pro IDS (plug-iny, O(1) čas i paměť na tick)
+import math, time
+
+# Každý detektor: update(obs) jednou za tick (obs = {"req", "uniq", "ratio"} posledního ticku),
+# score(engine, snap) při vyhodnocení verdiktu. Skóre > 1.0 = anomálie podle tohoto detektoru.
+_METRICS = ("req", "uniq", "ratio")
+
+def _sigma(var, mean):
+    # spodní mez rozptylu: konstantní provoz by jinak dal z-skóre ∞ při sebemenší změně
+    return max(math.sqrt(var), 0.01 * abs(mean), 1e-6)
+
+def _over(x, thr):
+    if thr > 0: return x / thr
+    return math.inf if x > 0 else 0.0
+
+class ThresholdDetector:
+    # původní pravidlo: průměr za 10 ticků nad pevnými prahy (req/uniq/SYN:ACK) × citlivost obtížnosti
+    name = "threshold"
+    def __init__(self, metric=None):
+        # pevné prahy hlídají req/uniq/SYN:ACK najednou – metrika by se tiše zahodila
+        if metric: raise ValueError(f"detektor threshold nebere metriku: {metric}")
+        self.metric = None
+    def update(self, obs): pass
+    def score(self, engine, snap):
+        s = engine.diff.detect_sensitivity
+        return max(_over(snap["req_s"], engine.baseline_rate * engine.thr_req_mult * s),
+                   _over(snap["uniq_src"], engine.thr_uniq * s), _over(snap["syn_ack"], engine.thr_ratio * s))
+
+class _Streaming:
+    # společný základ: jedna metrika, zahřátí `warm` ticků, poslední skóre se drží do dalšího ticku
+    warm = 10
+    def __init__(self, metric="req"):
+        if metric not in _METRICS: raise ValueError(f"neznámá metrika detektoru: {metric}")
+        self.metric = metric; self.n = 0; self.last = 0.0
+    def update(self, obs):
+        x = float(obs[self.metric]); self.n += 1
+        if self.n > self.warm: self.last = self._step(x)
+        else: self._learn(x); self.last = 0.0
+    def score(self, engine, snap): return self.last
+
+class EwmaDetector(_Streaming):
+    # z-skóre proti EWMA průměru a rozptylu; během anomálie se baseline neučí (útok ji nepřetáhne)
+    name = "ewma"
+    def __init__(self, metric="req", alpha=0.1, z=4.0):
+        super().__init__(metric); self.alpha = alpha; self.z = z; self.mean = None; self.var = 0.0
+    def _learn(self, x):
+        if self.mean is None: self.mean = x; return
+        d = x - self.mean; a = self.alpha
+        self.mean += a * d; self.var = (1 - a) * (self.var + a * d * d)
+    def _step(self, x):
+        sc = (x - self.mean) / (self.z * _sigma(self.var, self.mean))
+        if sc <= 1.0: self._learn(x)
+        return max(0.0, sc)
+
+class CusumDetector(_Streaming):
+    # jednostranný CUSUM: S = max(0, S + (x-μ)/σ - k), alarm při S > h; S je stropované na 1.5·h,
+    # takže po konci útoku spadne pod práh za ~h/(2k) čistých ticků
+    name = "cusum"
+    def __init__(self, metric="req", k=0.5, h=8.0, alpha=0.05):
+        super().__init__(metric); self.k = k; self.h = h; self.alpha = alpha
+        self.mean = None; self.var = 0.0; self.s = 0.0
+    def _learn(self, x):
+        if self.mean is None: self.mean = x; return
+        d = x - self.mean; a = self.alpha
+        self.mean += a * d; self.var = (1 - a) * (self.var + a * d * d)
+    def _step(self, x):
+        z = (x - self.mean) / _sigma(self.var, self.mean)
+        self.s = min(1.5 * self.h, max(0.0, self.s + z - self.k))
+        if self.s <= self.h: self._learn(x)
+        return self.s / self.h
+
+class HoltWintersDetector(_Streaming):
+    # Holt-Winters (level + trend, volitelně aditivní sezóna s periodou `season` ticků);
+    # skóre = reziduum / (dev · EWMA |rezidua|)
+    name = "hw"
+    def __init__(self, metric="req", alpha=0.3, beta=0.05, gamma=0.1, season=0, dev=5.0):
+        super().__init__(metric); self.alpha = alpha; self.beta = beta; self.gamma = gamma; self.dev = dev
+        self.season = int(season); self.seas = [0.0] * self.season
+        self.level = None; self.trend = 0.0; self.mad = 0.0
+    def _forecast(self):
+        return self.level + self.trend + (self.seas[self.n % self.season] if self.season else 0.0)
+    def _learn(self, x, resid=None):
+        if self.level is None: self.level = x; return
+        si = self.n % self.season if self.season else 0
+        s = self.seas[si] if self.season else 0.0
+        prev = self.level
+        self.level = self.alpha * (x - s) + (1 - self.alpha) * (self.level + self.trend)
+        self.trend = self.beta * (self.level - prev) + (1 - self.beta) * self.trend
+        if self.season: self.seas[si] = self.gamma * (x - self.level) + (1 - self.gamma) * s
+        if resid is None: resid = x - prev
+        self.mad = 0.9 * self.mad + 0.1 * abs(resid)
+    def _step(self, x):
+        resid = x - self._forecast()
+        sc = resid / (self.dev * max(self.mad, 0.01 * abs(self.level), 1e-6))
+        if sc <= 1.0: self._learn(x, resid)
+        return max(0.0, sc)
+
+DETECTORS = {c.name: c for c in (ThresholdDetector, EwmaDetector, CusumDetector, HoltWintersDetector)}
+COMBINE = ("max", "mean", "vote")
+
+def make_detector(spec):
+    # "ewma", "cusum:ratio", "hw:uniq" … → instance; metrika za dvojtečkou (výchozí req)
+    name, _, metric = spec.strip().partition(":")
+    cls = DETECTORS.get(name)
+    if cls is None: raise ValueError(f"neznámý detektor: {name} (dostupné: {', '.join(DETECTORS)})")
+    return cls(metric) if metric else cls()
+
+class IdsPipeline:
+    # kombinace skóre: max (stačí jeden detektor), mean (průměr > 1), vote (většina detektorů > 1);
+    # každý detektor si počítá čas update+score → náklad na tick pro instruktora
+    def __init__(self, specs=("threshold",), combine="max"):
+        self.set_combine(combine)
+        specs = [s for s in specs if s.strip()]
+        if not specs: raise ValueError("IDS potřebuje aspoň jeden detektor")
+        self.detectors = [make_detector(s) for s in specs]
+        self.specs = [d.name + (f":{d.metric}" if d.metric and d.metric != "req" else "") for d in self.detectors]
+        self.cost = [0.0] * len(self.detectors); self.calls = 0
+        self.scores = [0.0] * len(self.detectors)
+
+    def set_combine(self, combine):
+        if combine not in COMBINE: raise ValueError(f"neznámé kombinování: {combine} (dostupné: {', '.join(COMBINE)})")
+        self.combine = combine
+
+    def update(self, obs):
+        pc = time.perf_counter; cost = self.cost; self.calls += 1
+        for i,d in enumerate(self.detectors):
+            t0 = pc(); d.update(obs); cost[i] += pc() - t0
+
+    def evaluate(self, engine, snap):
+        pc = time.perf_counter; cost = self.cost; scores = self.scores
+        for i,d in enumerate(self.detectors):
+            t0 = pc(); scores[i] = d.score(engine, snap); cost[i] += pc() - t0
+        if self.combine == "max": combined = max(scores)
+        elif self.combine == "mean": combined = sum(scores) / len(scores)
+        else: combined = 2.0 * sum(1 for s in scores if s > 1.0) / len(scores)   # > 1 ⇔ nadpoloviční většina
+        return combined > 1.0, combined
+
+    def report(self):
+        # průměrný náklad detektoru na tick (update + vyhodnocení) v µs
+        n = max(1, self.calls)
+        return [{"detector": s, "score": round(sc, 3), "us_per_tick": c / n * 1e6}
+                for s,sc,c in zip(self.specs, self.scores, self.cost)]
@@ -0,0 +1,213 @@
+# cyberdrill/fsscan.py – detektor ransomwaru nad adresářem sandboxu: Shannonova entropie obsahu
+# (vzorky přes mmap v poolu vláken / procesů) + statistika přejmenování (*.locked) po uzlech.
+# Index (velikost, mtime_ns, inode) → entropie se ukládá do dat aplikace (soubor podle kořene, nikdy do
+# sledovaného stromu), takže rescan čte jen změněné soubory. Sken jde spustit po krocích (start/step).
+import os, json, math, mmap, time, hashlib, collections
+
+from .util import err_str, data_dir
+
+np = None   # numpy jen když je k dispozici (bincount); jinak Counter
+
+LOCKED_EXT = (".locked", ".enc", ".crypt")
+PACKED_EXT = (".zip", ".gz", ".7z", ".rar", ".jpg", ".jpeg", ".png", ".mp4", ".mp3", ".pdf", ".docx", ".xlsx")
+HIGH_ENTROPY = 7.5              # bitů/bajt; šifrovaná data ~7.99, text ~4–5
+_WIN = 16384                    # okno vzorku; velký soubor = začátek + střed + konec
+_BATCH = 256                    # souborů na jednu úlohu poolu
+_STEP = 2000                    # rozpočet jednoho kroku step(): položka průchodu = 1, přečtený soubor = 4
+
+def _load_numpy():
+    global np
+    if np is None:
+        try: import numpy
+        except ImportError: np = False
+        else: np = numpy
+    return np
+
+def shannon(data):
+    # entropie v bitech na bajt (0–8)
+    n = len(data)
+    if not n: return 0.0
+    if np: counts = np.bincount(np.frombuffer(data, np.uint8), minlength=256).tolist()
+    else: counts = collections.Counter(data).values()
+    return math.log2(n) - sum(c * math.log2(c) for c in counts if c) / n
+
+def file_entropy(path):
+    # → (entropie, přečteno bajtů); soubor nad jedno okno se čte přes mmap po oknech
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= _WIN: data = f.read()
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offs = (0, (size - _WIN) // 2, size - _WIN) if size > 3 * _WIN else range(0, size, _WIN)
+                data = b"".join(mm[o:o+_WIN] for o in offs)
+    return shannon(data), len(data)
+
+def _read_batch(task):
+    # úloha poolu (top-level kvůli pickle): [(rel, …)] → [(rel, entropie, bajtů)]; nečitelný soubor = None
+    root, rels = task; _load_numpy(); out = []
+    for rel in rels:
+        try: e, n = file_entropy(os.path.join(root, rel))
+        except OSError: e, n = None, 0
+        out.append((rel, e, n))
+    return out
+
+def is_locked(name): return name.endswith(LOCKED_EXT)
+
+class FsScanner:
+    # files: rel -> [size, mtime_ns, inode, entropie]; uzel = první složka pod kořenem
+    # persist: index v index_dir (None → util.data_dir("fsindex")); chyba zápisu indexu se vrací v přehledu skenu
+    def __init__(self, root, jobs=None, pool="thread", persist=True, index_dir=None):
+        self.root = os.path.abspath(root); self.jobs = jobs; self.pool = pool; self.persist = persist
+        self.index_dir = index_dir; self.index_path = None
+        self.files = {}; self._loaded = False; self._job = None; self._pool = None; self.error = None
+
+    def _load(self):
+        self._loaded = True
+        if not self.persist: return
+        name = hashlib.sha256(self.root.encode('utf-8', 'surrogateescape')).hexdigest()[:24] + ".json"
+        try: self.index_path = os.path.join(self.index_dir or data_dir("fsindex"), name)
+        except OSError as e: self.error = "index: " + err_str(e); return
+        try:
+            with open(self.index_path, encoding='utf-8') as f: d = json.load(f)
+            if d.get("v") == 2 and d.get("root") == self.root: self.files = d.get("files", {})
+        except (OSError, ValueError): pass
+
+    def _save(self, parts):
+        # parts = JSON položek files bez závorek, zakódované po kusech (json.dumps v C; json.dump je ~2× pomalejší)
+        import tempfile
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.index_path), suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write('{"v":2,"root":' + json.dumps(self.root) + ',"files":{' + ",".join(p for p in parts if p) + "}}")
+            os.replace(tmp, self.index_path)
+        except OSError as e: self.error = "index: " + err_str(e)
+
+    def _walk(self):
+        # → (rel, (size, mtime_ns, inode)) průběžně; jen stat, žádné čtení obsahu
+        cut = len(self.root) + 1; stack = [self.root]
+        while stack:
+            try: it = os.scandir(stack.pop())
+            except OSError: continue
+            with it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False): stack.append(e.path); continue
+                        if not e.is_file(follow_symlinks=False): continue
+                        st = e.stat(follow_symlinks=False)
+                    except OSError: continue
+                    yield e.path[cut:], (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def walk(self): return dict(self._walk())
+
+    def _read(self, rels):
+        # přečte změněné soubory v poolu (drží se do konce skenu); jobs=1 nebo málo práce → bez poolu
+        tasks = [(self.root, rels[i:i+_BATCH]) for i in range(0, len(rels), _BATCH)]
+        jobs = (os.cpu_count() or 1) if self.jobs is None else max(1, int(self.jobs))
+        if jobs == 1 or len(tasks) < 2: return [r for t in tasks for r in _read_batch(t)]
+        if self._pool is None:
+            if self.pool == "process":
+                from concurrent.futures import ProcessPoolExecutor as Pool
+            else:
+                from concurrent.futures import ThreadPoolExecutor as Pool
+            self._pool = Pool(max_workers=jobs)
+        return [r for batch in self._pool.map(_read_batch, tasks) for r in batch]
+
+    @property
+    def running(self): return self._job is not None
+
+    def progress(self):
+        # (přečteno, ke čtení | None dokud průchod stromem neskončil)
+        j = self._job
+        if j is None: return 0, 0
+        return j["read"], None if j["walk"] is not None else j["read"] + len(j["changed"])
+
+    def start(self):
+        # začne sken; průchod stromem i čtení změněných souborů pak běží po krocích step()
+        if not self._loaded: self._load()
+        self.error = None
+        self._job = {"t0": time.perf_counter(), "walk": self._walk(), "cur": {}, "changed": collections.deque(),
+                     "read": 0, "bytes": 0, "removed": 0}
+
+    def step(self, budget=_STEP):
+        # jeden krok skenu (budget=None → doběhne celý); vrací přehled skenu, když je hotovo, jinak None
+        j = self._job
+        if j is None: return None
+        # budget v položkách průchodu; přečtení souboru se počítá za 4
+        old = self.files; cur = j["cur"]; changed = j["changed"]; left = budget
+        if j["walk"] is not None:
+            for rel, s in j["walk"]:
+                cur[rel] = s; o = old.get(rel)
+                if o is None or o[1] != s[1] or o[0] != s[0] or o[2] != s[2]: changed.append(rel)
+                if left is not None:
+                    left -= 1
+                    if left <= 0: return None
+            j["walk"] = None
+            removed = [rel for rel in old if rel not in cur]
+            for rel in removed: del old[rel]
+            j["removed"] = len(removed)
+        while changed:
+            if left is not None and left < 4: return None
+            k = len(changed) if left is None else min(len(changed), left // 4)
+            for rel, e, n in self._read([changed.popleft() for _ in range(k)]):
+                s = cur[rel]; old[rel] = [s[0], s[1], s[2], None if e is None else round(e, 4)]; j["bytes"] += n
+            j["read"] += k
+            if left is not None: left -= 4 * k
+        if self._pool is not None: self._pool.shutdown(); self._pool = None
+        if self.index_path and (j["read"] or j["removed"]):
+            # index se kóduje po kusech (položka = 1), ať poslední krok velkého skenu nestojí
+            if "save" not in j: j["save"] = (list(old.items()), []); j["pos"] = 0
+            items, parts = j["save"]
+            while j["pos"] < len(items):
+                if left is not None and left <= 0: return None
+                pos = j["pos"]; k = len(items) - pos if left is None else min(len(items) - pos, left)
+                parts.append(json.dumps(dict(items[pos:pos+k]), separators=(",", ":"))[1:-1])
+                j["pos"] = pos + k
+                if left is not None: left -= k
+            self._save(parts)
+        self._job = None
+        return {"files": len(cur), "read": j["read"], "removed": j["removed"], "bytes": j["bytes"],
+                "wall_s": time.perf_counter() - j["t0"], "nodes": self.stats(), "error": self.error}
+
+    def cancel(self):
+        self._job = None
+        if self._pool is not None: self._pool.shutdown(wait=False, cancel_futures=True); self._pool = None
+
+    def scan(self):
+        # → přehled skenu najednou; čte jen soubory, jejichž (size, mtime_ns, inode) se od minula změnilo
+        self.start(); return self.step(None)
+
+    def stats(self):
+        # po uzlech: souborů, *.locked, vysoká entropie (mimo běžně komprimované formáty), průměrná entropie
+        nodes = {}
+        for rel, (_, _, _, e) in self.files.items():
+            node = rel.split(os.sep, 1)[0] if os.sep in rel else "."
+            s = nodes.get(node)
+            if s is None: s = nodes[node] = {"files": 0, "locked": 0, "high": 0, "ent_sum": 0.0}
+            s["files"] += 1
+            if is_locked(rel): s["locked"] += 1
+            if e is not None:
+                s["ent_sum"] += e
+                if e >= HIGH_ENTROPY and not rel.lower().endswith(PACKED_EXT): s["high"] += 1
+        for s in nodes.values(): s["entropy"] = s.pop("ent_sum") / s["files"]
+        return nodes
+
+def suspicious(nodes, share=0.3):
+    # uzly se šifrovací aktivitou: nějaké *.locked nebo podíl souborů s vysokou entropií ≥ share
+    return sorted((n for n, s in nodes.items() if s["locked"] or s["high"] >= share * s["files"]),
+                  key=lambda n: -(nodes[n]["locked"] + nodes[n]["high"]))
+
+def make_sandbox(root, nodes=3, files=20, infected=("node-2",), seed=0, size=(2048, 8192)):
+    # cvičný strom: node-N/ s textovými dokumenty; infikované uzly mají šifrovaný obsah přejmenovaný na *.locked
+    import random
+    rng = random.Random(seed)
+    words = ("report", "faktura", "smlouva", "zaloha", "projekt", "rozpocet", "server", "heslo", "audit", "plan")
+    for i in range(1, nodes + 1):
+        node = f"node-{i}"; d = os.path.join(root, node); os.makedirs(d, exist_ok=True)
+        for j in range(files):
+            name = f"doc{j:04d}.txt"
+            if node in infected:
+                with open(os.path.join(d, name + ".locked"), 'wb') as f: f.write(rng.randbytes(rng.randrange(*size)))
+            else:
+                with open(os.path.join(d, name), 'w', encoding='utf-8') as f:
+                    f.write(" ".join(rng.choice(words) for _ in range(rng.randrange(*size) // 7)))
+    return root
@@ -0,0 +1,748 @@
+# cyberdrill/game.py – registr příkazů a GameState (UI jen přes adaptér: log/header/ids_step/graph/finish)
+import os, time, random, collections
+
+from .util import err_str, as_int, clamp
+from .clock import default_clock
+from .missions import get_diff, MISSIONS_DIR
+from .net import NetPeer, _main_thread_dispatch
+from .arp import parse_cidr, mac_to_int, int_to_ip, int_to_mac
+from .audit import AuditLog
+from .fsscan import FsScanner, make_sandbox, suspicious
+from .artifacts import ArtifactRepo, make_repo, DRILL_KEY
+from .sim import SimEngine, MailSim
+
+# ========== příkazy (registr + předkompilovaný parser) ==========
+class CommandSpec:
+    # jeden příkaz: handler + deklarované přepínače (bool = bez hodnoty, str/int = s hodnotou)
+    __slots__=("name","fn","flags")
+    def __init__(self, name, fn, flags):
+        self.name=name; self.fn=fn
+        # předkompilováno: "--rate" → ("rate", int); nedeklarované přepínače se parsují jako str
+        self.flags={"--"+k:(k,t) for k,t in flags.items()}
+
+    def parse(self, parts):
+        args={}; flags=self.flags; i=1; n=len(parts)
+        while i<n:
+            p=parts[i]
+            if p[:2]=="--":
+                key,typ=flags.get(p) or (p[2:],str); val=True
+                if typ is not bool and i+1<n and parts[i+1][:2]!="--":
+                    val=parts[i+1]; i+=1
+                    if typ is int:
+                        try: val=int(val)
+                        except ValueError: pass   # handler/validator si poradí (as_int s defaultem)
+                args[key]=val
+            else:
+                args.setdefault("_pos",[]).append(p)
+            i+=1
+        return args
+
+COMMANDS = {}
+_ANY_CMD = CommandSpec("", None, {})
+_FREE_CMDS = ("net", "ids")   # povolené v každé misi a bez hodnocení kroku
+
+def command(name, **flags):
+    # dekorátor handleru GameState: @command("ddos", check=bool, rate=int, ...)
+    def deco(fn):
+        COMMANDS[name]=CommandSpec(name, fn, flags); return fn
+    return deco
+
+# ========== game state ==========
+class GameState:
+    def __init__(self, mission, ui_adapter, diff_name="Normal", on_push_state=None, clock=None, journal=None, seed=None,
+                 net_selector=None):
+        self.mission=mission; self.ui=ui_adapter; self.diff=get_diff(diff_name)
+        self.clock=clock or default_clock(); self.tick_count=0; self.journal=journal
+        self.seed=random.randrange(2**32) if seed is None else int(seed)
+        # záznam relace pro deterministické přehrání (viz replay_session)
+        self.rec={"v":1, "mission":mission.code, "diff":self.diff.name, "seed":self.seed, "cmds":[], "ids":[]}
+        self._t0=self.clock.now()
+        self.time_total=int(self.mission.time_limit * self.diff.time_mult)
+        self.time_left=self.time_total; self.score=0; self.finished=False
+        self.cmd_history=[]; self.hist_idx=-1; self.step_idx=0; self._tick=None; self._st_timer=None
+        self._suppress_user_log=False; self._cmd_src="user"
+        self.on_push_state = on_push_state or (lambda: None)
+
+        # log do UI (+ deník); _relay_log níže navíc posílá klientům
+        base_log=self.ui.log
+        def _orig_log(s, user=False):
+            base_log(s, user)
+            if self.journal: self._journal("log", s=s)
+        self._orig_log=_orig_log
+        if self.journal:
+            self.journal.context={"mission":mission.code, "diff":self.diff.name}
+            self._journal("start", time_total=self.time_total)
+
+        self.sim=SimEngine(self._orig_log, self.diff, rng=random.Random(self.seed))
+        self.mail=None; self._mail_timer=None
+
+        # další stavy
+        self.fs_alerted=False; self.isolated_nodes=set(); self.restored_snapshot=None; self.fs=None; self._fs_tmp=None
+        self._fs_timer=None
+        self.repo_updates={}; self.repo_quarantine=set(); self.sig_verified=set(); self.repo=None; self._repo_tmp=None
+        self.audit_loaded=False; self.accounts_disabled=set(); self.audit=None; self._audit_timer=None
+
+        # multiplayer
+        # zprávy z I/O vlákna nesmí sahat na stav mimo vlákno hodin: v Pythonistě je přehodí objc na hlavní
+        # vlákno, jinde jdou do fronty, kterou vybírá termín "net" (a každý tick); sdílený selector (RoomHost)
+        # vlákno nemá, handlery tam běží přímo ve smyčce vlastníka
+        dispatch=_main_thread_dispatch() if net_selector is None else None; self._net_inbox=None
+        if net_selector is None and dispatch is None:
+            self._net_inbox=collections.deque(); dispatch=self._net_inbox.append
+        self._net_timer=None
+        self.net = NetPeer(self._on_net_cmd, self._on_net_sync, self._orig_log, dispatch=dispatch, selector=net_selector)
+        self._frame_logs=[]; self._state_dirty=False; self._remote_state={}
+        def _relay_log(s, user=False):
+            self._orig_log(s, user)
+            if self.net and self.net.is_host(): self._frame_logs.append(s)
+        self.ui.log = _relay_log
+
+        if mission.setup.get("mail"):
+            try: self.mail=MailSim.from_setup(mission.setup["mail"])
+            except (OSError, ValueError) as e:
+                self.ui.log(f"[ERR] mail: {e}"); self.mail=MailSim()
+            if not self.mail.box.complete:
+                # velký korpus: dočítání a fulltext index po kouscích na pozadí, ať první --search nečeká
+                self._mail_timer=self.clock.call_every(0.05, self._mail_warm, name="mail")
+        if mission.setup.get("audit"):
+            try: self.audit=AuditLog.from_setup(mission.setup["audit"])
+            except (OSError, ValueError) as e:
+                self.ui.log(f"[ERR] audit: {e}"); self.audit=AuditLog.from_setup()
+            if not self.audit.complete:
+                self._audit_timer=self.clock.call_every(0.05, self._audit_warm, name="audit")
+        if mission.setup.get("arp"):
+            cfg=mission.setup["arp"]; self.sim.arp_seed(cfg.get("net","192.168.0.0/24"), cfg.get("hosts",20))
+        if mission.setup.get("arp_spoof"): self.sim.arp_spoof_enable(mission.setup["arp_spoof"])
+        if mission.setup.get("ids"):
+            cfg=mission.setup["ids"]; use=cfg.get("use",["threshold"])
+            if isinstance(use,str): use=use.split(",")
+            try: self.sim.set_detectors(use, cfg.get("combine","max"))
+            except (TypeError, AttributeError, ValueError) as e:
+                # chybná sada v packu nesmí shodit start mise – IDS jede s původními prahy
+                self.ui.log(f"[ERR] ids: {e}"); self.sim.set_detectors(("threshold",), "max")
+
+        self.ui.log(f"[SYS] Mise '{mission.name}' – role: {mission.role}. Limit: {self.time_total}s")
+        self.ui.log(f"[SYS] Obtížnost: {self.diff.name}")
+        self.ui.log("[SYS] Napiš 'help' pro nápovědu.")
+        self.ui.log(f"[SYS] První krok: {mission.steps[0].title}")
+        self._graph_tick=None
+        self._update_all_ui(); self._schedule_tick()
+
+    # --- snapshot pro sync ---
+    def _snapshot(self):
+        return {"mission": self.mission.code, "step": self.step_idx,
+                "score": self.score, "time_left": self.time_left, "ids": self._ids_state()}
+
+    def _journal(self, type_, **fields):
+        try: self.journal.write(type_, sim=round(self.clock.now(),3), **fields)
+        except Exception as e: print("[ERR] journal:", err_str(e))
+
+    def _push_state(self):
+        self._state_dirty=True
+        try: self.on_push_state()
+        except: pass
+
+    def _flush_frame(self):
+        # jednou za tick / příkaz: logy + změny stavu odejdou jedním rámcem
+        if not (self.net and self.net.is_host()):
+            self._frame_logs=[]; self._state_dirty=False; return
+        if not self._frame_logs and not self._state_dirty: return
+        logs,self._frame_logs=self._frame_logs,[]; self._state_dirty=False
+        try: self.net.publish_frame(logs, self._snapshot())
+        except Exception as e: print("[ERR] frame:", err_str(e))
+
+    # --- callbacks net ---
+    def _on_net_cmd(self, txt):
+        try:
+            self._orig_log(f"[REMOTE] > {txt}")
+            self._suppress_user_log=True; self._cmd_src="remote"
+            self.submit(txt)
+        finally:
+            self._suppress_user_log=False; self._cmd_src="user"
+
+    def _on_net_sync(self, payload):
+        try:
+            t=payload.get("t")
+            if t=="frame":
+                for line in payload.get("logs",()): self._orig_log(line)
+                d=payload.get("d")
+                if d:
+                    if payload.get("full"): self._remote_state={}
+                    self._remote_state.update(d); self._apply_remote_state(self._remote_state)
+            elif t=="state":
+                self._apply_remote_state(payload.get("v",{}))
+            elif t=="log":
+                self._orig_log(payload.get("s",""))
+        except Exception as e:
+            self._orig_log("[NET] sync err: " + err_str(e))
+
+    def replay_submit(self, text, src="user"):
+        # příkaz ze záznamu stejnou cestou jako v původní relaci
+        if src=="remote": self._on_net_cmd(text)
+        elif src=="auto": self._auto_submit(text)
+        else: self.submit(text)
+
+    def recording(self):
+        out=dict(self.rec); out["result"]={"score":self.score, "finished":self.finished, "step":self.step_idx,
+                                           "time_left":self.time_left, "ticks":self.tick_count}
+        return out
+
+    def _apply_remote_state(self, v):
+        self.time_left=v.get("time_left",self.time_left)
+        self.score=v.get("score",self.score)
+        self.step_idx=min(self.step_idx, v.get("step",self.step_idx))
+        self._update_all_ui()
+
+    # --- tick smyčka ---
+    def _schedule_tick(self):
+        if self.finished or self._tick is not None: return
+        self._tick=self.clock.call_every(1.0, self._on_tick, name="tick")
+
+    def _stop_tick(self):
+        if self._tick is not None: self._tick.cancel(); self._tick=None
+
+    def stop(self):
+        # ukončení zvenku (reset, zavření, server): zruší tick i běžící selftest
+        self.finished=True; self._stop_tick()
+        if self._st_timer is not None: self._st_timer.cancel(); self._st_timer=None
+        if self._mail_timer is not None: self._mail_timer.cancel(); self._mail_timer=None
+        if self._audit_timer is not None: self._audit_timer.cancel(); self._audit_timer=None
+        if self._fs_timer is not None: self._fs_timer.cancel(); self._fs_timer=None; self.fs.cancel()
+        if self.mail is not None: self.mail.box.close()
+        if self.audit is not None: self.audit.close()
+        if self._net_timer is not None: self._net_timer.cancel(); self._net_timer=None
+
+    def _net_drain(self):
+        # deque.append/popleft jsou atomické – I/O vlákno jen přidává, smyčka hodin odebírá
+        q=self._net_inbox
+        while q:
+            try: q.popleft()()
+            except Exception as e: self.ui.log("[ERR] net: " + err_str(e))
+        if self._net_timer is not None and self.net.mode is None:
+            self._net_timer.cancel(); self._net_timer=None
+
+    def _net_started(self, ok):
+        if ok and self._net_inbox is not None and self._net_timer is None:
+            self._net_timer=self.clock.call_every(0.02, self._net_drain, name="net")
+
+    def _mail_warm(self):
+        if self.finished or self.mail.warm():
+            self._mail_timer.cancel(); self._mail_timer=None
+
+    def _audit_warm(self):
+        if self.finished or self.audit.warm():
+            self._audit_timer.cancel(); self._audit_timer=None
+
+    def _on_tick(self):
+        if self._net_inbox: self._net_drain()
+        if self.finished: self._stop_tick(); return
+        self.tick_count += 1
+        try: self.sim.tick()
+        except Exception as e: self.ui.log("[ERR] tick: " + err_str(e))
+        self.time_left -= 1
+        ids=self._ids_state(); self.rec["ids"].append(ids[0])
+        if self.journal:
+            snap=self.sim.snapshot(10); self._journal("tick", time_left=self.time_left, ids=ids, **snap)
+        if self.time_left <= 0:
+            self.finished=True; self.ui.log("[SYS] Čas vypršel.")
+            self._stop_tick(); self._finish(); self._update_header()
+            self._push_state(); self._flush_frame(); return
+        self._update_all_ui(); self._push_state(); self._flush_frame()
+
+    # --- UI updates ---
+    def _ids_state(self):
+        verdict,_=self.sim.detect_ddos()
+        if verdict and self.sim.ddos_active: return "ATTACK"
+        if verdict: return "SUSPECT"
+        return "CLEAN"
+    def _update_all_ui(self):
+        self._update_header(); self._update_ids_step(); self._update_graph()
+    def _update_header(self):
+        self.ui.header(self.time_left, self.score, self.time_total)
+    def _update_ids_step(self):
+        step_str=f"Krok {self.step_idx+1}/{len(self.mission.steps)}"
+        self.ui.ids_step(self._ids_state(), step_str)
+    def _update_graph(self):
+        # graf si drží vlastní historii: poprvé celé okno, pak jen body z nových ticků (bez ticku nic)
+        t=self.tick_count
+        if t==self._graph_tick: return
+        if self._graph_tick is None:
+            self.ui.graph(self.sim.series_req(60), self.sim.series_ratio(60))
+        else:
+            k=min(t-self._graph_tick, self.sim.win)
+            self.ui.graph(self.sim.series_req(k), self.sim.series_ratio(k), append=True)
+        self._graph_tick=t
+
+    # --- help/hint ---
+    def _hint_text(self, step):
+        return step.hint if self.diff.hint_level>=2 else f"Cíl: {step.title}"
+
+    # --- příkazy ---
+    def submit(self, text):
+        try: self._submit(text)
+        finally: self._flush_frame()
+
+    def _submit(self, text):
+        if self.finished: return
+        text=(text or "").strip()
+        if not text: return
+        if not self._suppress_user_log: self.ui.log("> " + text, user=True)
+        self.rec["cmds"].append([self.tick_count, round(self.clock.now()-self._t0,3), self._cmd_src, text])
+        if self.journal: self._journal("cmd", c=text, src=self._cmd_src)
+        self.cmd_history.append(text); self.hist_idx=len(self.cmd_history)
+
+        parts=text.split(); base=parts[0]
+        args=(COMMANDS.get(base) or _ANY_CMD).parse(parts)
+
+        # Selftest povolen vždy
+        if base=="selftest":
+            self.run_selftest(); self._update_header(); return
+
+        # pokud jsme klient → poslat hostu a lokálně nespouštět (kromě net příkazů)
+        if self.net and self.net.is_client() and base!="net":
+            self.net.send_cmd(text); return
+
+        if base=="help":
+            self._cmd_help(); self._update_header(); return
+        if base not in self.mission.allowed and base not in _FREE_CMDS:
+            self.ui.log("[SYS] Neznámý/zakázaný příkaz pro tuto misi."); return
+
+        try:
+            self._dispatch(base, args)
+        except Exception as e:
+            self.ui.log("[ERR] cmd: " + err_str(e))
+
+        # validace kroku (pokud to nebyl net příkaz)
+        if base not in _FREE_CMDS:
+            st=self.mission.steps[self.step_idx]; ok=False
+            try:
+                ok=(st.validator_fn(base,args,self) if st.validator_fn else (base==st.validator))
+            except Exception as e:
+                self.ui.log("[ERR] validator: " + err_str(e)); ok=False
+
+            if ok:
+                self.score += int(100 * self.diff.score_mult)
+                self.ui.log("OK: " + st.success_log); self._advance()
+            else:
+                self.score = max(0, self.score - int(self.diff.penalty))
+                self.ui.log(f"[SYS] Mimo cíl. (-{int(self.diff.penalty)})")
+            if self.journal: self._journal("score", score=self.score, ok=bool(ok), step=self.step_idx)
+
+            self._update_all_ui(); self._push_state()
+
+    def _dispatch(self, cmd, args):
+        spec=COMMANDS.get(cmd)
+        if spec: spec.fn(self, args)
+
+    # Společné
+    @command("status")
+    def _cmd_status(self, args):
+        state=self._ids_state(); snap=self.sim.snapshot(10)
+        self.ui.log(f"[SYS] Krok {self.step_idx+1}/{len(self.mission.steps)} | Čas {self.time_left}s | Skóre {self.score}")
+        self.ui.log(f"[NET] req/s≈{snap['req_s']} uniq≈{snap['uniq_src']} SYN/ACK≈{snap['syn_ack']} | IDS {state}")
+    @command("scan", passive=bool)
+    def _cmd_scan(self, args):
+        snap=self.sim.snapshot(3); verdict,_=self.sim.detect_ddos()
+        self.ui.log(f"[RADIO-SIM] Scan: req/s≈{snap['req_s']} uniq≈{snap['uniq_src']}")
+        self.ui.log("[IDS] baseline OK; anomalies=0" if not verdict else "[IDS] traffic anomaly")
+    @command("log")
+    def _cmd_log(self, args):
+        snap=self.sim.snapshot(10)
+        self.ui.log(f"[LOG] t={time.strftime('%H:%M:%S')} SYN/ACK≈{snap['syn_ack']} req/s≈{snap['req_s']}")
+        if self.sim.ddos_active: self.ui.log("[LOG] Mitigation hint: rate-limit (emulated)")
+    @command("inject", target=str)
+    def _cmd_inject(self, args):
+        self.ui.log(f"[RADIO-SIM] Test paket doručen (target={args.get('target','N/A')}); integrity OK")
+    @command("clear")
+    def _cmd_clear(self, args):
+        self.ui.log("[SYS] Obrazovka vyčištěna.")
+    @command("map")
+    def _cmd_map(self, args):
+        self.ui.log("[GRID-SIM] Nodes: N1..N6; links coherent")
+    @command("heartbeat", node=str)
+    def _cmd_heartbeat(self, args):
+        self.ui.log(f"[GRID-SIM] Heartbeat sent → {args.get('node','N3')} | ack OK")
+    @command("patch", rule=str)
+    def _cmd_patch(self, args):
+        self.ui.log(f"[FIREWALL] Rule '{args.get('rule','drop-noise')}' applied")
+
+    # DDoS
+    @command("ddos", check=bool, stop=bool, rate=int, target=str, bots=int, zipf=str, syn=str)
+    def _cmd_ddos(self, args):
+        if args.get("check",False):
+            verdict,snap=self.sim.detect_ddos()
+            self.ui.log(f"[IDS] req/s≈{snap['req_s']} uniq≈{snap['uniq_src']} SYN/ACK≈{snap['syn_ack']}")
+            top=self.sim.top_talkers(3)
+            if top: self.ui.log("[IDS] Top zdroje: "+", ".join(f"{ip}≈{n}" for ip,n in top))
+            self.ui.log("[IDS] DDoS SUSPECTED" if verdict else "[IDS] No anomalies")
+        elif args.get("stop",False):
+            self.sim.ddos_stop(); self.ui.log("[IDS] Čekám na stabilní čistotu (5s)...")
+        elif "rate" in args or "target" in args:
+            rate=as_int(args.get("rate",1000),1000); tgt=args.get("target","base-ops")
+            bots=as_int(args.get("bots"),None)
+            try:
+                self.sim.ddos_start(rate, tgt, bots=bots, zipf=float(args.get("zipf",1.0)), syn_mix=float(args.get("syn",1.0)))
+            except ValueError as e:
+                self.ui.log(f"[ERR] ddos: {e}"); return
+            net=self.sim.botnet
+            self.ui.log(f"[NET-SIM] Sim load active: rate={rate} target={tgt}")
+            if bots is not None or "zipf" in args or "syn" in args:
+                self.ui.log(f"[NET-SIM] Botnet: {net.bots} zdrojů, zipf={net.zipf:g}, SYN mix={net.syn_mix:g}")
+        else:
+            self.ui.log("[SYS] ddos --check | --rate <n> --target <name> [--bots <n> --zipf <s> --syn <0..1>] | --stop")
+    @command("ids", use=str, combine=str)
+    def _cmd_ids(self, args):
+        # instruktor: ids --use threshold,ewma,cusum:ratio --combine max|mean|vote; bez argumentů skóre a náklad
+        p=self.sim.ids
+        if "use" in args or "combine" in args:
+            use=args.get("use"); specs=use.split(",") if isinstance(use,str) else None
+            try: self.sim.set_detectors(specs, args.get("combine", p.combine))
+            except ValueError as e:
+                self.ui.log(f"[ERR] ids: {e}"); return
+            p=self.sim.ids; self.ui.log(f"[IDS] Detektory: {', '.join(p.specs)} · kombinace {p.combine}")
+            self._update_all_ui(); return
+        self.sim.detect_ddos()
+        self.ui.log(f"[IDS] {self._ids_state()} · skóre {self.sim.ids_score:.2f} ({p.combine}, >1 = anomálie)")
+        for r in p.report():
+            self.ui.log(f"[IDS]   {r['detector']:<12} {r['score']:>7.2f}  {r['us_per_tick']:.1f} µs/tick")
+    @command("mitigate", mode=str, limit=int)
+    def _cmd_mitigate(self, args):
+        mode=args.get("mode","")
+        if mode=="rate-limit":
+            limit=as_int(args.get("limit",100),100); self.sim.set_rate_limit(limit)
+        elif mode=="off":
+            self.sim.set_rate_limit(None)
+        else:
+            self.ui.log("[SYS] mitigate --mode rate-limit --limit <n> | --mode off")
+
+    # ARP
+    @command("arp", list=bool, verify=bool, page=int, size=int, net=str, mac=str, bad=bool)
+    def _cmd_arp(self, args):
+        if args.get("list",False):
+            # stránkovaný výpis: --page N --size N, filtry --net <cidr> | --mac <mac> | --bad (jen kolize)
+            arp=self.sim.arp; page=max(1,as_int(args.get("page",1),1)); size=clamp(as_int(args.get("size",20),20),1,500)
+            try:
+                net=parse_cidr(args["net"]) if isinstance(args.get("net"),str) else None
+                mac=mac_to_int(args["mac"]) if isinstance(args.get("mac"),str) else None
+            except ValueError as e:
+                self.ui.log(f"[ERR] arp: {e}"); return
+            rows,total=arp.page(page, size, net=net, mac=mac, bad=bool(args.get("bad")))
+            for ip,m,why in rows:
+                tag=f" !COLLISION ({why})" if why else ""
+                self.ui.log(f"[NET-SIM] {int_to_ip(ip)} → {int_to_mac(m)}{tag}")
+            pages=max(1,-(-total//size))
+            if pages>1 or net or mac is not None or args.get("bad"):
+                self.ui.log(f"[NET-SIM] strana {page}/{pages} · {total} záznamů · kolizí v tabulce {len(arp.bad)}")
+        elif args.get("verify",False):
+            col=self.sim.arp_status()
+            self.ui.log("[NET-SIM] ARP collisions: "+", ".join(ip for ip,_ in col) if col else "[NET-SIM] ARP table clean")
+        else:
+            self.ui.log("[SYS] arp --list [--page N --size N --net <cidr> --mac <mac> --bad] | --verify")
+    @command("counter", target=str)
+    def _cmd_counter(self, args):
+        target=args.get("target","")
+        if target and target==self.sim.arp_spoof_ip and self.sim.arp_spoof_on:
+            self.sim.arp_spoof_disable(); self.ui.log(f"[SEC] ARP spoof neutralised on {target}")
+        else:
+            self.ui.log("[SEC] No action (target clean)")
+
+    # Mail
+    @command("mail", inbox=bool, view=str, flag=str, block=str, search=str, page=int, size=int)
+    def _cmd_mail(self, args):
+        if not self.mail: self.ui.log("[SYS] Mail není součástí této mise."); return
+        page=max(1,as_int(args.get("page",1),1)); size=clamp(as_int(args.get("size",20),20),1,500)
+        def footer(total, what):
+            # jen když je víc stran (total None = korpus se ještě dočítá)
+            if total is None: self.ui.log(f"[MAIL] strana {page}/? · {what} (dočítá se, známo {len(self.mail.box)})")
+            elif total>size: self.ui.log(f"[MAIL] strana {page}/{-(-total//size)} · {what} {total}")
+        if args.get("inbox",False):
+            lines,total=self.mail.list_inbox(page, size)
+            for line in lines: self.ui.log("[MAIL] "+line)
+            footer(total, "zpráv")
+        elif args.get("view",False):
+            self.ui.log("[MAIL] "+self.mail.view(args.get("view","")))
+        elif args.get("flag",False):
+            self.ui.log("[MAIL] "+self.mail.flag(args.get("flag","")))
+        elif args.get("block",False):
+            msg,lines,total=self.mail.block(args.get("block",""), page, size)
+            self.ui.log("[MAIL] "+msg)
+            if total: self.ui.log(f"[MAIL] Zasažené zprávy: {total}")
+            for line in lines: self.ui.log("[MAIL]   "+line)
+            footer(total, "zasažených")
+        elif isinstance(args.get("search"),str):
+            q=" ".join([args["search"]]+args.get("_pos",[]))     # mail --search heslo vpn → obě slova
+            try: lines,total=self.mail.search(q, page, size)
+            except ValueError as e:
+                self.ui.log(f"[ERR] mail: {e}"); return
+            if total is None:
+                done,known,complete=self.mail.box.indexed()
+                self.ui.log(f"[MAIL] Index se ještě staví ({done}/{known}{'' if complete else '+'} zpráv) – hledej za chvíli")
+                return
+            self.ui.log(f"[MAIL] Hledání '{q}': {total} zpráv")
+            for line in lines: self.ui.log("[MAIL]   "+line)
+            footer(total, "nalezených")
+        else:
+            self.ui.log("[SYS] mail --inbox [--page N --size N] | --view <id> | --flag <id> | --block <domain> | --search <slova>")
+
+    # Ransomware
+    def _fs_scanner(self, path=None):
+        # --path > setup "fs": {"root": …} (vůči packs/) > cvičný sandbox v dočasném adresáři (node-2 zašifrovaný)
+        cfg=self.mission.setup.get("fs")
+        if not path and isinstance(cfg, dict) and cfg.get("root"): path=os.path.join(MISSIONS_DIR, cfg["root"])
+        persist=True
+        if not path:
+            if self._fs_tmp is None:
+                import tempfile
+                self._fs_tmp=tempfile.TemporaryDirectory(prefix="cyberdrill-fs-")
+                make_sandbox(self._fs_tmp.name, seed=self.seed)
+            path=self._fs_tmp.name; persist=False     # jednorázový sandbox: index jen v paměti
+        if not os.path.isdir(path): raise ValueError(f"sandbox nenalezen: {path}")
+        if self.fs is None or self.fs.root!=os.path.abspath(path): self.fs=FsScanner(path, persist=persist)
+        return self.fs
+
+    def _fs_warm(self):
+        # krok skenu na pozadí; výsledek se vypíše, až doběhne
+        try: r=self.fs.step()
+        except OSError as e:
+            r=None; self.fs.cancel(); self.ui.log(f"[ERR] fs: {e}")
+        if r is not None or not self.fs.running:
+            self._fs_timer.cancel(); self._fs_timer=None
+            if r is not None: self._fs_report(r)
+
+    def _fs_report(self, r):
+        nodes=r["nodes"]; sus=suspicious(nodes)
+        self.ui.log(f"[FS] sken: {r['files']} souborů, přečteno {r['read']} ({r['bytes']/1e6:.1f} MB), "
+                    f"{r['wall_s']*1000:.0f} ms")
+        if r.get("error"): self.ui.log(f"[ERR] fs {r['error']} (index neuložen – další relace čte strom znovu)")
+        for node in sus[:3]:
+            s=nodes[node]
+            self.ui.log(f"[FS] suspicious encryption spike on {node} (entropie {s['entropy']:.2f} b/B, "
+                        f"{s['high']}/{s['files']} souborů)")
+            if s["locked"]: self.ui.log(f"[FS] unusual file rename patterns *.locked: {s['locked']} na {node}")
+        if not sus: self.ui.log("[FS] žádná šifrovací aktivita")
+        self.fs_alerted=self.fs_alerted or bool(sus)
+
+    @command("fs", monitor=bool, path=str, jobs=int)
+    def _cmd_fs(self, args):
+        if args.get("monitor",False):
+            if self._fs_timer is not None:
+                done,total=self.fs.progress()
+                self.ui.log(f"[FS] sken běží: přečteno {done}" + (f"/{total}" if total is not None else ", prochází se strom"))
+                return
+            try:
+                fs=self._fs_scanner(args["path"] if isinstance(args.get("path"),str) else None)
+                if isinstance(args.get("jobs"),int): fs.jobs=args["jobs"]
+                fs.start(); r=fs.step()
+            except (OSError, ValueError) as e:
+                if self.fs: self.fs.cancel()
+                self.ui.log(f"[ERR] fs: {e}"); return
+            if r is not None: self._fs_report(r); return
+            # velký strom: zbytek po krocích na pozadí (jako mail/audit), výsledek se vypíše po doběhnutí
+            self.ui.log("[FS] sken běží na pozadí…")
+            self._fs_timer=self.clock.call_every(0.05, self._fs_warm, name="fs")
+        else:
+            self.ui.log("[SYS] fs --monitor [--path <sandbox> --jobs N] (během skenu vypíše průběh)")
+    @command("isolate", node=str)
+    def _cmd_isolate(self, args):
+        node=args.get("node","")
+        if node:
+            self.isolated_nodes.add(node); self.ui.log(f"[NET] Node {node} isolated (network quarantine)")
+        else:
+            self.ui.log("[SYS] isolate --node <name>")
+    @command("restore", snapshot=str)
+    def _cmd_restore(self, args):
+        snap=args.get("snapshot","")
+        if snap:
+            self.restored_snapshot=snap; self.ui.log(f"[FS] Restore initiated from snapshot '{snap}' (emulated)")
+        else:
+            self.ui.log("[SYS] restore --snapshot <name>")
+
+    # Supply-chain
+    def _artifact_repo(self):
+        # setup "repo": {"root": …, "key": …} (vůči packs/) > cvičný repozitář v dočasném adresáři (repoX podvržený)
+        if self.repo is None:
+            cfg=self.mission.setup.get("repo")
+            if isinstance(cfg, dict) and cfg.get("root"):
+                root=os.path.join(MISSIONS_DIR, cfg["root"])
+                if not os.path.isdir(root): raise ValueError(f"repozitář nenalezen: {root}")
+                self.repo=ArtifactRepo(root, key=str(cfg.get("key","")).encode() or DRILL_KEY)
+            else:
+                import tempfile
+                self._repo_tmp=tempfile.TemporaryDirectory(prefix="cyberdrill-repo-")
+                self.repo=ArtifactRepo(make_repo(self._repo_tmp.name, seed=self.seed), cache=False)   # jednorázový
+        return self.repo
+
+    def _log_hashing(self, tag, st):
+        self.ui.log(f"[{tag}] {st['files']} artefaktů: zahashováno {st['hashed']} ({st['hashed_bytes']/1e6:.1f} MB), "
+                    f"z cache {st['cached']}, {st['wall_s']*1000:.0f} ms")
+
+    @command("repo", update=str, quarantine=str, list=bool)
+    def _cmd_repo(self, args):
+        if args.get("update",False):
+            name=args.get("update","")
+            try: (r,),st=self._artifact_repo().verify_many([name])
+            except (OSError, ValueError) as e:
+                self.ui.log(f"[ERR] repo: {e}"); return
+            self.repo_updates[name]=r["state"]
+            if r["state"]=="unknown": self.ui.log(f"[REPO] Update {name}: balíček nenalezen"); return
+            self.ui.log(f"[REPO] Update {name} downloaded – {'signature mismatch' if r['state']=='invalid' else 'signature OK'}")
+            self._log_hashing("REPO", st)
+        elif args.get("quarantine",False):
+            name=args.get("quarantine",""); self.repo_quarantine.add(name); self.ui.log(f"[REPO] {name} quarantined")
+        elif args.get("list",False):
+            try: names=self._artifact_repo().packages()
+            except (OSError, ValueError) as e:
+                self.ui.log(f"[ERR] repo: {e}"); return
+            for name in names:
+                tag=" [karanténa]" if name in self.repo_quarantine else ""
+                self.ui.log(f"[REPO] {name}: {self.repo_updates.get(name,'neověřeno')}{tag}")
+        else:
+            self.ui.log("[SYS] repo --update <name> | --quarantine <name> | --list")
+
+    @command("verify", sig=str, all=bool)
+    def _cmd_verify(self, args):
+        if args.get("sig",False):
+            name=args.get("sig",""); self.sig_verified.add(name)
+            try: r=self._artifact_repo().verify(name)
+            except (OSError, ValueError) as e:
+                self.ui.log(f"[ERR] verify: {e}"); return
+            if r["state"]!="unknown": self.repo_updates[name]=r["state"]
+            if r["state"]=="invalid":
+                self.ui.log(f"[VERIFY] {name}: SIGNATURE INVALID (podpis manifestu: {r['sig']}, vadných artefaktů: {len(r['bad'])})")
+            elif r["state"]=="ok":
+                known=f", {r['known']} už dříve ověřeno" if r["known"] else ""
+                self.ui.log(f"[VERIFY] {name}: signature valid ({r['files']} artefaktů{known})")
+            else: self.ui.log(f"[VERIFY] {name}: no update metadata")
+            for fname,why in r["bad"][:5]: self.ui.log(f"[VERIFY]   {fname}: {why}")
+            self.repo.cache.save()
+        elif args.get("all",False):
+            # všechny balíčky: hashování v poolu vláken, manifesty z cache
+            try: res,st=self._artifact_repo().verify_many()
+            except (OSError, ValueError) as e:
+                self.ui.log(f"[ERR] verify: {e}"); return
+            for r in res:
+                self.sig_verified.add(r["name"]); self.repo_updates[r["name"]]=r["state"]
+                self.ui.log(f"[VERIFY] {r['name']}: {'OK' if r['state']=='ok' else 'INVALID'}"
+                            + (f" – {r['bad'][0][0]}: {r['bad'][0][1]}" if r["bad"] else (f" (manifest: {r['sig']})" if r["state"]!="ok" else "")))
+            self._log_hashing("VERIFY", st)
+        else:
+            self.ui.log("[SYS] verify --sig <name> | --all")
+
+    # Insider
+    @command("audit", list=bool, user=str, since=str, page=int, size=int, **{"from":str})
+    def _cmd_audit(self, args):
+        if self.audit is None: self.audit=AuditLog.from_setup()
+        log=self.audit; page=max(1,as_int(args.get("page",1),1)); size=clamp(as_int(args.get("size",20),20),1,500)
+        q={k:args[k] for k in ("user","since") if isinstance(args.get(k),str)}
+        if isinstance(args.get("from"),str): q["src"]=args["from"]
+        if not (args.get("list",False) or q):
+            self.ui.log("[SYS] audit --list | --user <jméno> --from <ip> --since <HH:MM|YYYY-MM-DD[THH:MM]> [--page N --size N]"); return
+        t0=time.perf_counter()
+        try: rows=log.query(**q)
+        except ValueError as e:
+            self.ui.log(f"[ERR] audit: {e}"); return
+        ms=(time.perf_counter()-t0)*1000.0
+        if args.get("list",False): self.audit_loaded=True
+        if q: self.ui.log(f"[AUDIT] {' '.join(f'{k}={v}' for k,v in sorted(q.items()))}: {len(rows)} událostí ({ms:.1f} ms)")
+        if not log.complete:
+            self.ui.log(f"[AUDIT] Log se ještě načítá ({len(log)} řádků, {log.progress()*100:.0f} %) – výsledek je zatím částečný")
+        for n in rows[(page-1)*size:page*size]: self.ui.log("[AUDIT] "+log.line(n))
+        if len(rows)>size: self.ui.log(f"[AUDIT] strana {page}/{-(-len(rows)//size)} · {len(rows)} událostí")
+    @command("account", disable=str)
+    def _cmd_account(self, args):
+        if args.get("disable",False):
+            user=args.get("disable","")
+            if user: self.accounts_disabled.add(user); self.ui.log(f"[IAM] account {user} disabled")
+            else: self.ui.log("[SYS] account --disable <user>")
+        else:
+            self.ui.log("[SYS] account --disable <user>")
+
+    # Multiplayer příkaz
+    @command("net", host=str, join=bool, port=int, code=str, who=bool, leave=bool)
+    def _cmd_net(self, args):
+        # --join dřív než --host: "net --join --host <ip>" nesmí spustit hosta
+        if args.get("join",False):
+            host=args.get("host",""); port=as_int(args.get("port",50555),50555); code=str(args.get("code",""))
+            ok,msg=self.net.join(host=host, port=port, code=code, mission=self.mission.code, diff=self.diff.name)
+            self.ui.log("[NET] "+msg); self._net_started(ok)
+            if ok: self.net.request_sync()
+        elif args.get("host",False):
+            port=as_int(args.get("port",50555),50555); code=str(args.get("code",""))
+            ok,msg=self.net.host(port=port, code=code); self.ui.log("[NET] "+msg); self._net_started(ok)
+        elif args.get("who",False):
+            self.ui.log("[NET] Peers: "+", ".join(self.net.list_peers()))
+        elif args.get("leave",False):
+            self.net.leave(); self.ui.log("[NET] Odpojeno")
+        else:
+            self.ui.log("[SYS] net --host --port 50555 --code <pin> | net --join --host <ip> --port 50555 --code <pin> | net --who | net --leave")
+
+    # --- pomocné / historie / help ---
+    def _cmd_help(self):
+        allowed=", ".join(sorted(set(self.mission.allowed+['selftest',*_FREE_CMDS])))
+        cur=self.mission.steps[self.step_idx]
+        self.ui.log(f"[HELP] Dostupné příkazy: {allowed}")
+        self.ui.log(f"[HELP] {self._hint_text(cur)}")
+
+    def history_prev(self):
+        if not self.cmd_history: return ""
+        self.hist_idx=max(0,self.hist_idx-1); return self.cmd_history[self.hist_idx]
+    def history_next(self):
+        if not self.cmd_history: return ""
+        self.hist_idx=min(len(self.cmd_history), self.hist_idx+1)
+        return "" if self.hist_idx==len(self.cmd_history) else self.cmd_history[self.hist_idx]
+
+    def _advance(self):
+        if self.step_idx+1 < len(self.mission.steps):
+            self.step_idx+=1; nxt=self.mission.steps[self.step_idx]
+            self.ui.log(f"[SYS] Další krok: {nxt.title}")
+            self.ui.log(f"[SYS] Nápověda: {self._hint_text(nxt)}")
+            self._update_all_ui(); self._push_state()
+        else:
+            self.finished=True; self.ui.log("[SYS] Mise splněna!")
+            self._finish(); self._push_state()
+
+    def _finish(self):
+        self.ui.finish(self.score, self.time_left, self._rank())
+        if self.journal:
+            self._journal("finish", score=self.score, time_left=self.time_left, rank=self._rank(), step=self.step_idx)
+            self.journal.flush()
+
+    def _rank(self):
+        s=self.score
+        if s>=700: return "Cyber Major"
+        if s>=400: return "Operator"
+        if s>=200: return "Recruit"
+        return "Cadet"
+
+    # --- SELFTEST ---
+    def _plan_for_mission(self):
+        d=self.diff.name
+        wait_mid = 0.8 if d in ("Easy","Normal") else 1.2
+        wait_long= 5.5 if d in ("Easy","Normal") else 6.5
+        waits={"mid":wait_mid, "long":wait_long}
+        return [(cmd, waits.get(w,w)) for cmd,w in self.mission.selftest]
+    @property
+    def selftest_running(self): return self._st_timer is not None
+    def run_selftest(self):
+        if self._st_timer is not None: self.ui.log("[SELFTEST] Už běží."); return
+        plan=self._plan_for_mission()
+        if not plan: self.ui.log("[SELFTEST] Pro tuto misi není plán."); return
+        self.ui.log(f"[SELFTEST] Start · {self.mission.code} · {self.diff.name}")
+        self._st_queue=list(plan)
+        self._st_score_start=self.score; self._st_step_start=self.step_idx
+        self._st_tick()
+    def _st_tick(self):
+        if self.finished: self._st_finish(); return
+        if not self._st_queue: self._st_timer=self.clock.call_later(0.6, self._st_finish, name="selftest"); return
+        cmd,delay_s=self._st_queue.pop(0)
+        self._auto_submit(cmd)
+        self._st_timer=self.clock.call_later(max(0.05,float(delay_s)), self._st_tick, name="selftest")
+    def _auto_submit(self, cmd):
+        self._suppress_user_log=True; self._cmd_src="auto"; self.ui.log(f"[AUTO] > {cmd}")
+        try: self.submit(cmd)
+        finally: self._suppress_user_log=False; self._cmd_src="user"
+    def _st_finish(self):
+        ok=self.finished or (self.step_idx>=len(self.mission.steps))
+        delta=self.score - getattr(self,"_st_score_start",self.score)
+        self.ui.log(f"[SELFTEST] {self.mission.code} ... {'PASS' if ok else 'FAIL'}  (+{delta} bodů)")
+        self._st_timer=None
@@ -0,0 +1,605 @@
+# cyberdrill/headless.py – headless běh bez Pythonista UI: runner, záznam/přehrání, benchmarky, CLI
+import os, sys, time, json, collections, threading
+
+from .arp import int_to_ip
+from .clock import VirtualClock, ClockView, merge_stats
+from .missions import DIFFICULTIES, default_catalog, mission_by_code
+from .net import NetPeer, wire_encode, wire_decode, _OutQueue
+from .game import GameState, COMMANDS, _ANY_CMD
+
+# ========== headless běh (bez Pythonista UI) ==========
+class HeadlessAdapter:
+    # stejné rozhraní jako UIAdapter, jen sbírá výstup do paměti
+    def __init__(self, echo=False, keep=2000):
+        self.echo=echo; self.lines=collections.deque(maxlen=keep); self.result=None
+        self.ids_label="CLEAN"; self.step_str=""
+    def log(self, s, user=False):
+        self.lines.append(s)
+        if self.echo: print(s)
+    def header(self, t, score, total): pass
+    def ids_step(self, ids_label, step_str): self.ids_label=ids_label; self.step_str=step_str
+    def graph(self, req, ratio, append=False): pass
+    def finish(self, score, t, rank):
+        self.result={"score":score, "time_left":t, "rank":rank}
+        self.log(f"[SYS] Konec. Skóre {score}, zbylý čas {t}s, hodnost: {rank}")
+
+class HeadlessRunner:
+    # GameState + SimEngine na VirtualClock; speed=None → max rychlost, 1.0 → reálný čas
+    def __init__(self, mission_code, diff_name="Normal", speed=None, seed=None, echo=False):
+        self.mission=mission_by_code(mission_code)
+        if self.mission is None: raise ValueError(f"neznámá mise: {mission_code}")
+        self.diff_name=diff_name; self.speed=speed; self.seed=seed; self.echo=echo
+
+    def run(self, commands=None, max_time=None):
+        # commands: [(t_sekundy, "příkaz"), ...]; None → selftest plán mise
+        clock=VirtualClock(self.speed); adapter=HeadlessAdapter(echo=self.echo)
+        t0=time.perf_counter()
+        gs=GameState(self.mission, adapter, diff_name=self.diff_name, clock=clock, seed=self.seed)
+        self.state=gs
+        if commands is None:
+            gs.run_selftest()
+        else:
+            for at,txt in commands: clock.call_later(at, lambda txt=txt: gs.submit(txt), name="cmd")
+        clock.run(until=max_time, stop=lambda: gs.finished and not gs.selftest_running)
+        wall=time.perf_counter()-t0
+        return {"mission":self.mission.code, "difficulty":gs.diff.name, "seed":self.seed,
+                "score":gs.score, "rank":gs._rank(), "finished":gs.finished,
+                "completed":gs.step_idx>=len(self.mission.steps)-1 and gs.finished and gs.time_left>0,
+                "ticks":gs.tick_count, "sim_s":round(clock.now(),3), "wall_s":wall,
+                "ids_cache":gs.sim.cache_stats(),
+                "ticks_per_s":gs.tick_count/wall if wall>0 else float("inf")}
+
+def run_batch(mission_code, diff_name="Normal", runs=100, seed=0, speed=None, commands=None):
+    t0=time.perf_counter(); results=[]; ticks=0
+    for i in range(int(runs)):
+        r=HeadlessRunner(mission_code, diff_name, speed=speed, seed=seed+i).run(commands)
+        results.append(r); ticks+=r["ticks"]
+    wall=time.perf_counter()-t0
+    return {"runs":len(results), "ticks":ticks, "wall_s":wall,
+            "ticks_per_s":ticks/wall if wall>0 else float("inf"),
+            "sessions_per_min":60.0*len(results)/wall if wall>0 else float("inf"),
+            "passed":sum(1 for r in results if r["completed"]), "results":results}
+
+# --- lock-step: víc relací na jedněch hodinách ---
+def run_lockstep(sessions, speed=None, seed=0, max_ticks=None):
+    # sessions: [(mise, obtížnost), ...]; všechny běží selftest na jednom VirtualClock, každá přes vlastní ClockView.
+    # Hodiny se posouvají po celých sekundách; po každé se ověří, že běžící relace mají stejný počet ticků.
+    clock=VirtualClock(speed); states=[]
+    for i,(code,diff) in enumerate(sessions):
+        mission=mission_by_code(code)
+        if mission is None: raise ValueError(f"neznámá mise: {code}")
+        gs=GameState(mission, HeadlessAdapter(keep=64), diff_name=diff, clock=ClockView(clock), seed=seed+i)
+        gs.run_selftest(); states.append(gs)
+    t0=time.perf_counter(); k=0; skew=0
+    while clock.next_due() is not None and any(not gs.finished or gs.selftest_running for gs in states):
+        k+=1; clock.run(until=float(k))
+        live=[gs.tick_count for gs in states if not gs.finished]
+        if live: skew=max(skew, max(live)-min(live))
+        if max_ticks and k>=max_ticks: break
+    wall=time.perf_counter()-t0
+    merged=merge_stats([gs.clock.stats for gs in states])
+    return {"sessions":len(states), "ticks":k, "skew":skew, "wall_s":wall,
+            "passed":sum(1 for gs in states if gs.finished and gs.step_idx>=len(gs.mission.steps)-1 and gs.time_left>0),
+            "timing":{name:s.summary() for name,s in sorted(merged.items())}}
+
+# --- selftest matice: mise × obtížnosti × seedy ---
+def _selftest_cell(task):
+    code,diff,seed=task
+    r=HeadlessRunner(code, diff, seed=seed).run()
+    return {"mission":code, "diff":diff, "seed":seed, "pass":r["completed"], "score":r["score"],
+            "ticks":r["ticks"], "wall_s":r["wall_s"]}
+
+def selftest_matrix(missions=None, diffs=None, seeds=3, seed=0, jobs=None):
+    # každá buňka = selftest plán mise na VirtualClock; jobs=None → všechna jádra, 1 → bez poolu
+    missions=list(missions or default_catalog().codes()); diffs=list(diffs or DIFFICULTIES)
+    tasks=[(m, d, seed+i) for m in missions for d in diffs for i in range(int(seeds))]
+    jobs=(os.cpu_count() or 1) if jobs is None else max(1, int(jobs))
+    t0=time.perf_counter()
+    if jobs==1 or len(tasks)<2:
+        cells=[_selftest_cell(t) for t in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            cells=list(ex.map(_selftest_cell, tasks, chunksize=max(1, len(tasks)//(jobs*4))))
+    wall=time.perf_counter()-t0
+    return {"missions":missions, "diffs":diffs, "seeds":int(seeds), "jobs":jobs, "cells":cells, "wall_s":wall,
+            "cpu_s":sum(c["wall_s"] for c in cells), "passed":sum(1 for c in cells if c["pass"]),
+            "sessions_per_s":len(cells)/wall if wall>0 else float("inf")}
+
+def format_selftest_matrix(m):
+    # řádek = mise, sloupec = obtížnost; buňka "PASS 412" (všechny seedy prošly, průměrné skóre) / "FAIL 2/3"
+    by={}
+    for c in m["cells"]: by.setdefault((c["mission"], c["diff"]), []).append(c)
+    lines=["mise  "+"".join(f"{d:>14}" for d in m["diffs"])]
+    for mc in m["missions"]:
+        row=f"{mc:<6}"
+        for d in m["diffs"]:
+            cs=by.get((mc, d), []); ok=sum(1 for c in cs if c["pass"]); avg=sum(c["score"] for c in cs)/max(1, len(cs))
+            tag=f"PASS {avg:.0f}" if ok==len(cs) else f"FAIL {ok}/{len(cs)} {avg:.0f}"
+            row+=f"{tag:>14}"
+        lines.append(row)
+    lines.append(f"buňky={len(m['cells'])} pass={m['passed']} wall={m['wall_s']:.2f}s cpu={m['cpu_s']:.2f}s "
+                 f"jobs={m['jobs']} relací/s={m['sessions_per_s']:.0f}")
+    return "\n".join(lines)
+
+def selftest_diff(m, baseline):
+    # buňky, které se oproti baseline změnily (PASS/FAIL nebo skóre) – gate pro změny prahů a validátorů
+    old={(c["mission"], c["diff"], c["seed"]):c for c in baseline["cells"]}
+    out=[]
+    for c in m["cells"]:
+        b=old.get((c["mission"], c["diff"], c["seed"]))
+        if b is None or b["pass"]!=c["pass"] or b["score"]!=c["score"]: out.append((b, c))
+    return out
+
+# --- záznam / přehrání ---
+def save_recording(rec, path):
+    with open(path, 'w', encoding='utf-8') as f: json.dump(rec, f, ensure_ascii=False)
+
+def load_recording(path):
+    with open(path, encoding='utf-8') as f: rec=json.load(f)
+    if rec.get("v")!=1: raise ValueError(f"nepodporovaná verze záznamu: {rec.get('v')}")
+    return rec
+
+def replay_session(rec, speed=None, echo=False):
+    # přehraje záznam headless: stejný seed, stejné pořadí příkazů mezi tiky → stejné skóre a IDS verdikty
+    mission=mission_by_code(rec["mission"])
+    if mission is None: raise ValueError(f"neznámá mise: {rec['mission']}")
+    clock=VirtualClock(speed); t0=time.perf_counter()
+    gs=GameState(mission, HeadlessAdapter(echo=echo), diff_name=rec["diff"], clock=clock, seed=rec["seed"])
+    last=0
+    for tick,_,src,text in rec["cmds"]:
+        if text.split()[0]=="selftest": continue     # jeho [AUTO] příkazy jsou v záznamu samostatně
+        # příkaz po `tick` ticích → mezi tikem `tick` a `tick`+1; pořadí drží sekvence hodin
+        clock.call_later(tick+0.5, lambda text=text, src=src: gs.replay_submit(text, src), name="replay"); last=max(last,tick)
+    ticks=rec.get("result",{}).get("ticks", len(rec["ids"]))
+    clock.run(until=max(ticks, last)+0.75, stop=lambda: gs.finished)
+    out=gs.recording(); want=rec.get("result",{})
+    ids_a="".join(rec["ids"]); ids_b="".join(out["ids"])[:len(ids_a)]
+    return {"mission":mission.code, "score":gs.score, "expected_score":want.get("score"),
+            "ids_match":ids_a==ids_b, "match":ids_a==ids_b and gs.score==want.get("score", gs.score),
+            "ticks":gs.tick_count, "wall_s":time.perf_counter()-t0}
+
+def replay_batch(recs, runs=1, speed=None):
+    t0=time.perf_counter(); n=0; bad=0
+    for _ in range(int(runs)):
+        for rec in recs:
+            r=replay_session(rec, speed=speed); n+=1; bad+=0 if r["match"] else 1
+    wall=time.perf_counter()-t0
+    return {"sessions":n, "mismatches":bad, "wall_s":wall, "sessions_per_s":n/wall if wall>0 else float("inf")}
+
+def bench_net_rtt(clients=1, rounds=500, timeout=5.0):
+    # loopback: klient pošle cmd, host ho rozešle jako log všem; měří round-trip odesílatele
+    host=NetPeer(None, None, lambda s: None)
+    host.on_cmd=lambda c: host.broadcast({"t":"log","s":c})
+    ok,msg=host.host(port=0)
+    if not ok: raise RuntimeError(msg)
+    peers=[]; events=[]
+    try:
+        for i in range(int(clients)):
+            ev=threading.Event(); want={}
+            def on_sync(m, ev=ev, want=want):
+                if m.get("t")=="log" and m.get("s")==want.get("s"): ev.set()
+            p=NetPeer(None, on_sync, lambda s: None); ok,msg=p.join("127.0.0.1", host.port)
+            if not ok: raise RuntimeError(msg)
+            peers.append((p,ev,want))
+        deadline=time.monotonic()+timeout
+        while len(host.list_peers())<len(peers) and time.monotonic()<deadline: time.sleep(0.005)
+        rtts=[]
+        for r in range(int(rounds)):
+            p,ev,want=peers[r%len(peers)]
+            want["s"]=f"status #{r}"; ev.clear(); t0=time.perf_counter()
+            p.send_cmd(want["s"])
+            if not ev.wait(timeout): raise RuntimeError(f"timeout v kole {r}")
+            rtts.append(time.perf_counter()-t0)
+        rtts.sort()
+        pick=lambda q: rtts[min(len(rtts)-1,int(q*len(rtts)))]*1000.0
+        return {"clients":len(peers), "rounds":len(rtts), "p50_ms":pick(0.5), "p99_ms":pick(0.99),
+                "max_ms":rtts[-1]*1000.0, "cmds_per_s":len(rtts)/sum(rtts)}
+    finally:
+        for p,_,_ in peers: p.leave()
+        host.leave()
+
+def check_frame_sync(frames=200, seed=0):
+    # regrese delta syncu bez socketů: host a klientský GameState spojené přes podvržené _send;
+    # pole se mění i vrací uvnitř okna ack_every – obraz klienta musí po každém rámci sedět se stavem hosta
+    import random
+    rng=random.Random(seed); sock=object()
+    gs=GameState(mission_by_code("A3"), HeadlessAdapter(keep=16), clock=VirtualClock(), seed=seed)
+    host=NetPeer(None, None, lambda s: None, threaded=False); cli=gs.net
+    host.mode="host"; cli.mode="client"; host._clients=[(sock, ("check", 0))]
+    host._caps[sock]={"frame"}; host._sent[sock]=None; host._out[sock]=_OutQueue()   # prázdná fronta: bez backlogu
+    host._send=lambda s,obj: cli._handle_msg(s, obj, False) or True
+    cli._send=lambda s,obj: host._handle_msg(s, obj, True) or True
+    state={"mission":"A3", "step":0, "score":0, "time_left":300, "ids":"CLEAN"}; bad=[]
+    script={2:"ATTACK", 3:"CLEAN"}      # změna a návrat mezi dvěma ack
+    for seq in range(1, int(frames)+1):
+        state=dict(state)
+        if seq in script: state["ids"]=script[seq]
+        elif seq>4 and rng.random()<0.5: state["ids"]=rng.choice(("CLEAN","ATTACK","SUSPICIOUS"))
+        if rng.random()<0.3: state["score"]+=rng.choice((-5,10))
+        state["time_left"]-=rng.randrange(2)
+        host.publish_frame([], state)
+        if gs._remote_state!=state: bad.append(seq)
+    return {"frames":int(frames), "mismatched":len(bad), "first":bad[0] if bad else None}
+
+def check_frame_backlog(frames=2000, seed=0):
+    # regrese backpressure: klient, který nečte, nesmí hromadit delty – ve frontě drží jeden plný rámec
+    # (coalesce) a po dočtení má poslední stav hosta i všechny logy
+    import random, socket, selectors
+    rng=random.Random(seed); a,b=socket.socketpair(); a.setblocking(False); b.setblocking(False)
+    a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    host=NetPeer(None, None, lambda s: None, threaded=False, max_buffer=1<<26, max_lag=1e9)
+    host.mode="host"; host._sel=selectors.DefaultSelector(); host._sel.register(a, selectors.EVENT_READ, (host,"client"))
+    host._clients=[(a, ("check", 0))]; host._out[a]=_OutQueue(); host._caps[a]={"frame"}; host._sent[a]=None
+    state={"score":0, "ids":"CLEAN", "pad":"x"*300}; logs=[]; buf=bytearray()
+    try:
+        for seq in range(1, int(frames)+1):
+            state=dict(state, score=state["score"]+rng.choice((0,5)), ids=rng.choice(("CLEAN","ATTACK")))
+            line=[f"[SYS] {seq}"] if seq%3==0 else []; logs+=line
+            host.publish_frame(line, state)
+        while True:
+            try: buf+=b.recv(1<<20); continue
+            except BlockingIOError: pass
+            q=host._out.get(a)
+            if q is None or not q.pending(): break
+            with host._lock: host._flush(a, q)
+        msgs,_=wire_decode(buf); seen={}; got=[]
+        for m in msgs:
+            if m.get("full"): seen={}
+            seen.update(m.get("d", {})); got+=m.get("logs", [])
+        return {"frames":int(frames), "sent":len(msgs),
+                "ok":seen==state and got==logs and not host.stats["evicted"] and len(msgs)*10<frames}
+    finally:
+        host._sel.close(); a.close(); b.close()
+
+def check_wire(seed=0, fuzz=2000):
+    # regrese bin1 dekodéru: zkrácená a náhodná těla se musí zahodit a zpráva za nimi přečíst
+    import random, struct
+    rng=random.Random(seed); tail=wire_encode({"t":"ping"}); errors=[]; cases=0
+    msgs=[{"t":"ack","seq":7}, {"t":"cmd","c":"ids --use ewma","code":"1234"},
+          {"t":"frame","seq":3,"logs":["[IDS] x","y"],"d":{"ids":"CLEAN"}}]
+    bodies=[wire_encode(m, True)[6:] for m in msgs]
+    # zkrácené tělo nesmí přečíst bajty další zprávy (cmd s délkou kódu za koncem, log za koncem …)
+    # (u cmd je každý řez za kódem platný příkaz s kratším textem)
+    samples=[(mt,b[:k],True) for mt,b in zip((2,3,4), bodies) for k in range(len(b)) if mt!=3 or k<=b[0]]
+    samples+=[(rng.randrange(1,6), bytes(rng.randrange(256) for _ in range(rng.randrange(12))), False)
+              for _ in range(int(fuzz))]
+    for mt,body,cut in samples:
+        frame=struct.pack("!BIB", 0xB1, len(body), mt)+body
+        for raw in (bytearray(frame), bytearray(frame+tail)):
+            cases+=1
+            try: out,_=wire_decode(raw)
+            except Exception as e: errors.append(f"{mt}:{body.hex()} {e!r}"); continue
+            want=[{"t":"ping"}] if len(raw)>len(frame) else []
+            if (out!=want) if cut else (out[len(out)-len(want):]!=want): errors.append(f"{mt}:{body.hex()} → {out}")
+    return {"cases":cases, "errors":len(errors), "first":errors[0] if errors else None}
+
+def bench_submit(mission_code="A3", n=20000, seed=0):
+    # příkazy/s přes GameState.submit() s HeadlessAdapter místo UI; cyklí selftest plán mise + status/log
+    mission=mission_by_code(mission_code)
+    if mission is None: raise ValueError(f"neznámá mise: {mission_code}")
+    gs=GameState(mission, HeadlessAdapter(keep=64), clock=VirtualClock(), seed=seed)
+    cmds=[c for c,_ in gs._plan_for_mission()]+["status","log","net --who"]
+    parts=[c.split() for c in cmds]; n=int(n)
+    t0=time.perf_counter()
+    for i in range(n):
+        p=parts[i%len(parts)]; (COMMANDS.get(p[0]) or _ANY_CMD).parse(p)
+    t_parse=time.perf_counter()-t0
+    t0=time.perf_counter()
+    for i in range(n):
+        if gs.finished: gs.finished=False; gs.step_idx=0     # plán dokola; mise se nesmí uzavřít
+        gs.submit(cmds[i%len(cmds)])
+    wall=time.perf_counter()-t0
+    return {"mission":mission.code, "cmds":n, "wall_s":wall, "cmds_per_s":n/wall if wall>0 else float("inf"),
+            "parse_per_s":n/t_parse if t_parse>0 else float("inf")}
+
+def bench_arp(hosts=65000, net="10.20.0.0/16", runs=200, seed=0):
+    # indexovaná ARP tabulka segmentu: seed /16, jeden spoof, pak ms/příkaz přes GameState.submit() (D3)
+    mission=mission_by_code("D3")
+    gs=GameState(mission, HeadlessAdapter(keep=64), clock=VirtualClock(), seed=seed)
+    t0=time.perf_counter(); n=gs.sim.arp_seed(net, hosts); t_seed=time.perf_counter()-t0
+    victim=gs.sim.arp.seeded[0]+n//2
+    vip=int_to_ip(victim); gs.sim.arp_spoof_enable(vip)
+    mid=int_to_ip(victim & ~255)
+    cmds={"page": f"arp --list --page {n//40} --size 20", "cidr": f"arp --list --net {mid}/24",
+          "bad": "arp --list --bad", "verify": "arp --verify"}
+    res={}
+    for key,cmd in cmds.items():
+        t0=time.perf_counter()
+        for _ in range(int(runs)):
+            if gs.finished: gs.finished=False
+            gs.step_idx=0; gs.submit(cmd)
+        res[key]=(time.perf_counter()-t0)/runs*1000.0
+    t0=time.perf_counter()
+    for _ in range(int(runs)):
+        gs.sim.arp_spoof_disable(); gs.sim.arp_spoof_enable(vip)
+    res["spoof"]=(time.perf_counter()-t0)/runs*1000.0
+    return {"hosts":n, "seed_ms":t_seed*1000.0, "ms":res, "collisions":len(gs.sim.arp_status())}
+
+def bench_mail(n=100000, seed=0):
+    # indexovaný inbox nad syntetickým mbox korpusem: ms/příkaz přes GameState.submit() (P1)
+    import tempfile
+    from .mailstore import write_mbox
+    from .sim import MailSim
+    with tempfile.TemporaryDirectory() as d:
+        path=os.path.join(d, "corpus.mbox"); write_mbox(path, n, seed=seed)
+        gs=GameState(mission_by_code("P1"), HeadlessAdapter(keep=64), clock=VirtualClock(), seed=seed)
+        t0=time.perf_counter(); gs.mail=MailSim([path]); t_open=time.perf_counter()-t0
+        # před dočtením korpusu a dostavěním indexu odpoví příkazy nad známou částí (nejvýš jeden krok práce);
+        # korpus a index se pak dostaví kroky jako na pozadí a stejné dotazy se zopakují nad celým
+        last=f"M-{200000+n-1}"
+        cmds=[("inbox","mail --inbox"), ("view_last_early",f"mail --view {last}"), ("view_nope_early","mail --view M-nope"),
+              ("page_last_early",f"mail --inbox --page {n//20}"), ("block_early","mail --block secure-update.test"),
+              ("search_early","mail --search heslo ověření"), None,
+              ("view_last",f"mail --view {last}"), ("page_last",f"mail --inbox --page {n//20}"),
+              ("block","mail --block secure-update.test"),
+              ("search","mail --search vpn audit záloha"), ("search_page","mail --search vpn audit záloha --page 40"),
+              ("search2","mail --search heslo ověření"), ("view","mail --view M-200007")]
+        res={}; box=gs.mail.box; steps=[]
+        for item in cmds:
+            if item is None:
+                t1=time.perf_counter()
+                while True:
+                    t0=time.perf_counter(); done=box.warm(); steps.append(time.perf_counter()-t0)
+                    if done: break
+                t_index=time.perf_counter()-t1; continue
+            key,cmd=item; gs.step_idx=0; gs.finished=False
+            t0=time.perf_counter(); gs.submit(cmd); res[key]=(time.perf_counter()-t0)*1000.0
+        steps.sort(); gs.stop()
+        return {"msgs":len(box), "open_ms":t_open*1000.0, "ms":res, "terms":len(box.terms or ()),
+                "mbytes":os.path.getsize(path)/1e6, "index_s":t_index, "steps":len(steps),
+                "step_ms_p99":steps[int(len(steps)*0.99)]*1000.0, "step_ms_max":steps[-1]*1000.0}
+
+def bench_audit(n=1000000, seed=0):
+    # audit log přes mmap: rychlost ingestace a ms dotazů --user / --from / --since přes GameState.submit() (I1)
+    import tempfile
+    from .audit import AuditLog, write_log
+    with tempfile.TemporaryDirectory() as d:
+        path=os.path.join(d, "auth.log"); write_log(path, n, seed=seed)
+        gs=GameState(mission_by_code("I1"), HeadlessAdapter(keep=64), clock=VirtualClock(), seed=seed)
+        # dotaz před načtením logu: jeden krok čtení a částečný výsledek, ne celá ingestace
+        gs.audit=AuditLog(); gs.audit.add_file(path)
+        t0=time.perf_counter(); gs.submit("audit --user bob"); t_early=time.perf_counter()-t0
+        gs.audit.close()
+        log=gs.audit=AuditLog(); log.add_file(path)
+        t0=time.perf_counter(); log.ingest(); t_ing=time.perf_counter()-t0
+        last=time.strftime("%Y-%m-%dT%H:%M", time.gmtime(log.ts[-1]-3600))
+        cmds=[("user","audit --user bob"), ("from","audit --from 10.0.0.23"), ("since",f"audit --since {last}"),
+              ("user_since","audit --user u001 --since "+last[:10]), ("all3",f"audit --user bob --from 10.0.0.23 --since {last}")]
+        res={"early":t_early*1000.0}
+        for key,cmd in cmds:
+            gs.step_idx=0; gs.finished=False
+            t0=time.perf_counter(); gs.submit(cmd); res[key]=(time.perf_counter()-t0)*1000.0
+        mb=os.path.getsize(path)/1e6; gs.stop()
+        return {"lines":len(log), "mbytes":mb, "ingest_s":t_ing, "lines_per_s":len(log)/t_ing, "mb_per_s":mb/t_ing,
+                "index_mb":log.nbytes()/1e6, "ms":res}
+
+def bench_fs(n=100000, jobs=None, pool="thread", seed=0):
+    # sandbox n souborů ve 100 uzlech (2 zašifrované): studený sken, rescan beze změn (v paměti i z uloženého
+    # indexu v novém skeneru) a rescan po změně 1 % souborů
+    import tempfile
+    from .fsscan import FsScanner, make_sandbox, suspicious
+    with tempfile.TemporaryDirectory() as d, tempfile.TemporaryDirectory() as index_dir:
+        t0=time.perf_counter()
+        make_sandbox(d, nodes=100, files=max(1,n//100), infected=("node-7","node-42"), seed=seed, size=(256, 1024))
+        t_make=time.perf_counter()-t0
+        fs=FsScanner(d, jobs=jobs, pool=pool, index_dir=index_dir); cold=fs.scan(); warm=fs.scan()
+        reload=FsScanner(d, jobs=jobs, pool=pool, index_dir=index_dir).scan()
+        names=sorted(fs.files)[::100]
+        for rel in names:
+            with open(os.path.join(d, rel), 'ab') as f: f.write(b"x")
+        touched=fs.scan()
+        return {"files":cold["files"], "make_s":t_make, "cold_s":cold["wall_s"], "cold_mb":cold["bytes"]/1e6,
+                "rescan_ms":warm["wall_s"]*1000.0, "reload_ms":reload["wall_s"]*1000.0,
+                "touched":touched["read"], "touched_ms":touched["wall_s"]*1000.0, "suspicious":suspicious(cold["nodes"])}
+
+def bench_verify(packages=200, files=5, size=131072, jobs=None, seed=0):
+    # repozitář packages×files artefaktů: studené ověření (proudové SHA-256 v poolu), opakované v relaci,
+    # nová relace s cache z disku a ověření po změně jednoho artefaktu
+    import tempfile
+    from .artifacts import ArtifactRepo, make_repo
+    with tempfile.TemporaryDirectory() as d, tempfile.TemporaryDirectory() as cache_dir:
+        names=[f"pkg{i:04d}" for i in range(packages)]
+        make_repo(d, packages=names, tampered=names[::50], files=files, size=size, seed=seed)
+        repo=ArtifactRepo(d, jobs=jobs, cache_dir=cache_dir); res,cold=repo.verify_many(); _,warm=repo.verify_many()
+        _,reload=ArtifactRepo(d, jobs=jobs, cache_dir=cache_dir).verify_many()
+        with open(os.path.join(d, names[1], f"{names[1]}-1.1.tar.gz"), 'r+b') as f: f.write(b"\0")
+        _,touched=ArtifactRepo(d, jobs=jobs, cache_dir=cache_dir).verify_many()
+        return {"packages":packages, "files":cold["files"], "mbytes":cold["hashed_bytes"]/1e6, "cold_s":cold["wall_s"],
+                "mb_per_s":cold["hashed_bytes"]/1e6/cold["wall_s"], "warm_ms":warm["wall_s"]*1000.0,
+                "reload_ms":reload["wall_s"]*1000.0, "reload_hashed":reload["hashed"],
+                "touched_hashed":touched["hashed"], "touched_ms":touched["wall_s"]*1000.0,
+                "invalid":sum(1 for r in res if r["state"]!="ok")}
+
+_STARTUP_PROBE = '''
+import sys, time, json
+t0=time.perf_counter()
+from cyberdrill.clock import VirtualClock
+from cyberdrill.missions import mission_by_code
+from cyberdrill.game import GameState
+from cyberdrill.headless import HeadlessAdapter
+t1=time.perf_counter()
+clock=VirtualClock(); gs=GameState(mission_by_code(sys.argv[1]), HeadlessAdapter(), clock=clock, seed=0)
+clock.step()
+t2=time.perf_counter()
+print(json.dumps({"import_ms":(t1-t0)*1000, "first_tick_ms":(t2-t1)*1000, "ticks":gs.tick_count,
+                  "heavy":[m for m in ("ui","clipboard","numpy","zstandard","tomllib") if m in sys.modules]}))
+'''
+
+def bench_startup(mission_code="A3", runs=5):
+    # každý běh v čistém interpretu: import jádra + načtení mise + první tick; medián přes runs
+    import subprocess
+    root=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    res=[]
+    for _ in range(int(runs)):
+        t0=time.perf_counter()
+        out=subprocess.run([sys.executable, "-c", _STARTUP_PROBE, mission_code], cwd=root,
+                           capture_output=True, text=True, check=True).stdout
+        r=json.loads(out.strip().splitlines()[-1]); r["process_ms"]=(time.perf_counter()-t0)*1000
+        res.append(r)
+    med=lambda k: sorted(r[k] for r in res)[len(res)//2]
+    return {"mission":mission_code, "runs":len(res), "import_ms":med("import_ms"), "first_tick_ms":med("first_tick_ms"),
+            "process_ms":med("process_ms"), "heavy":sorted({m for r in res for m in r["heavy"]})}
+
+def headless_main(argv):
+    import argparse
+    ap=argparse.ArgumentParser(prog="cyberdrill", description="CyberDrill headless runner")
+    ap.add_argument("command", nargs="?", choices=["selftest"], help="selftest [--all]: selftest plán mise (--all = celá matice)")
+    ap.add_argument("--all", action="store_true", help="se 'selftest': všechny mise × obtížnosti × --seeds")
+    ap.add_argument("--seeds", type=int, default=3)
+    ap.add_argument("--jobs", type=int, default=None, help="procesů pro matici / vláken pro --bench fs|verify (výchozí = počet jader)")
+    ap.add_argument("--pool", default="thread", choices=["thread","process"], help="pool pro --bench fs")
+    ap.add_argument("--out", metavar="FILE", help="uloží výsledek matice (JSON)")
+    ap.add_argument("--baseline", metavar="FILE", help="porovná matici s uloženou; změna → exit 1")
+    ap.add_argument("--bench", choices=["net","cmd","startup","rooms","sched","flows","arp","mail","audit","fs","verify"], help="spustí benchmark místo mise")
+    ap.add_argument("--clients", type=int, default=1, help="klientů pro --bench net|rooms")
+    ap.add_argument("--rounds", type=int, default=500, help="příkazů na klienta pro --bench net")
+    ap.add_argument("--n", type=int, default=None, metavar="N",
+                    help="velikost dat pro --bench: boty (flows, 50 000), hosté (arp, 65 000), zprávy (mail, 100 000), "
+                         "řádky (audit, 1 000 000), soubory (fs, 100 000), balíčky (verify, 200), příkazy (cmd, 20 000)")
+    ap.add_argument("--rate", type=int, default=200000, help="požadavků/s pro --bench flows")
+    ap.add_argument("--ticks", type=int, default=10, help="ticků pro --bench flows")
+    ap.add_argument("--repeat", type=int, default=200, help="opakování každého dotazu pro --bench arp")
+    ap.add_argument("--mission", default="A3")
+    ap.add_argument("--diff", default="Normal", choices=sorted(DIFFICULTIES))
+    ap.add_argument("--runs", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--speed", type=float, default=0.0, help="0 = co nejrychleji, 1 = reálný čas, 10 = 10×")
+    ap.add_argument("--echo", action="store_true")
+    ap.add_argument("--record", metavar="FILE", help="uloží záznam běhu pro --replay")
+    ap.add_argument("--replay", metavar="FILE", help="přehraje záznam (s --runs měří relace/s)")
+    ap.add_argument("--serve", type=int, metavar="PORT", help="server místností (víc relací na jednom portu)")
+    ap.add_argument("--room", action="append", default=[], metavar="CODE=MISE[/OBTÍŽNOST]", help="předem založená místnost")
+    ap.add_argument("--closed", action="store_true", help="nezakládat místnosti podle hello klienta")
+    ap.add_argument("--room-idle", type=float, default=60.0, help="místnost založená klientem zanikne po N s bez klientů")
+    ap.add_argument("--max-rooms", type=int, default=256, help="nejvýš N místností založených klienty")
+    ap.add_argument("--workers", type=int, default=0, help="0 = místnosti v tomto procesu, N = N procesů")
+    ap.add_argument("--rooms", type=int, default=30)
+    ap.add_argument("--duration", type=float, default=None)
+    ap.add_argument("--report", type=float, default=10.0, help="výpis lagu místností každých N s")
+    a=ap.parse_args(argv)
+    if a.serve is not None or a.bench=="rooms":
+        from .server import RoomServer, bench_rooms, format_room_stats
+    if a.serve is not None:
+        srv=RoomServer(port=a.serve, workers=a.workers, open_rooms=not a.closed, idle_timeout=a.room_idle,
+                       max_rooms=a.max_rooms)
+        for spec in a.room:
+            code,_,rest=spec.partition("="); mission,_,diff=rest.partition("/")
+            srv.add_room(code, mission or a.mission, diff or a.diff)
+        print(f"[SERVE] port {srv.start()} workers={a.workers} rooms={len(srv.rooms)}")
+        try: srv.serve(duration=a.duration, report_every=a.report, report=lambda rows: print(format_room_stats(rows)))
+        except KeyboardInterrupt: pass
+        finally:
+            print(format_room_stats(srv.stats())); srv.close()
+        return 0
+    if a.bench=="rooms":
+        r=bench_rooms(rooms=a.rooms, clients=a.clients, workers=a.workers, duration=a.duration or 5.0,
+                      mission=a.mission, diff=a.diff)
+        print(f"[BENCH] rooms={r['rooms']} clients={r['clients']} workers={r['workers']} frames={r['frames']} "
+              f"lag avg={r['lag_ms_avg']:.2f}ms max={r['lag_ms_max']:.2f}ms routed={r['router']['routed']}")
+        return 0
+    if a.replay:
+        rec=load_recording(a.replay)
+        if a.runs==1:
+            r=replay_session(rec, speed=a.speed or None, echo=a.echo)
+            print(f"[REPLAY] {r['mission']} score={r['score']} (záznam {r['expected_score']}) "
+                  f"ids={'OK' if r['ids_match'] else 'DIFF'} ticks={r['ticks']} wall={r['wall_s']:.3f}s")
+            return 0 if r["match"] else 1
+        b=replay_batch([rec], runs=a.runs, speed=a.speed or None)
+        print(f"[REPLAY] sessions={b['sessions']} mismatches={b['mismatches']} wall={b['wall_s']:.3f}s "
+              f"sessions/s={b['sessions_per_s']:.0f}")
+        return 0 if not b["mismatches"] else 1
+    if a.bench=="net":
+        r=bench_net_rtt(clients=a.clients, rounds=a.rounds)
+        print(f"[BENCH] net rtt clients={r['clients']} rounds={r['rounds']} p50={r['p50_ms']:.3f}ms "
+              f"p99={r['p99_ms']:.3f}ms max={r['max_ms']:.3f}ms cmds/s={r['cmds_per_s']:.0f}")
+        return 0
+    if a.bench=="startup":
+        r=bench_startup(a.mission, runs=max(1,a.runs) if a.runs>1 else 5)
+        print(f"[BENCH] startup {r['mission']} import={r['import_ms']:.1f}ms first_tick={r['first_tick_ms']:.1f}ms "
+              f"process={r['process_ms']:.1f}ms heavy_modules={','.join(r['heavy']) or '-'}")
+        return 0 if not r["heavy"] else 1
+    if a.bench=="sched":
+        codes=default_catalog().codes()
+        r=run_lockstep([(codes[i%len(codes)], a.diff) for i in range(a.rooms)], speed=a.speed or None, seed=a.seed)
+        print(f"[BENCH] sched sessions={r['sessions']} ticks={r['ticks']} skew={r['skew']} pass={r['passed']} "
+              f"wall={r['wall_s']:.3f}s")
+        for name,t in r["timing"].items():
+            print(f"  {name:<9} n={t['n']:<6} late avg={t['late_ms_avg']:.2f}ms p99={t['late_ms_p99']:.2f}ms "
+                  f"max={t['late_ms_max']:.2f}ms cost avg={t['cost_ms_avg']:.3f}ms max={t['cost_ms_max']:.3f}ms")
+        return 0 if r["skew"]==0 else 1
+    if a.bench=="flows":
+        from .traffic import sketch_flows
+        r=sketch_flows(ticks=a.ticks, rate=a.rate, bots=a.n or 50000, seed=a.seed)
+        print(f"[BENCH] flows={r['flows']} ticks={r['ticks']} wall={r['wall_s']:.3f}s flows/s={r['flows_per_s']:.0f} "
+              f"(skeče {r['sketch_s']*1000:.1f}ms)")
+        print(f"  uniq přesně={r['uniq_exact']} HLL={r['uniq_hll']} (chyba {r['hll_err']*100:.1f} %) "
+              f"top-k recall={r['topk_recall']:.2f} SYN podíl={r['syn_share']:.2f} paměť skečů={r['sketch_bytes']} B")
+        return 0
+    if a.bench=="arp":
+        r=bench_arp(hosts=a.n or 65000, runs=a.repeat, seed=a.seed)
+        print(f"[BENCH] arp hosts={r['hosts']} seed={r['seed_ms']:.1f}ms kolize={r['collisions']} "
+              + " ".join(f"{k}={v:.3f}ms" for k,v in r["ms"].items()))
+        return 0
+    if a.bench=="mail":
+        r=bench_mail(n=a.n or 100000, seed=a.seed)
+        print(f"[BENCH] mail msgs={r['msgs']} korpus={r['mbytes']:.1f}MB open={r['open_ms']:.1f}ms slov={r['terms']} "
+              f"index={r['index_s']:.2f}s ({r['steps']} kroků, p99 {r['step_ms_p99']:.1f}ms, max {r['step_ms_max']:.1f}ms) "
+              + " ".join(f"{k}={v:.1f}ms" for k,v in r["ms"].items()))
+        return 0
+    if a.bench=="audit":
+        r=bench_audit(n=a.n or 1000000, seed=a.seed)
+        print(f"[BENCH] audit lines={r['lines']} log={r['mbytes']:.1f}MB ingest={r['ingest_s']:.2f}s "
+              f"({r['lines_per_s']:.0f} řádků/s, {r['mb_per_s']:.1f} MB/s) indexy={r['index_mb']:.1f}MB "
+              + " ".join(f"{k}={v:.1f}ms" for k,v in r["ms"].items()))
+        return 0
+    if a.bench=="fs":
+        r=bench_fs(n=a.n or 100000, jobs=a.jobs, pool=a.pool, seed=a.seed)
+        print(f"[BENCH] fs files={r['files']} (vytvoření {r['make_s']:.1f}s) cold={r['cold_s']:.2f}s ({r['cold_mb']:.1f}MB) "
+              f"rescan={r['rescan_ms']:.0f}ms reload+rescan={r['reload_ms']:.0f}ms změněno={r['touched']} "
+              f"→ {r['touched_ms']:.0f}ms podezřelé={','.join(r['suspicious']) or '-'}")
+        return 0 if r["rescan_ms"]<1000 else 1
+    if a.bench=="verify":
+        r=bench_verify(packages=a.n or 200, jobs=a.jobs, seed=a.seed)
+        print(f"[BENCH] verify packages={r['packages']} files={r['files']} cold={r['cold_s']:.2f}s "
+              f"({r['mbytes']:.0f}MB, {r['mb_per_s']:.0f} MB/s) warm={r['warm_ms']:.0f}ms "
+              f"nová relace={r['reload_ms']:.0f}ms (zahashováno {r['reload_hashed']}) "
+              f"po změně={r['touched_ms']:.0f}ms (zahashováno {r['touched_hashed']}) invalid={r['invalid']}")
+        return 0 if r["reload_hashed"]==0 and r["touched_hashed"]==1 else 1
+    if a.bench=="cmd":
+        r=bench_submit(a.mission, n=a.n or 20000, seed=a.seed)
+        print(f"[BENCH] submit {r['mission']} cmds={r['cmds']} wall={r['wall_s']:.3f}s cmds/s={r['cmds_per_s']:.0f} "
+              f"parse/s={r['parse_per_s']:.0f}")
+        return 0
+    if a.command=="selftest" and a.all:
+        m=selftest_matrix(seeds=a.seeds, seed=a.seed, jobs=a.jobs)
+        print(format_selftest_matrix(m))
+        fs=check_frame_sync(seed=a.seed)
+        print(f"[NET] delta sync frames={fs['frames']} "
+              + ("OK" if not fs["mismatched"] else f"DIFF {fs['mismatched']}× (první seq {fs['first']})"))
+        if fs["mismatched"]: return 1
+        fb=check_frame_backlog(seed=a.seed)
+        print(f"[NET] pomalý klient rámců={fb['frames']} odesláno={fb['sent']} " + ("OK" if fb["ok"] else "DIFF"))
+        if not fb["ok"]: return 1
+        w=check_wire(seed=a.seed)
+        print(f"[NET] wire bin1 vzorků={w['cases']} " + ("OK" if not w["errors"] else f"CHYBA {w['errors']}× ({w['first']})"))
+        if w["errors"]: return 1
+        if a.out:
+            with open(a.out, 'w', encoding='utf-8') as f: json.dump(m, f, ensure_ascii=False)
+        if a.baseline:
+            with open(a.baseline, encoding='utf-8') as f: changed=selftest_diff(m, json.load(f))
+            for b,c in changed:
+                was=f"{'PASS' if b['pass'] else 'FAIL'} {b['score']}" if b else "—"
+                print(f"[CHANGED] {c['mission']}/{c['diff']} seed={c['seed']}: {was} → {'PASS' if c['pass'] else 'FAIL'} {c['score']}")
+            return 1 if changed else 0
+        return 0 if m["passed"]==len(m["cells"]) else 1
+    if a.runs==1:
+        runner=HeadlessRunner(a.mission, a.diff, speed=a.speed or None, seed=a.seed, echo=a.echo); r=runner.run()
+        if a.record: save_recording(runner.state.recording(), a.record)
+        print(f"[HEADLESS] {r['mission']}/{r['difficulty']} {'PASS' if r['completed'] else 'FAIL'} "
+              f"score={r['score']} ticks={r['ticks']} wall={r['wall_s']:.3f}s ticks/s={r['ticks_per_s']:.0f}")
+        return 0 if r["completed"] else 1
+    b=run_batch(a.mission, a.diff, runs=a.runs, seed=a.seed, speed=a.speed or None)
+    print(f"[HEADLESS] {a.mission}/{a.diff} runs={b['runs']} pass={b['passed']} ticks={b['ticks']} "
+          f"wall={b['wall_s']:.3f}s ticks/s={b['ticks_per_s']:.0f} sessions/min={b['sessions_per_min']:.0f}")
+    return 0 if b["passed"]==b["runs"] else 1
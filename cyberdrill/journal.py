@@ -0,0 +1,162 @@
+# cyberdrill/journal.py – deník událostí (JSONL) a log store konzole
+import os, io, re, json, time, gzip, shutil, collections
+
+from .util import err_str
+
+# ========== deník událostí (JSONL) ==========
+_zstd_mod = False   # False = ještě nezkoušeno; zstandard se načítá až při kompresi/čtení .zst
+
+def _zstd():
+    global _zstd_mod
+    if _zstd_mod is False:
+        try: import zstandard as _zstd_mod
+        except ImportError: _zstd_mod = None   # deník pak komprimuje jen gzipem
+    return _zstd_mod
+
+_JOURNAL_RE = re.compile(r"journal-(\d+)\.jsonl(\.gz|\.zst)?$")
+
+class EventJournal:
+    # proudový JSONL deník: bufferovaný zápis, rotace podle velikosti/stáří,
+    # uzavřené soubory se komprimují (gzip/zstd); aktivní soubor zůstává čitelný i po pádu
+    def __init__(self, directory, max_bytes=8*1024*1024, max_age=3600.0, compress="gzip",
+                 flush_every=64, flush_interval=1.0):
+        if compress not in (None, "gzip", "zstd"): raise ValueError(f"compress: {compress}")
+        if compress == "zstd" and _zstd() is None: compress = "gzip"
+        os.makedirs(directory, exist_ok=True)
+        self.dir = directory; self.max_bytes = int(max_bytes); self.max_age = float(max_age or 0)
+        self.compress = compress; self.flush_every = int(flush_every); self.flush_interval = float(flush_interval)
+        self.context = {}           # pole přidaná ke každému záznamu (mission, diff)
+        self._f = None; self._path = None; self._size = 0; self._opened = 0.0
+        self._buf = []; self._last_flush = time.monotonic()
+        self.records = 0
+
+    def write(self, type_, **fields):
+        rec = {"ts": round(time.time(), 3), "type": type_}
+        rec.update(self.context); rec.update(fields)
+        self._buf.append(json.dumps(rec, ensure_ascii=False, separators=(",", ":")))
+        self.records += 1
+        if len(self._buf) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buf: return
+        if self._f is None: self._open()
+        data = ("\n".join(self._buf) + "\n").encode('utf-8'); self._buf = []
+        self._f.write(data); self._f.flush(); self._size += len(data)
+        if self._size >= self.max_bytes or (self.max_age and time.time() - self._opened >= self.max_age):
+            self.rotate()
+
+    def rotate(self):
+        if self._f is None: return
+        self._f.close(); self._f = None
+        if self.compress: _compress_file(self._path, self.compress)
+
+    def close(self):
+        self.flush(); self.rotate()
+
+    def _open(self):
+        self._opened = time.time(); ms = int(self._opened * 1000)
+        while any(os.path.exists(os.path.join(self.dir, f"journal-{ms:015d}.jsonl{ext}")) for ext in ("", ".gz", ".zst")):
+            ms += 1
+        self._path = os.path.join(self.dir, f"journal-{ms:015d}.jsonl")
+        self._f = open(self._path, 'ab'); self._size = 0
+
+def _compress_file(path, method):
+    dst = path + (".zst" if method == "zstd" else ".gz"); tmp = dst + ".tmp"
+    try:
+        with open(path, 'rb') as src, open(tmp, 'wb') as raw:
+            if method == "zstd":
+                _zstd().ZstdCompressor().copy_stream(src, raw)
+            else:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as out: shutil.copyfileobj(src, out)
+        os.replace(tmp, dst); os.remove(path)
+    except Exception as e:
+        print("[ERR] journal compress:", err_str(e))
+
+def _open_journal(path):
+    if path.endswith(".gz"): return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith(".zst"):
+        if _zstd() is None: raise RuntimeError("čtení .zst vyžaduje zstandard")
+        return io.TextIOWrapper(_zstd().ZstdDecompressor().stream_reader(open(path, 'rb')), encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+def read_journal(directory, mission=None, types=None, since=None, until=None):
+    # proudové čtení s filtrem; soubory mimo časový rozsah se vůbec neotevřou
+    if isinstance(types, str): types = {types}
+    files = {}
+    for name in os.listdir(directory):
+        m = _JOURNAL_RE.match(name)
+        if not m: continue
+        start = int(m.group(1))
+        if start not in files or m.group(2): files[start] = os.path.join(directory, name)   # komprimovaný má přednost
+    starts = sorted(files)
+    needle = f'"mission":{json.dumps(mission, ensure_ascii=False)}' if mission else None
+    for i, st in enumerate(starts):
+        if until is not None and st / 1000.0 > until: break
+        if since is not None and i + 1 < len(starts) and starts[i + 1] / 1000.0 < since: continue
+        with _open_journal(files[st]) as f:
+            for line in f:
+                if needle and needle not in line: continue
+                try: rec = json.loads(line)
+                except ValueError: continue      # useknutý poslední řádek po pádu
+                ts = rec.get("ts", 0)
+                if since is not None and ts < since: continue
+                if until is not None and ts > until: return
+                if types and rec.get("type") not in types: continue
+                if mission and rec.get("mission") != mission: continue
+                yield rec
+
+# ========== log store (konzole) ==========
+class LogStore:
+    # posledních `cap` řádků v paměti po segmentech; starší segmenty se připisují do spill souboru,
+    # takže export vidí celou historii a paměť zůstává omezená
+    def __init__(self, cap=5000, seg=256, spill_path=None):
+        self.cap = max(1, int(cap)); self.seg = max(1, int(seg)); self.spill_path = spill_path
+        self._segs = collections.deque([[]]); self._n = 0
+        self.total = 0; self.spilled = 0; self.dropped = 0
+
+    def __len__(self): return self._n
+
+    def append(self, line):
+        cur = self._segs[-1]
+        if len(cur) >= self.seg: cur = []; self._segs.append(cur)
+        cur.append(line); self._n += 1; self.total += 1
+        while self._n - len(self._segs[0]) >= self.cap and len(self._segs) > 1:
+            self._evict(self._segs.popleft())
+
+    def _evict(self, seg):
+        self._n -= len(seg)
+        if not self.spill_path: self.dropped += len(seg); return
+        try:
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                f.write("\n".join(seg) + "\n")
+            self.spilled += len(seg)
+        except Exception as e:
+            self.dropped += len(seg); print("[ERR] log spill:", err_str(e))
+
+    def tail(self, n):
+        out = []; need = max(0, int(n))
+        for seg in reversed(self._segs):
+            if need <= 0: break
+            part = seg[-need:] if need < len(seg) else seg
+            out.append(part); need -= len(part)
+        return [x for part in reversed(out) for x in part]
+
+    def iter_lines(self):
+        if self.spilled and self.spill_path and os.path.exists(self.spill_path):
+            with open(self.spill_path, encoding='utf-8') as f:
+                for line in f: yield line.rstrip("\n")
+        for seg in self._segs:
+            for line in seg: yield line
+
+    def export(self, f):
+        for line in self.iter_lines(): f.write(line + "\n")
+
+    def text(self): return "".join(line + "\n" for line in self.iter_lines())
+
+    def clear(self):
+        self._segs = collections.deque([[]]); self._n = 0; self.total = 0; self.spilled = 0; self.dropped = 0
+        if self.spill_path:
+            try: os.remove(self.spill_path)
+            except OSError: pass
@@ -0,0 +1,252 @@
+# cyberdrill/mailstore.py – úložiště pošty pro MailSim: vestavěné zprávy + korpusy mbox / adresář *.eml
+# Korpus se prochází líně a po kusech (jen hlavičky, těla se čtou z mmap až při zobrazení / indexaci);
+# indexy: id → zpráva, doména odesílatele → zprávy, invertovaný index slov pro fulltext.
+import os, re, mmap, array, bisect, random, unicodedata
+
+_TOKEN = re.compile(r"\w{2,}")
+_DOMAIN = re.compile(r"@([\w-]+(?:\.[\w-]+)+)")
+_WANT = {b"from": "sender", b"subject": "subject", b"x-drill-id": "id", b"x-drill-phish": "phish"}
+_SCAN_STEP = 1024               # kroky práce na pozadí (~5 ms): hlavičky mboxu jsou levné,
+_INDEX_STEP = 256               # indexace (tělo + slova) zhruba 4× dražší
+
+def words(text):
+    # slova pro index i dotaz; NFC, jinak by rozložená diakritika (NFD) trhala slova
+    return set(_TOKEN.findall(unicodedata.normalize("NFC", text).lower()))
+
+def sender_domain(sender):
+    m = _DOMAIN.search(sender)
+    return m.group(1).lower() if m else ""
+
+def _decode_header(s):
+    # RFC 2047 (=?utf-8?...?=) jen když tam opravdu je; email se importuje až tehdy
+    if "=?" not in s: return s
+    try:
+        from email.header import decode_header, make_header
+        return str(make_header(decode_header(s)))
+    except (LookupError, ValueError, UnicodeError):
+        return s
+
+def _split(raw):
+    # → (hlavičky, tělo); toleruje CRLF
+    a = raw.find(b"\n\n"); b = raw.find(b"\r\n\r\n")
+    if b != -1 and (a == -1 or b < a): return raw[:b], raw[b+4:]
+    if a == -1: return raw, b""
+    return raw[:a], raw[a+2:]
+
+def _parse_headers(raw):
+    out = {}; key = None
+    for line in raw.split(b"\n"):
+        line = line.rstrip(b"\r")
+        if line[:1] in (b" ", b"\t"):
+            if key: out[key] += b" " + line.strip()
+            continue
+        name, sep, val = line.partition(b":")
+        key = _WANT.get(name.strip().lower()) if sep else None
+        if key in out: key = None          # opakovaná hlavička – platí první
+        elif key: out[key] = val.strip()
+    return {k: v.decode("utf-8", "replace") for k,v in out.items()}
+
+def body_text(raw):
+    # prostý text zprávy; jednoduché zprávy bez parseru, MIME (multipart/base64/QP) přes email
+    hdr, body = _split(raw); low = hdr.lower()
+    if b"multipart/" not in low and b"base64" not in low and b"quoted-printable" not in low:
+        return body.decode("utf-8", "replace")
+    import email, email.policy
+    try:
+        part = email.message_from_bytes(raw, policy=email.policy.default).get_body(preferencelist=("plain", "html"))
+        return part.get_content() if part is not None else ""
+    except (LookupError, KeyError, ValueError, UnicodeError):
+        return body.decode("utf-8", "replace")
+
+def _contains(p, n):
+    i = bisect.bisect_left(p, n)
+    return i < len(p) and p[i] == n
+
+class _Msg:
+    # src: None = vestavěná (tělo v body), int = index mbox zdroje, str = cesta k .eml
+    __slots__ = ("id", "sender", "subject", "phish", "src", "start", "end", "body")
+    def __init__(self, mid, sender, subject, phish=False, src=None, start=0, end=0, body=None):
+        self.id = mid; self.sender = sender; self.subject = subject; self.phish = phish
+        self.src = src; self.start = start; self.end = end; self.body = body
+
+class _MboxSource:
+    # jeden průchod mmapem: zpráva = od řádku "From " po další "\nFrom "
+    def __init__(self, path, idx):
+        self.path = path; self.idx = idx; self.mm = None; self.pos = 0; self.n = 0
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size: self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def next(self):
+        mm = self.mm
+        if mm is None or self.pos >= len(mm): return None
+        eol = mm.find(b"\n", self.pos)
+        if eol == -1: self.pos = len(mm); return None
+        start = eol + 1; nxt = mm.find(b"\nFrom ", eol)
+        end = len(mm) if nxt == -1 else nxt + 1
+        self.pos = end; self.n += 1
+        a = mm.find(b"\n\n", start, end); b = mm.find(b"\r\n\r\n", start, end)
+        hend = min(x for x in (a, b, end) if x != -1)
+        h = _parse_headers(mm[start:hend])
+        return _msg(h, f"C{self.idx}-{self.n}", self.idx, start, end)
+
+    def raw(self, m): return self.mm[m.start:m.end]
+
+    def close(self):
+        if self.mm is not None: self.mm.close(); self.mm = None
+
+class _EmlSource:
+    # adresář *.eml (seřazeně podle jména); hlavičky se čtou po blocích až do prázdného řádku
+    def __init__(self, path):
+        self.path = path; self.n = 0
+        self.names = sorted(e.name for e in os.scandir(path) if e.name.endswith(".eml") and e.is_file())
+
+    def next(self):
+        if self.n >= len(self.names): return None
+        p = os.path.join(self.path, self.names[self.n]); self.n += 1
+        with open(p, 'rb') as f:
+            raw = b""
+            while True:
+                blk = f.read(4096); raw += blk
+                if not blk or b"\n\n" in raw or b"\r\n\r\n" in raw: break
+        return _msg(_parse_headers(_split(raw)[0]), os.path.splitext(self.names[self.n-1])[0], p)
+
+def _msg(h, default_id, src, start=0, end=0):
+    return _Msg(h.get("id") or default_id, h.get("sender", ""), h.get("subject", ""),
+                h.get("phish", "").strip().lower() in ("1", "yes", "true"), src, start, end)
+
+class MailStore:
+    def __init__(self):
+        self.msgs = []              # pořadí = pořadí v inboxu
+        self.by_id = {}             # id -> pořadí (první výskyt)
+        self.by_domain = {}         # doména -> array pořadí
+        self.sources = []           # mbox zdroje (src=int ukazuje sem)
+        self._pending = []          # zdroje, které ještě nejsou celé projité
+        self.terms = None           # invertovaný index: slovo -> array pořadí (vzestupně); staví se na pozadí
+        self._indexed = 0
+        self._last = None           # (slova dotazu, výsledek) posledního hledání – stránkování nepočítá znovu
+
+    def __len__(self): return len(self.msgs)
+
+    @property
+    def complete(self): return not self._pending
+
+    def add(self, mid, sender, subject, body="", phish=False):
+        self._add(_Msg(mid, sender, subject, bool(phish), body=body)); self._last = None
+
+    def add_source(self, path):
+        # mbox soubor nebo adresář .eml; vrací zdroj (projde se líně)
+        if os.path.isdir(path): src = _EmlSource(path)
+        elif os.path.isfile(path):
+            src = _MboxSource(path, len(self.sources)); self.sources.append(src)
+        else: raise ValueError(f"korpus nenalezen: {path}")
+        self._pending.append(src); self._last = None
+        return src
+
+    def _add(self, m):
+        n = len(self.msgs); self.msgs.append(m)
+        self.by_id.setdefault(m.id, n)
+        dom = sender_domain(m.sender); ids = self.by_domain.get(dom)
+        if ids is None: ids = self.by_domain[dom] = array.array('I')
+        ids.append(n)
+
+    def scan(self, upto=None):
+        # dočte korpus do `upto` zpráv (None = celý); vrací počet známých zpráv
+        msgs = self.msgs
+        while self._pending and (upto is None or len(msgs) < upto):
+            m = self._pending[0].next()
+            if m is None: self._pending.pop(0)
+            else: self._add(m)
+        return len(msgs)
+
+    # Dotazy nad korpusem, který se ještě dočítá, udělají nejvýš `budget` zpráv průchodu a odpoví nad
+    # známou částí (complete říká, zda je odpověď úplná); zbytek dočte warm() na pozadí.
+
+    def get(self, mid, budget=_SCAN_STEP):
+        # → zpráva | None (nenalezena, nebo ještě nedočtena – viz complete)
+        n = self.by_id.get(mid)
+        if n is None and self._pending:
+            self.scan(len(self.msgs) + budget); n = self.by_id.get(mid)
+        return None if n is None else self.msgs[n]
+
+    def page(self, page=1, size=20, budget=_SCAN_STEP):
+        # → (zprávy stránky, celkem | None dokud korpus není celý projitý)
+        lo = (page - 1) * size; self.scan(min(lo + size, len(self.msgs) + budget))
+        return self.msgs[lo:lo+size], (len(self.msgs) if self.complete else None)
+
+    def from_domain(self, domain, budget=_SCAN_STEP):
+        # → pořadí zpráv domény vzestupně (dokud se korpus dočítá, jen ze známé části)
+        if self._pending: self.scan(len(self.msgs) + budget)
+        return self.by_domain.get(domain.lower(), ())
+
+    def raw(self, m):
+        if m.src is None: return None
+        if isinstance(m.src, int): return self.sources[m.src].raw(m)
+        with open(m.src, 'rb') as f: return f.read()
+
+    def text(self, m):
+        return m.body if m.src is None else body_text(self.raw(m))
+
+    def header(self, m):
+        return _decode_header(m.sender), _decode_header(m.subject)
+
+    def index(self, budget=None):
+        # doindexuje zbytek (budget = max. zpráv na jedno volání); vrací True, když je index úplný
+        if self.terms is None: self.terms = {}
+        terms = self.terms; msgs = self.msgs
+        stop = len(msgs) if budget is None else min(len(msgs), self._indexed + budget)
+        for n in range(self._indexed, stop):
+            m = msgs[n]; s, subj = self.header(m)
+            for tok in words(f"{s} {subj} {self.text(m)}"):
+                ids = terms.get(tok)
+                if ids is None: ids = terms[tok] = array.array('I')
+                ids.append(n)
+        self._indexed = stop
+        return self.complete and stop == len(msgs)
+
+    def warm(self, scan=_SCAN_STEP, index=_INDEX_STEP):
+        # jeden krok práce na pozadí: dočíst kus korpusu, pak indexovat; True = hotovo
+        if self._pending: self.scan(len(self.msgs) + scan); return False
+        return self.index(index)
+
+    def close(self):
+        # uvolní mmapy mbox zdrojů (konec mise); nedočtené zdroje se zahodí
+        for src in self.sources: src.close()
+        self._pending = []
+
+    def indexed(self):
+        # (zaindexováno, známo zpráv, korpus dočtený)
+        return self._indexed, len(self.msgs), self.complete
+
+    def search(self, query, budget=_INDEX_STEP):
+        # AND všech slov dotazu → pořadí zpráv vzestupně; None = index ještě není hotový (dostaví se na pozadí,
+        # tady nejvýš jeden krok práce, takže malý inbox odpoví hned a velký korpus UI nezdrží)
+        q = frozenset(words(query))
+        if not q: raise ValueError("prázdný dotaz")
+        if self._last is not None and self._last[0] == q: return self._last[1]
+        if self._pending: self.scan(len(self.msgs) + budget)
+        if not self.index(budget): return None
+        posts = sorted((self.terms.get(w, ()) for w in q), key=len)
+        hits = posts[0]
+        for p in posts[1:]:
+            if not hits: break
+            # krátký seznam proti dlouhému: bisect (a·log b); jinak průnik množin (a + b)
+            if len(hits) * 16 < len(p): hits = [n for n in hits if _contains(p, n)]
+            else: hits = set(hits); hits.intersection_update(p)
+        hits = sorted(hits) if isinstance(hits, set) else list(hits)
+        self._last = (q, hits)
+        return hits
+
+def write_mbox(path, n=100000, seed=0, domains=200, phish_share=0.02):
+    # syntetický korpus pro benchmark / velká cvičení; phishing nese X-Drill-Phish: 1
+    rng = random.Random(seed)
+    words = ("faktura", "heslo", "schůzka", "vpn", "údržba", "směny", "report", "účet", "ověření", "dovolená",
+             "projekt", "rozpočet", "smlouva", "server", "záloha", "školení", "přístup", "tiskárna", "oběd", "audit")
+    doms = [f"corp{i}.test" for i in range(domains)]
+    with open(path, 'w', encoding='utf-8', newline="\n") as f:
+        for i in range(int(n)):
+            phish = rng.random() < phish_share
+            dom = "secure-update.test" if phish else doms[int(rng.paretovariate(1.2)) % domains]
+            subj = " ".join(rng.choice(words) for _ in range(3)).capitalize()
+            body = " ".join(rng.choice(words) for _ in range(40))
+            f.write(f"From {dom} Mon Jan  1 00:00:00 2024\nFrom: user{rng.randrange(500)}@{dom}\nSubject: {subj}\n"
+                    f"X-Drill-Id: M-{200000+i}\n" + ("X-Drill-Phish: 1\n" if phish else "") + f"\n{body}\n\n")
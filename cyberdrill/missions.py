@@ -0,0 +1,192 @@
+# cyberdrill/missions.py – obtížnosti, model mise, datové packy a jazyk validátorů
+import os, json, ast
+
+from .util import as_int, err_str
+
+# ========== obtížnosti ==========
+class Difficulty:
+    def __init__(self, name, time_mult=1.0, score_mult=1.0, penalty=5, ddos_mult=1.0, detect_sensitivity=1.0, hint_level=2):
+        self.name = name
+        self.time_mult = float(time_mult)
+        self.score_mult = float(score_mult)
+        self.penalty = int(penalty)
+        self.ddos_mult = float(ddos_mult)
+        self.detect_sensitivity = float(detect_sensitivity)
+        self.hint_level = int(hint_level)
+
+DIFFICULTIES = {
+    "Easy":   Difficulty("Easy",   time_mult=1.3, score_mult=1.0, penalty=2,  ddos_mult=0.85, detect_sensitivity=1.2, hint_level=2),
+    "Normal": Difficulty("Normal", time_mult=1.0, score_mult=1.0, penalty=5,  ddos_mult=1.0,  detect_sensitivity=1.0, hint_level=2),
+    "Hard":   Difficulty("Hard",   time_mult=0.85,score_mult=1.2, penalty=8,  ddos_mult=1.2,  detect_sensitivity=0.9, hint_level=1),
+    "Insane": Difficulty("Insane", time_mult=0.7, score_mult=1.5, penalty=12, ddos_mult=1.4,  detect_sensitivity=0.8, hint_level=1),
+}
+def get_diff(name): return DIFFICULTIES.get(name or "Normal", DIFFICULTIES["Normal"])
+
+# ========== modely ==========
+class MissionStep:
+    def __init__(self, title, hint, validator, success_log, validator_fn=None):
+        self.title = title
+        self.hint = hint
+        self.validator = validator
+        self.success_log = success_log
+        self.validator_fn = validator_fn
+
+class Mission:
+    def __init__(self, code, name, description, role, allowed, steps, time_limit, setup=None, selftest=None, quick=None):
+        self.code = code; self.name = name; self.description = description
+        self.role = role; self.allowed = allowed[:]; self.steps = steps[:]
+        self.time_limit = int(time_limit)
+        # setup: {"mail": true | {"corpus": [...]}, "arp": {"net": "<cidr>", "hosts": N}, "arp_spoof": "<ip>",
+        #         "audit": {"files": [...]}, "fs": {"root": "<dir>"}, "repo": {"root": "<dir>", "key": "…"},
+        #         "ids": {"use": [...], "combine": "max"}}; cesty vůči packs/
+        self.setup = dict(setup or {})
+        self.selftest = list(selftest or [])    # [(příkaz, "mid"|"long"|sekundy), ...]
+        self.quick = list(quick or [])          # rychlá tlačítka v UI
+
+# ========== mise (datové packy) ==========
+MISSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "packs")
+_PACK_EXT = (".json", ".toml")
+
+# --- jazyk validátorů: podmnožina Python výrazů, zkompilovaná jednou na predikát (b, a, gs) ---
+# cmd = základ příkazu, args.<flag> = hodnota přepínače (None když chybí), stavové proměnné viz _CHECK_VARS
+_CHECK_VARS = {
+    "ids_suspect":        lambda gs: gs.sim.detect_ddos()[0],
+    "ddos_active":        lambda gs: gs.sim.ddos_active,
+    "clean_stable_ticks": lambda gs: gs.sim.clean_stable_ticks,
+    "arp_collisions":     lambda gs: len(gs.sim.arp_status()),
+    "step":               lambda gs: gs.step_idx,
+    "score":              lambda gs: gs.score,
+    "time_left":          lambda gs: gs.time_left,
+    "is_phish":           lambda gs: (lambda mid: bool(gs.mail and gs.mail.is_phish(mid))),
+}
+_CHECK_FUNCS = {"int": lambda v, default=0: as_int(v, default), "str": str, "len": len, "min": min, "max": max}
+_CHECK_GLOBALS = dict(_CHECK_FUNCS, __builtins__={})
+_CHECK_NODES = (ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub,
+                ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+                ast.Name, ast.Load, ast.Attribute, ast.Constant, ast.Call, ast.Tuple, ast.List)
+_CHECK_CACHE = {}
+
+class _CheckArgs:
+    __slots__=("d",)
+    def __init__(self, d): self.d=d
+    def __getattr__(self, k): return self.d.get(k)
+
+class _CheckScope:
+    # proměnné se vyhodnocují líně – jen ty, na které výraz opravdu sáhne
+    __slots__=("cmd","args","gs")
+    def __init__(self, cmd, args, gs): self.cmd=cmd; self.args=args; self.gs=gs
+    def __getitem__(self, k):
+        if k=="cmd": return self.cmd
+        if k=="args": return _CheckArgs(self.args)
+        fn=_CHECK_VARS.get(k)
+        if fn is None: raise KeyError(k)
+        return fn(self.gs)
+
+def compile_check(expr):
+    # "cmd=='ddos' and args.check and not ids_suspect" → predikát(b, a, gs); cache podle textu výrazu
+    fn=_CHECK_CACHE.get(expr)
+    if fn: return fn
+    try: tree=ast.parse(expr, mode="eval")
+    except SyntaxError as e: raise ValueError(f"check '{expr}': {e.msg}")
+    for node in ast.walk(tree):
+        if not isinstance(node, _CHECK_NODES):
+            raise ValueError(f"check '{expr}': nepovolený prvek {type(node).__name__}")
+        if isinstance(node, ast.Attribute) and not (isinstance(node.value, ast.Name) and node.value.id=="args" and not node.attr.startswith("_")):
+            raise ValueError(f"check '{expr}': atributy jen přes args.<flag>")
+        if isinstance(node, ast.Name) and node.id not in _CHECK_VARS and node.id not in _CHECK_FUNCS and node.id not in ("cmd","args"):
+            raise ValueError(f"check '{expr}': neznámé jméno {node.id}")
+        if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and (node.func.id in _CHECK_FUNCS or node.func.id=="is_phish")):
+            raise ValueError(f"check '{expr}': volat lze jen {', '.join(sorted(_CHECK_FUNCS))}, is_phish")
+    code=compile(tree, f"<check {expr}>", "eval")
+    fn=lambda b, a, gs: eval(code, _CHECK_GLOBALS, _CheckScope(b, a, gs))
+    _CHECK_CACHE[expr]=fn
+    return fn
+
+def mission_from_dict(d, where="pack"):
+    try:
+        code=str(d["code"]); where=f"{where}:{code}"
+        steps=[MissionStep(s["title"], s["hint"], s["cmd"], s["success"],
+                           validator_fn=compile_check(s["check"]) if s.get("check") else None)
+               for s in d["steps"]]
+        if not steps: raise ValueError("mise bez kroků")
+        plan=[(str(c), w if isinstance(w,(int,float)) else str(w)) for c,w in d.get("selftest",())]
+        return Mission(code, d["name"], d.get("description",""), d.get("role",""), list(d["allowed"]), steps,
+                       d["time_limit"], setup=d.get("setup"), selftest=plan, quick=d.get("quick"))
+    except KeyError as e: raise ValueError(f"{where}: chybí klíč {e}")
+    except (TypeError, ValueError) as e: raise ValueError(f"{where}: {e}")
+
+def _read_pack(path):
+    if path.endswith(".toml"):
+        try: import tomllib
+        except ImportError: raise ValueError(f"{os.path.basename(path)}: TOML vyžaduje Python 3.11+")
+        with open(path, 'rb') as f: pack=tomllib.load(f)
+    else:
+        with open(path, encoding='utf-8') as f: pack=json.load(f)
+    if pack.get("v",1)!=1: raise ValueError(f"{os.path.basename(path)}: nepodporovaná verze packu {pack.get('v')}")
+    return pack.get("missions",[])
+
+class MissionCatalog:
+    # adresář packů (*.json, *.toml) + index.json; pack se parsuje až při prvním get() jeho mise
+    def __init__(self, directory=None):
+        self.directory=directory or MISSIONS_DIR
+        self._entries=None; self._packs={}; self._missions={}
+
+    def index(self):
+        # [{"code","name","role","pack"}, ...]; index.json se přestaví jen pro změněné packy (mtime/velikost)
+        if self._entries is not None: return self._entries
+        ipath=os.path.join(self.directory, "index.json")
+        try:
+            with open(ipath, encoding='utf-8') as f: idx=json.load(f)
+            if idx.get("v")!=1: idx={}
+        except (OSError, ValueError): idx={}
+        old=idx.get("packs",{}); packs={}; entries=[]; dirty=False
+        try: names=sorted(n for n in os.listdir(self.directory) if n.endswith(_PACK_EXT) and n!="index.json")
+        except OSError: names=[]
+        for name in names:
+            st=os.stat(os.path.join(self.directory, name)); sig=[st.st_mtime_ns, st.st_size]
+            meta=old.get(name)
+            if not meta or meta.get("sig")!=sig:
+                ms=self._load_pack(name); dirty=True
+                meta={"sig":sig, "missions":[{"code":str(m["code"]), "name":m.get("name",""), "role":m.get("role","")} for m in ms]}
+            packs[name]=meta
+            entries.extend(dict(e, pack=name) for e in meta["missions"])
+        if dirty or set(old)!=set(packs):
+            try:
+                import tempfile   # jen při přestavbě indexu
+                fd,tmp=tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                with os.fdopen(fd, 'w', encoding='utf-8') as f: json.dump({"v":1, "packs":packs}, f, ensure_ascii=False)
+                os.replace(tmp, ipath)
+            except OSError as e: print("[ERR] mission index:", err_str(e))
+        self._entries=entries
+        return entries
+
+    def codes(self): return [e["code"] for e in self.index()]
+
+    def _load_pack(self, name):
+        ms=self._packs.get(name)
+        if ms is None:
+            ms=self._packs[name]=_read_pack(os.path.join(self.directory, name))
+        return ms
+
+    def get(self, code):
+        m=self._missions.get(code)
+        if m is not None: return m
+        for e in self.index():
+            if e["code"]==code:
+                for d in self._load_pack(e["pack"]):
+                    if str(d.get("code"))==code:
+                        m=self._missions[code]=mission_from_dict(d, e["pack"]); return m
+        return None
+
+    def all(self):
+        return [m for m in (self.get(c) for c in self.codes()) if m is not None]
+
+_CATALOG = None
+def default_catalog():
+    global _CATALOG
+    if _CATALOG is None: _CATALOG=MissionCatalog()
+    return _CATALOG
+
+def missions_all(): return default_catalog().all()
+
+def mission_by_code(code): return default_catalog().get(code)
@@ -0,0 +1,480 @@
+# cyberdrill/net.py – LAN multiplayer: wire formát a NetPeer (bez UI; hlavní vlákno přes objc_util, je-li k dispozici)
+import time, json, socket, selectors, threading, struct, collections
+
+from .util import err_str
+
+# ========== NetPeer (LAN TCP, JSON lines, event loop přes selectors) ==========
+def _main_thread_dispatch():
+    # v Pythonistě přehodí zpracování zpráv na hlavní (UI) vlákno
+    try:
+        from objc_util import on_main_thread
+    except ImportError:
+        return None
+    return lambda fn: on_main_thread(fn)()
+
+# --- wire formát: JSON řádky (výchozí) nebo binární rámce 'bin1' dohodnuté v hello/ok ---
+# bin1 rámec: 0xB1 | u32 délka těla | u8 typ | tělo; první bajt se nikdy nekryje s '{' JSON řádku,
+# takže proud může být smíšený a přepnutí po handshaku nepotřebuje synchronizaci.
+_BIN_MAGIC = 0xB1
+_BIN_HDR = struct.Struct("!BIB")
+_U32 = struct.Struct("!I")
+_FRAME_HDR = struct.Struct("!IBH")          # seq, flags (1=full, 2=d), počet logů
+_MAX_BODY = 16 * 1024 * 1024
+MT_JSON, MT_ACK, MT_CMD, MT_FRAME = 1, 2, 3, 4
+_FRAME_KEYS = {"t", "seq", "d", "logs", "full"}
+
+def wire_encode(obj, binary=False):
+    if not binary: return (json.dumps(obj) + "\n").encode('utf-8')
+    t = obj.get("t")
+    if t == "ack":
+        mt = MT_ACK; body = _U32.pack(obj["seq"])
+    elif t == "cmd" and not set(obj) - {"t", "c", "code"}:
+        code = (obj.get("code") or "").encode('utf-8')[:255]
+        mt = MT_CMD; body = bytes((len(code),)) + code + obj.get("c", "").encode('utf-8')
+    elif t == "frame" and not set(obj) - _FRAME_KEYS:
+        logs = [x.encode('utf-8') for x in obj.get("logs", ())]
+        flags = (1 if obj.get("full") else 0) | (2 if "d" in obj else 0)
+        parts = [_FRAME_HDR.pack(obj["seq"], flags, len(logs))]
+        for x in logs: parts += [_U32.pack(len(x)), x]
+        if "d" in obj: parts.append(json.dumps(obj["d"], separators=(",", ":")).encode('utf-8'))
+        mt = MT_FRAME; body = b"".join(parts)
+    else:
+        mt = MT_JSON; body = json.dumps(obj, separators=(",", ":")).encode('utf-8')
+    return _BIN_HDR.pack(_BIN_MAGIC, len(body), mt) + body
+
+def _need(p, n, b):
+    # pole délky n od p musí ležet v těle [.., b) – jinak by se četlo z další zprávy nebo mimo buffer
+    if p + n > b: raise ValueError("zkrácené tělo rámce")
+
+def _decode_body(mt, mv, a, b):
+    if mt == MT_JSON: return json.loads(str(mv[a:b], 'utf-8'))
+    if mt == MT_ACK:
+        _need(a, _U32.size, b); return {"t":"ack", "seq":_U32.unpack_from(mv, a)[0]}
+    if mt == MT_CMD:
+        _need(a, 1, b); cl = mv[a]; _need(a + 1, cl, b)
+        return {"t":"cmd", "code":str(mv[a+1:a+1+cl], 'utf-8'), "c":str(mv[a+1+cl:b], 'utf-8')}
+    if mt == MT_FRAME:
+        _need(a, _FRAME_HDR.size, b)
+        seq, flags, nlogs = _FRAME_HDR.unpack_from(mv, a); p = a + _FRAME_HDR.size; logs = []
+        for _ in range(nlogs):
+            _need(p, 4, b); ln = _U32.unpack_from(mv, p)[0]; p += 4
+            _need(p, ln, b); logs.append(str(mv[p:p+ln], 'utf-8')); p += ln
+        msg = {"t":"frame", "seq":seq}
+        if flags & 1: msg["full"] = True
+        if flags & 2: msg["d"] = json.loads(str(mv[p:b], 'utf-8'))
+        if logs: msg["logs"] = logs
+        return msg
+    return None
+
+def wire_decode(buf, pos=0):
+    # rozparsuje všechny celé zprávy z bytearray; vrací (zprávy, spotřebováno) – těla čte přes memoryview
+    out = []; n = len(buf)
+    with memoryview(buf) as mv:
+        while pos < n:
+            if buf[pos] == _BIN_MAGIC:
+                if n - pos < _BIN_HDR.size: break
+                _, ln, mt = _BIN_HDR.unpack_from(mv, pos)
+                if ln > _MAX_BODY: raise ValueError(f"rámec {ln} B je příliš velký")
+                end = pos + _BIN_HDR.size + ln
+                if end > n: break
+                # vadné tělo (zkrácené, špatné UTF-8/JSON, cokoli) = zahozená zpráva, ne pád smyčky
+                try: msg = _decode_body(mt, mv, pos + _BIN_HDR.size, end)
+                except Exception: msg = None
+                pos = end
+            else:
+                nl = buf.find(b"\n", pos)
+                if nl < 0: break
+                try: msg = json.loads(str(mv[pos:nl], 'utf-8'))
+                except ValueError: msg = None
+                pos = nl + 1
+            if isinstance(msg, dict): out.append(msg)
+    return out, pos
+
+class _OutQueue:
+    # ohraničený odchozí buffer jednoho spojení; state / plný frame rámec čeká zvlášť (coalesce),
+    # logs = logy přeskočených rámců, které ještě nejsou v buf
+    __slots__ = ("buf", "state", "since", "logs")
+    def __init__(self): self.buf = bytearray(); self.state = None; self.since = None; self.logs = []
+    def pending(self): return len(self.buf) + (len(self.state) if self.state else 0)
+
+class NetPeer:
+    # threaded=True → I/O vlákno čeká v select() a budí se hned při čitelném socketu;
+    # threaded=False → vlastník volá pump(timeout) ze své smyčky (testy);
+    # selector=… → sdílený selector vlastníka (RoomHost): žádné vlákno ani wake pár, vlastník předává
+    # události přes handle_events(); data klíče je vždy (peer, druh)
+    # state_policy: 'coalesce' (ve frontě jen poslední state), 'drop' (při backlogu zahodit), 'queue'
+    STATE_POLICIES = ("coalesce", "drop", "queue")
+
+    def __init__(self, on_cmd, on_sync, logger, dispatch=None, threaded=True,
+                 max_buffer=256*1024, max_lag=5.0, state_policy="coalesce", binary=True, selector=None):
+        self.on_cmd = on_cmd; self.on_sync = on_sync; self.log = logger
+        self.dispatch = dispatch or _main_thread_dispatch()   # None → handlery běží na I/O vlákně
+        self.threaded = threaded and selector is None
+        self._shared_sel = selector
+        self.mode = None            # 'host' | 'client' | None
+        self.code = ""; self.port = 0
+        self._server = None         # host socket
+        self._clients = []          # [(sock, addr)]
+        self._sock = None           # client socket
+        self._bufs = {}             # sock -> pending buffer (bytearray)
+        self._wire = {}             # sock -> 'bin1', pokud protistrana umí binární rámce
+        self.binary = binary
+        self._out = {}              # sock -> _OutQueue
+        if state_policy not in self.STATE_POLICIES: raise ValueError(f"state_policy: {state_policy}")
+        self.max_buffer = int(max_buffer); self.max_lag = float(max_lag); self.state_policy = state_policy
+        self.stats = {"evicted": 0, "state_skipped": 0, "bytes_out": 0}
+        # delta sync: host drží posledních frame_history stavů; delta se počítá vůči rámci naposledy
+        # odeslanému danému klientovi (TCP doručí v pořadí, klient ho tedy má). Klient potvrzuje každý
+        # ack_every-tý rámec – kvůli starším hostům, které z něj počítaly deltu; tento host ack ignoruje
+        self.frame_history = 64; self.ack_every = 4
+        self._seq = 0; self._frames = collections.OrderedDict()   # seq -> stav
+        self._sent = {}             # sock -> seq, na kterém je stav klienta (None → poslat plný stav)
+        self._caps = {}             # sock -> schopnosti z hello
+        self._last_ack = 0          # klient: poslední potvrzený seq
+        self._sel = None; self._wake_r = None; self._wake_w = None
+        self._thread = None; self._running = False
+        self._lock = threading.RLock()
+
+    def is_host(self): return self.mode == 'host'
+    def is_client(self): return self.mode == 'client'
+
+    def host(self, port=50555, code=""):
+        try:
+            self.leave()
+            self.mode = 'host'; self.code = str(code or ""); self.port = int(port)
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.setblocking(False); s.bind(('', self.port)); s.listen(128)
+            self.port = s.getsockname()[1]
+            self._server = s; self._bufs = {}; self._out = {}; self._wire = {}
+            self._seq = 0; self._frames.clear(); self._sent = {}; self._caps = {}
+            self._start_loop(); self._sel.register(s, selectors.EVENT_READ, (self, "accept"))
+            return True, f"Host na portu {self.port} (code={self.code or 'none'})"
+        except Exception as e:
+            self.leave()
+            return False, "Host error: " + err_str(e)
+
+    def serve(self, code=""):
+        # host bez vlastního listen socketu: spojení předává RoomServer přes adopt()
+        try:
+            self.leave()
+            self.mode = 'host'; self.code = str(code or ""); self.port = 0
+            self._bufs = {}; self._out = {}; self._wire = {}
+            self._seq = 0; self._frames.clear(); self._sent = {}; self._caps = {}
+            self._start_loop()
+            return True, f"Místnost {self.code or 'none'}"
+        except Exception as e:
+            self.leave()
+            return False, "Serve error: " + err_str(e)
+
+    def adopt(self, s, addr, data=b""):
+        # převezme přijaté spojení i s bajty, které už přečetl router (hello)
+        if not self.is_host() or self._sel is None: return False
+        s.setblocking(False); s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        buf = bytearray(data); objs, used = wire_decode(buf)
+        if used: del buf[:used]
+        self._bufs[s] = buf; self._out[s] = _OutQueue()
+        with self._lock: self._clients.append((s, tuple(addr)))
+        self._sel.register(s, selectors.EVENT_READ, (self, "client"))
+        if objs: self._deliver([(s, o, True) for o in objs])
+        return True
+
+    def join(self, host, port=50555, code="", mission=None, diff=None):
+        try:
+            self.leave()
+            self.mode = 'client'; self.code = str(code or ""); self.port = int(port)
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.settimeout(3.0); s.connect((host, self.port))
+            s.setblocking(False); s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock = s; self._bufs = {s: bytearray()}; self._out = {s: _OutQueue()}; self._wire = {}
+            self._start_loop(); self._sel.register(s, selectors.EVENT_READ, (self, "peer"))
+            self._last_ack = 0
+            hello = {"t":"hello","code":self.code,"caps":["frame"],"wire":["bin1"] if self.binary else []}
+            if mission: hello["mission"] = mission; hello["diff"] = diff or "Normal"   # RoomServer podle toho založí místnost
+            self._send(s, hello)
+            return True, f"Připojeno k {host}:{self.port}"
+        except Exception as e:
+            self.leave()
+            return False, "Join error: " + err_str(e)
+
+    def request_sync(self):
+        if self.is_client() and self._sock:
+            self._send(self._sock, {"t":"sync","code":self.code})
+
+    def send_cmd(self, text):
+        if self.is_client() and self._sock:
+            self._send(self._sock, {"t":"cmd","c":text,"code":self.code})
+
+    def broadcast(self, payload):
+        if not self.is_host(): return
+        with self._lock: clients = list(self._clients)
+        for s,_ in clients:
+            if not self._send(s, payload): self._drop(s)
+
+    def publish_frame(self, logs, state):
+        # host: jeden rámec za tick – všechny logy + pole stavu změněná od rámce naposledy odeslaného klientovi
+        if not self.is_host(): return
+        self._seq += 1; seq = self._seq
+        self._frames[seq] = dict(state)
+        while len(self._frames) > self.frame_history: self._frames.popitem(last=False)
+        with self._lock: clients = list(self._clients)
+        for s,_ in clients:
+            if "frame" in self._caps.get(s, ()):
+                ok = self._send_frame(s, seq, logs, state)
+            else:   # starý klient: log/state po jedné zprávě
+                ok = all(self._send(s, {"t":"log","s":line}) for line in logs) and self._send(s, {"t":"state","v":state})
+            if not ok: self._drop(s)
+
+    def _send_frame(self, s, seq, logs, state):
+        # klient s backlogem nedostává delty za sebou (state_policy jako u state zpráv): 'coalesce' drží
+        # ve frontě jediný plný rámec, který se nahrazuje a nese i logy přeskočených rámců; 'drop' rámec
+        # vynechá a logy přidá k dalšímu, který bude plný; 'queue' řadí delty dál
+        with self._lock:
+            q = self._out.get(s)
+            if q is None: return False
+            if self.state_policy == "queue" or not q.pending():
+                if q.logs: logs = q.logs + list(logs); q.logs = []
+                msg = self._frame_for(s, seq, logs, state)
+                return msg is None or self._send(s, msg)
+            self.stats["state_skipped"] += 1; q.logs += logs; self._sent[s] = None
+            if self.state_policy == "coalesce": return self._send(s, self._frame_for(s, seq, q.logs, state), coalesce=True)
+            ok, why = self._flush(s, q)
+        if not ok: self._evict(s, why)
+        return ok
+
+    def _frame_for(self, s, seq, logs, state):
+        # delta vůči stavu, který klient právě má; i návrat pole na starší hodnotu je změna.
+        # Prázdný rámec se neposílá, klient je ale i tak na stavu seq (nic se nezměnilo).
+        base = self._frames.get(self._sent.get(s))
+        self._sent[s] = seq
+        if base is None:
+            msg = {"t":"frame","seq":seq,"d":dict(state),"full":True}
+        else:
+            d = {k:v for k,v in state.items() if base.get(k, object()) != v}
+            if not d and not logs: return None
+            msg = {"t":"frame","seq":seq}
+            if d: msg["d"] = d
+        if logs: msg["logs"] = logs
+        return msg
+
+    def list_peers(self):
+        if self.is_host():
+            with self._lock: return [f"{a[0]}:{a[1]}" for _,a in self._clients]
+        if self.is_client():
+            try: return [self._sock.getpeername()[0]]
+            except: return []
+        return []
+
+    def leave(self):
+        self._running = False
+        t = self._thread
+        if t and t is not threading.current_thread():
+            self._wake(); t.join(1.0)
+        shared = self._sel is not None and self._sel is self._shared_sel
+        try:
+            for s in [self._server, self._sock, self._wake_r, self._wake_w] + [x for x,_ in self._clients]:
+                if s:
+                    if shared:      # sdílený selector žije dál – sokety z něj musí pryč dřív, než se zavřou
+                        try: self._sel.unregister(s)
+                        except Exception: pass
+                    try: s.close()
+                    except: pass
+            if self._sel and not shared:
+                try: self._sel.close()
+                except: pass
+        finally:
+            self._server=None; self._clients=[]; self._sock=None; self._bufs={}; self._out={}; self._wire={}; self.mode=None
+            self._sel=None; self._wake_r=None; self._wake_w=None; self._thread=None
+
+    def pump(self, timeout=0):
+        # jedno kolo event loopu; vrací počet zpracovaných zpráv
+        sel = self._sel
+        if sel is None: return 0
+        try:
+            events = sel.select(timeout)
+        except (OSError, ValueError):   # selector zavřen v leave()
+            return 0
+        return self.handle_events(events)
+
+    def handle_events(self, events):
+        # zpracuje události selectoru patřící tomuto peeru; vrací počet doručených zpráv
+        msgs = []
+        for key,mask in events:
+            kind = key.data[1]
+            if kind == "wake":
+                try:
+                    while key.fileobj.recv(4096): pass
+                except (BlockingIOError, OSError): pass
+            elif kind == "accept":
+                self._accept()
+            else:
+                if mask & selectors.EVENT_WRITE: self._on_writable(key.fileobj, msgs)
+                if mask & selectors.EVENT_READ: self._recv_sock(key.fileobj, kind == "client", msgs)
+        if msgs: self._deliver(msgs)
+        return len(msgs)
+
+    # interní
+    def _start_loop(self):
+        if self._shared_sel is not None:
+            self._sel = self._shared_sel; return
+        self._sel = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False); self._wake_w.setblocking(False)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, (self, "wake"))
+        if self.threaded:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="cyberdrill-net", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while self._running and self._sel is not None:
+            try: self.pump(None)
+            except Exception as e: self._deliver([("log", "[NET] loop err: " + err_str(e))])
+
+    def _wake(self):
+        try: self._wake_w.send(b"\0")
+        except Exception: pass
+
+    def _deliver(self, msgs):
+        def run():
+            for m in msgs:
+                if m[0] == "log": self.log(m[1])
+                else: self._handle_msg(*m)
+        if self.threaded and self.dispatch: self.dispatch(run)
+        else: run()
+
+    def _accept(self):
+        try:
+            while True:
+                s, addr = self._server.accept()
+                s.setblocking(False); s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._bufs[s] = bytearray(); self._out[s] = _OutQueue()
+                with self._lock: self._clients.append((s,addr))
+                self._sel.register(s, selectors.EVENT_READ, (self, "client"))
+        except (BlockingIOError, OSError):
+            pass
+
+    def _drop(self, s):
+        try: self._sel.unregister(s)
+        except Exception: pass
+        try: s.close()
+        except: pass
+        self._bufs.pop(s, None); self._out.pop(s, None); self._sent.pop(s, None)
+        self._caps.pop(s, None)
+        self._wire.pop(s, None)
+        with self._lock: self._clients = [(x,a) for x,a in self._clients if x is not s]
+
+    def _send(self, s, obj, coalesce=False):
+        # jen zařadí do fronty a zkusí neblokující zápis; nikdy nečeká na pomalého klienta.
+        # coalesce=True → obj nahradí čekající state/frame (viz _send_frame)
+        data = wire_encode(obj, self._wire.get(s) == "bin1")
+        with self._lock:
+            q = self._out.get(s)
+            if q is None: return False
+            if coalesce: q.state = data
+            elif obj.get("t") == "state" and q.pending() and self.state_policy != "queue":
+                self.stats["state_skipped"] += 1
+                if self.state_policy == "coalesce": q.state = data
+            else:
+                q.buf += data
+            ok, why = self._flush(s, q)
+        if not ok: self._evict(s, why)
+        return ok
+
+    def _evict(self, s, why, msgs=None):
+        # msgs → log jde přes _deliver (volá se z I/O smyčky)
+        line = f"[NET] {self._peer_name(s)} vyřazen: {why}"
+        if msgs is None: self.log(line)
+        else: msgs.append(("log", line))
+        self.stats["evicted"] += 1
+        self._drop(s)
+
+    def _flush(self, s, q):
+        # volat pod self._lock; vrací (ok, důvod)
+        try:
+            while True:
+                if not q.buf and q.state: q.buf += q.state; q.state = None; q.logs = []
+                if not q.buf: break
+                n = s.send(q.buf)
+                if n <= 0: break
+                del q.buf[:n]; self.stats["bytes_out"] += n
+        except (BlockingIOError, InterruptedError):
+            pass
+        except Exception as e:
+            return False, "send err: " + err_str(e)
+        pending = q.pending()
+        if not pending:
+            if q.since is not None: self._want_write(s, False)
+            q.since = None; return True, ""
+        if q.since is None: q.since = time.monotonic(); self._want_write(s, True)
+        if pending > self.max_buffer: return False, f"backlog {pending} B"
+        if time.monotonic() - q.since > self.max_lag: return False, f"zpoždění > {self.max_lag:.1f}s"
+        return True, ""
+
+    def _want_write(self, s, on):
+        try:
+            key = self._sel.get_key(s)
+            ev = selectors.EVENT_READ | (selectors.EVENT_WRITE if on else 0)
+            if key.events != ev: self._sel.modify(s, ev, key.data)
+        except Exception: pass
+
+    def _on_writable(self, s, msgs):
+        with self._lock:
+            q = self._out.get(s)
+            if q is None: return
+            ok, why = self._flush(s, q)
+        if not ok: self._evict(s, why, msgs)
+
+    def _peer_name(self, s):
+        with self._lock:
+            for x,a in self._clients:
+                if x is s: return f"{a[0]}:{a[1]}"
+        return "peer"
+
+    def _recv_sock(self, s, host_side, msgs):
+        try:
+            chunk = s.recv(65536)
+            if not chunk: raise ConnectionError("peer closed")
+            buf = self._bufs.get(s)
+            if buf is None: buf = self._bufs[s] = bytearray()
+            buf += chunk
+            objs, used = wire_decode(buf)
+            if used: del buf[:used]
+            msgs.extend((s, o, host_side) for o in objs)
+        except BlockingIOError:
+            return
+        except Exception as e:
+            msgs.append(("log", "[NET] recv err: " + err_str(e)))
+            self._drop(s)
+
+    def _handle_msg(self, s, msg, host_side):
+        code = msg.get("code")
+        if (code or "") != (self.code or "") and msg.get("t") in ("hello","cmd","sync"):
+            if host_side and msg.get("t")=="hello" and not self.code:
+                self.code = code or ""
+            elif host_side:
+                self._send(s, {"t":"err","e":"bad-code"})
+                return
+
+        if host_side:
+            t = msg.get("t")
+            if t == "hello":
+                self._caps[s] = set(msg.get("caps") or ()); self._sent[s] = None
+                wire = "bin1" if self.binary and "bin1" in (msg.get("wire") or ()) else "json"
+                self._send(s, {"t":"ok","wire":wire})
+                if wire == "bin1": self._wire[s] = wire
+            elif t == "cmd":
+                c = msg.get("c","")
+                if c: self.on_cmd(c)
+            elif t == "sync":
+                self._sent[s] = None
+                if self._frames and "frame" in self._caps.get(s, ()):
+                    self._send(s, self._frame_for(s, self._seq, [], self._frames[self._seq]))
+        else:
+            if msg.get("t") == "ok" and msg.get("wire") == "bin1" and self.binary:
+                self._wire[s] = "bin1"
+            if msg.get("t") == "frame":
+                seq = int(msg.get("seq", 0))
+                if msg.get("full") or seq - self._last_ack >= self.ack_every:
+                    self._last_ack = seq; self._send(s, {"t":"ack","seq":seq})
+            self.on_sync(msg)
@@ -0,0 +1,334 @@
+# cyberdrill/server.py – headless server místností: víc relací (mise, obtížnost, PIN) na jednom portu
+import time, socket, selectors, threading, queue, collections, multiprocessing
+from multiprocessing import reduction
+
+from .util import err_str
+from .clock import WallClock, ClockView
+from .missions import get_diff, mission_by_code
+from .net import NetPeer, wire_decode, wire_encode
+from .game import GameState
+from .headless import HeadlessAdapter
+
+# ========== místnosti (jeden worker = jedno vlákno GameState + sdílené hodiny a selector) ==========
+class Room:
+    def __init__(self, host, code, mission, diff):
+        # ClockView: termíny ve sdíleném WallClock workeru, zpoždění ticků se počítá pro každou místnost zvlášť;
+        # NetPeer místnosti registruje spojení do selectoru workeru (žádné vlastní I/O vlákno)
+        self.code=code; self.created=self.last_seen=time.monotonic(); self.clock=ClockView(host.clock)
+        self.gs=GameState(mission, HeadlessAdapter(keep=200), diff_name=diff, clock=self.clock,
+                          net_selector=host.sel)
+        self.gs.net.serve(code)
+
+    def stats(self):
+        gs=self.gs; t=self.clock.stats.get("tick"); clients=len(gs.net.list_peers()); now=time.monotonic()
+        lag=t.summary() if t else {"late_ms_avg":0.0, "late_ms_p99":0.0, "late_ms_max":0.0}
+        if clients: self.last_seen=now
+        return {"code":self.code, "mission":gs.mission.code, "diff":gs.diff.name, "clients":clients,
+                "ticks":gs.tick_count, "score":gs.score, "finished":gs.finished,
+                "idle_s":0.0 if clients else now-self.last_seen,
+                "lag_ms_avg":lag["late_ms_avg"], "lag_ms_p99":lag["late_ms_p99"], "lag_ms_max":lag["late_ms_max"]}
+
+class RoomHost:
+    # smyčka workeru: termíny sdílených hodin v reálném čase + jeden selector pro spojení všech místností
+    # + úlohy z inboxu (router); vše na jednom vlákně. post() z jiného vlákna smyčku probudí přes socketpair.
+    def __init__(self, shard=0):
+        self.shard=shard; self.rooms={}; self.inbox=queue.Queue(); self.clock=WallClock()
+        self.sel=selectors.DefaultSelector(); self._wake_r,self._wake_w=socket.socketpair()
+        self._wake_r.setblocking(False); self._wake_w.setblocking(False)
+        self.sel.register(self._wake_r, selectors.EVENT_READ, (None, "wake"))
+        self.running=False
+
+    def post(self, fn):
+        self.inbox.put(fn)
+        try: self._wake_w.send(b"\0")
+        except OSError: pass
+
+    def add_room(self, code, mission_code, diff="Normal"):
+        if code in self.rooms: return self.rooms[code]
+        mission=mission_by_code(mission_code)
+        if mission is None: raise ValueError(f"neznámá mise: {mission_code}")
+        r=self.rooms[code]=Room(self, code, mission, get_diff(diff).name)
+        return r
+
+    def remove_room(self, code):
+        r=self.rooms.pop(code, None)
+        if r is not None: r.gs.stop(); r.gs.net.leave()
+
+    def adopt(self, code, sock, addr, data):
+        r=self.rooms.get(code)
+        if r is None or not r.gs.net.adopt(sock, addr, data):
+            try: sock.close()
+            except OSError: pass
+
+    def stats(self):
+        return [dict(r.stats(), shard=self.shard) for r in self.rooms.values()]
+
+    def run(self):
+        self.running=True
+        while self.running:
+            self.clock.run_due()
+            try: events=self.sel.select(self.clock.wait(0.5))
+            except OSError: break
+            by_peer={}
+            for key,mask in events:
+                peer=key.data[0]
+                if peer is None:
+                    try:
+                        while self._wake_r.recv(4096): pass
+                    except OSError: pass
+                else: by_peer.setdefault(peer, []).append((key, mask))
+            for peer,evs in by_peer.items():
+                try: peer.handle_events(evs)
+                except Exception as e: print(f"[ERR] room shard {self.shard}:", err_str(e))
+            while True:
+                try: fn=self.inbox.get_nowait()
+                except queue.Empty: break
+                try: fn()
+                except Exception as e: print(f"[ERR] room shard {self.shard}:", err_str(e))
+        for r in self.rooms.values():
+            r.gs.stop(); r.gs.net.leave()
+        self.sel.close(); self._wake_r.close(); self._wake_w.close()
+
+    def stop(self):
+        # volá se ve smyčce (přes post); úklid místností a selectoru proběhne po jejím konci
+        self.running=False
+
+def _shard_main(conn, shard):
+    # worker proces: příkazy od routeru čte vlákno a předává do inboxu; deskriptory přichází přes send_handle
+    host=RoomHost(shard)
+    def reader():
+        try:
+            while True:
+                msg=conn.recv()
+                if msg[0]=="adopt":
+                    _, code, addr, data=msg
+                    sock=socket.socket(fileno=reduction.recv_handle(conn))
+                    host.post(lambda code=code, sock=sock, addr=addr, data=data: host.adopt(code, sock, addr, data))
+                elif msg[0]=="room":
+                    host.post(lambda m=msg: host.add_room(*m[1:]))
+                elif msg[0]=="drop":
+                    host.post(lambda code=msg[1]: host.remove_room(code))
+                elif msg[0]=="stats":
+                    host.post(lambda: conn.send(("stats", host.stats())))
+                elif msg[0]=="stop":
+                    break
+        except (EOFError, OSError):
+            pass
+        host.post(host.stop)
+    threading.Thread(target=reader, name=f"cyberdrill-shard-{shard}", daemon=True).start()
+    host.run()
+
+class _LocalShard:
+    # workers=0: místnosti běží ve vlákně tohoto procesu
+    def __init__(self):
+        self.host=RoomHost(0); self.rooms=0
+        self._thread=threading.Thread(target=self.host.run, name="cyberdrill-rooms", daemon=True); self._thread.start()
+    def add_room(self, code, mission, diff):
+        done=queue.Queue(maxsize=1)
+        def run():
+            try: self.host.add_room(code, mission, diff); done.put(None)
+            except Exception as e: done.put(e)
+        self.host.post(run); e=done.get(timeout=5.0)
+        if e: raise e
+    def remove_room(self, code):
+        self.host.post(lambda: self.host.remove_room(code))
+    def adopt(self, code, sock, addr, data):
+        self.host.post(lambda: self.host.adopt(code, sock, addr, data))
+    def stats(self):
+        out=queue.Queue(maxsize=1); self.host.post(lambda: out.put(self.host.stats()))
+        return out.get(timeout=5.0)
+    def close(self): self.host.post(self.host.stop); self._thread.join(2.0)
+
+class _ProcShard:
+    def __init__(self, ctx, shard):
+        self.conn, child=ctx.Pipe(); self.rooms=0
+        self.proc=ctx.Process(target=_shard_main, args=(child, shard), name=f"cyberdrill-shard-{shard}", daemon=True)
+        self.proc.start(); child.close()
+    def add_room(self, code, mission, diff):
+        if mission_by_code(mission) is None: raise ValueError(f"neznámá mise: {mission}")
+        self.conn.send(("room", code, mission, diff))
+    def remove_room(self, code):
+        self.conn.send(("drop", code))
+    def adopt(self, code, sock, addr, data):
+        self.conn.send(("adopt", code, addr, data)); reduction.send_handle(self.conn, sock.fileno(), self.proc.pid)
+        sock.close()
+    def stats(self):
+        self.conn.send(("stats",))
+        if not self.conn.poll(5.0): return []
+        return self.conn.recv()[1]
+    def close(self):
+        try: self.conn.send(("stop",))
+        except OSError: pass
+        self.proc.join(2.0)
+        if self.proc.is_alive(): self.proc.terminate()
+
+# ========== router ==========
+class RoomServer:
+    # jeden listen socket; router přečte hello, podle code (PIN) najde místnost a spojení předá jejímu workeru.
+    # workers=0 → místnosti ve vlákně tohoto procesu, workers=N → N procesů (místnost na nejméně vytížený).
+    # Místnost založenou klientem server zruší, když je dokončená a prázdná nebo idle_timeout s bez klientů;
+    # takových může být nejvýš max_rooms. Místnosti z add_room() (--room) zůstávají.
+    def __init__(self, port=50555, workers=0, open_rooms=True, hello_timeout=5.0, max_hello=64*1024,
+                 idle_timeout=60.0, max_rooms=256):
+        self.port=int(port); self.open_rooms=open_rooms; self.hello_timeout=float(hello_timeout); self.max_hello=int(max_hello)
+        self.idle_timeout=float(idle_timeout); self.max_rooms=int(max_rooms)
+        if workers:
+            ctx=multiprocessing.get_context("spawn")
+            self.shards=[_ProcShard(ctx, i) for i in range(int(workers))]
+        else:
+            self.shards=[_LocalShard()]
+        self.rooms={}               # code -> (shard index, mise, obtížnost)
+        self.kept=set()             # místnosti z add_room(): neruší se
+        self.stats_counters={"accepted":0, "routed":0, "rejected":0, "reaped":0}
+        self._sel=selectors.DefaultSelector(); self._pending={}   # sock -> [addr, bytearray, deadline]
+        self._server=None; self.running=False
+
+    def add_room(self, code, mission, diff="Normal", keep=True):
+        code=str(code)
+        if not code: raise ValueError("místnost potřebuje code (PIN)")
+        if code not in self.rooms:
+            i=min(range(len(self.shards)), key=lambda k: self.shards[k].rooms)
+            self.shards[i].add_room(code, mission, get_diff(diff).name); self.shards[i].rooms+=1
+            self.rooms[code]=(i, mission, get_diff(diff).name)
+        if keep: self.kept.add(code)
+        return self.rooms[code][0]
+
+    def reap(self):
+        # zruší prázdné místnosti založené klienty (dokončené hned, ostatní po idle_timeout); vrací počet
+        n=0
+        for r in self.stats():
+            code=r["code"]
+            if code in self.kept or code not in self.rooms or r["clients"]: continue
+            if not r["finished"] and r["idle_s"]<self.idle_timeout: continue
+            i=self.rooms.pop(code)[0]; self.shards[i].remove_room(code); self.shards[i].rooms-=1; n+=1
+        self.stats_counters["reaped"]+=n
+        return n
+
+    def start(self):
+        s=socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.setblocking(False); s.bind(('', self.port)); s.listen(512)
+        self.port=s.getsockname()[1]; self._server=s
+        self._sel.register(s, selectors.EVENT_READ, "accept")
+        return self.port
+
+    def serve(self, duration=None, report_every=None, report=None):
+        # běží do stop() nebo duration; report(stats) se volá každých report_every sekund
+        if self._server is None: self.start()
+        self.running=True; t_end=None if duration is None else time.monotonic()+duration
+        t_rep=None if not report_every else time.monotonic()+report_every
+        reap_every=max(0.2, min(5.0, self.idle_timeout/2)); t_reap=time.monotonic()+reap_every
+        while self.running and (t_end is None or time.monotonic()<t_end):
+            for key,_ in self._sel.select(0.2):
+                if key.data=="accept": self._accept()
+                else: self._read_hello(key.fileobj)
+            now=time.monotonic()
+            for s,(addr,_,deadline) in list(self._pending.items()):
+                if now>deadline: self._reject(s, "hello-timeout")
+            if now>=t_reap:
+                self.reap(); t_reap=time.monotonic()+reap_every
+            if t_rep and now>=t_rep:
+                t_rep=now+report_every
+                if report: report(self.stats())
+
+    def stop(self): self.running=False
+
+    def stats(self):
+        out=[]
+        for sh in self.shards: out.extend(sh.stats())
+        return sorted(out, key=lambda r: r["code"])
+
+    def close(self):
+        self.running=False
+        for s in list(self._pending): self._reject(s, None)
+        if self._server:
+            try: self._sel.unregister(self._server); self._server.close()
+            except OSError: pass
+            self._server=None
+        for sh in self.shards: sh.close()
+        self._sel.close()
+
+    def _accept(self):
+        try:
+            while True:
+                s,addr=self._server.accept(); s.setblocking(False)
+                self._pending[s]=[addr, bytearray(), time.monotonic()+self.hello_timeout]
+                self._sel.register(s, selectors.EVENT_READ, "hello"); self.stats_counters["accepted"]+=1
+        except (BlockingIOError, OSError):
+            pass
+
+    def _read_hello(self, s):
+        # chyba jednoho spojení (vadný rámec, nesmyslné pole v hello) ho odmítne, accept smyčka běží dál
+        try: self._route_hello(s)
+        except Exception: self._reject(s, "bad-hello")
+
+    def _route_hello(self, s):
+        st=self._pending.get(s)
+        if st is None: return
+        try:
+            chunk=s.recv(65536)
+            if not chunk: raise ConnectionError("peer closed")
+        except BlockingIOError: return
+        except OSError: self._reject(s, None); return
+        st[1]+=chunk
+        try: msgs,_=wire_decode(st[1])
+        except ValueError: self._reject(s, "bad-hello"); return
+        if not msgs:
+            if len(st[1])>self.max_hello: self._reject(s, "bad-hello")
+            return
+        hello=msgs[0]
+        if not isinstance(hello, dict) or hello.get("t")!="hello": self._reject(s, "bad-hello"); return
+        code=str(hello.get("code") or "")
+        if code not in self.rooms:
+            if not (self.open_rooms and code and hello.get("mission")): self._reject(s, "no-room"); return
+            if len(self.rooms)-len(self.kept)>=self.max_rooms: self._reject(s, "room-limit"); return   # kept ⊆ rooms
+            try: self.add_room(code, hello["mission"], hello.get("diff") or "Normal", keep=False)
+            except ValueError: self._reject(s, "no-room"); return
+        self._sel.unregister(s); del self._pending[s]
+        self.shards[self.rooms[code][0]].adopt(code, s, tuple(st[0]), bytes(st[1]))
+        self.stats_counters["routed"]+=1
+
+    def _reject(self, s, why):
+        try: self._sel.unregister(s)
+        except (KeyError, ValueError): pass
+        self._pending.pop(s, None)
+        try:
+            if why:
+                s.setblocking(True); s.settimeout(0.5); s.sendall(wire_encode({"t":"err","e":why}))
+                self.stats_counters["rejected"]+=1
+        except OSError: pass
+        try: s.close()
+        except OSError: pass
+
+def format_room_stats(rows):
+    lines=[f"{'room':<10}{'mise':<6}{'obt.':<8}{'shard':>5}{'klienti':>8}{'ticky':>7}{'lag avg':>10}{'p99':>9}{'max':>9}"]
+    for r in rows:
+        lines.append(f"{r['code']:<10}{r['mission']:<6}{r['diff']:<8}{r['shard']:>5}{r['clients']:>8}{r['ticks']:>7}"
+                     f"{r['lag_ms_avg']:>8.2f}ms{r['lag_ms_p99']:>7.2f}ms{r['lag_ms_max']:>7.2f}ms")
+    return "\n".join(lines)
+
+def bench_rooms(rooms=30, clients=2, workers=0, duration=5.0, mission="A3", diff="Normal"):
+    # server + rooms×clients loopback klientů; každý klient posílá 1 příkaz/s, měří se lag ticků a doručené rámce
+    srv=RoomServer(port=0, workers=workers); port=srv.start()
+    th=threading.Thread(target=srv.serve, name="cyberdrill-router", daemon=True); th.start()
+    frames=collections.Counter(); peers=[]
+    try:
+        for r in range(int(rooms)):
+            code=f"R{r:03d}"
+            for c in range(int(clients)):
+                p=NetPeer(None, lambda m, code=code: frames.update([code]) if m.get("t")=="frame" else None, lambda s: None)
+                ok,msg=p.join("127.0.0.1", port, code=code, mission=mission, diff=diff)
+                if not ok: raise RuntimeError(msg)
+                p.request_sync(); peers.append(p)
+        t_end=time.monotonic()+duration; i=0
+        while time.monotonic()<t_end:
+            for p in peers: p.send_cmd("status" if i%2 else "ddos --check")
+            i+=1; time.sleep(1.0)
+        rows=srv.stats()
+        return {"rooms":len(rows), "clients":len(peers), "workers":workers, "router":dict(srv.stats_counters),
+                "frames":sum(frames.values()), "rows":rows,
+                "lag_ms_avg":sum(r["lag_ms_avg"] for r in rows)/len(rows) if rows else 0.0,
+                "lag_ms_max":max((r["lag_ms_max"] for r in rows), default=0.0)}
+    finally:
+        for p in peers: p.leave()
+        srv.stop(); th.join(1.0); srv.close()
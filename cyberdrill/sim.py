@@ -0,0 +1,412 @@
+# cyberdrill/sim.py – simulátory: síť (SimEngine), dávkový numpy běh, phishing inbox
+import os, random, collections
+
+from .missions import Difficulty, get_diff, MISSIONS_DIR
+from .traffic import FlowGenerator, HyperLogLog, CountMinSketch, botnet, source_ip
+from .detect import IdsPipeline
+from .arp import ArpTable, ip_to_int, int_to_ip, int_to_mac
+from .mailstore import MailStore
+
+np = None   # numpy se načte až v BatchSimEngine (import stojí desítky ms)
+
+# ========== simulátor sítě ==========
+class RingSeries:
+    # kruhové pole pevné kapacity + kruh prefixových součtů → součet posledních w hodnot v O(1)
+    __slots__ = ("cap", "n", "_vals", "_cum")
+    def __init__(self, cap):
+        self.cap = max(1, int(cap)); self.n = 0
+        self._vals = [0] * self.cap
+        self._cum = [0] * (self.cap + 1)   # _cum[k % (cap+1)] = součet prvních k hodnot
+
+    def __len__(self): return min(self.n, self.cap)
+
+    def append(self, v):
+        c = self.cap + 1
+        self._vals[self.n % self.cap] = v
+        self._cum[(self.n + 1) % c] = self._cum[self.n % c] + v
+        self.n += 1
+
+    def sum_last(self, w):
+        w = max(0, min(int(w), len(self))); c = self.cap + 1
+        return self._cum[self.n % c] - self._cum[(self.n - w) % c]
+
+    def last(self, k):
+        k = max(0, min(int(k), len(self)))
+        if not k: return []
+        start = (self.n - k) % self.cap; end = self.n % self.cap
+        if start < end: return self._vals[start:end]
+        return self._vals[start:] + self._vals[:end]
+
+class SimEngine:
+    def __init__(self, log_cb, diff, win=120, rng=None):
+        self.log = log_cb; self.diff = diff
+        self.rng = rng or random.Random()   # vlastní RNG → deterministické přehrání relace
+        self.win = max(10, int(win)); self.baseline_rate = 150
+        self.ddos_active=False; self.ddos_rate=0; self.ddos_target=None
+        self.rate_limit=None
+        # toky po zdrojích → unikátní zdroje přes HLL (per tick), top talkers přes count-min (od startu relace)
+        self.flows=FlowGenerator(); self.botnet=None; self.hll=HyperLogLog(); self.talkers=CountMinSketch()
+        self._bot_ticks=0           # ticky botnetu ještě nepřičtené do count-min (stejná dávka každý tick)
+        self._legit_pend=[0]*self.flows.pool   # legit požadavky po klientech, do count-min až při dotazu
+        self.req_history=RingSeries(self.win)
+        self.uniq_history=RingSeries(self.win)
+        self.syn_history=RingSeries(self.win)
+        self.ack_history=RingSeries(self.win)
+        # prahy IDS (násobeny diff.detect_sensitivity) – čte je detektor "threshold"
+        self.thr_req_mult=4.0; self.thr_uniq=300; self.thr_ratio=2.5
+        self.ids=IdsPipeline(); self.ids_score=0.0
+        # cache verdiktu/snapshotů platná pro jednu generaci stavu
+        self._gen=0; self._verdict_gen=-1; self._verdict=None; self._snap_cache={}
+        self.ids_hits=0; self.ids_misses=0
+        self.arp=ArpTable(); self.arp.seed(); self.arp_spoof_on=False; self.arp_spoof_ip=None
+        self.clean_stable_ticks=0
+
+    def arp_seed(self, net, hosts):
+        # větší segment (např. /16 s 65k hosty) místo výchozích 20 hostů 192.168.0.2–21
+        self.arp=ArpTable(); return self.arp.seed(net, hosts)
+
+    def _invalidate(self):
+        self._gen+=1; self._snap_cache.clear()
+
+    def set_thresholds(self, req_mult=None, uniq=None, ratio=None, sensitivity=None):
+        if req_mult is not None: self.thr_req_mult=float(req_mult)
+        if uniq is not None: self.thr_uniq=float(uniq)
+        if ratio is not None: self.thr_ratio=float(ratio)
+        if sensitivity is not None: self.diff=Difficulty(**dict(vars(self.diff), detect_sensitivity=sensitivity))
+        self._invalidate()
+
+    def set_detectors(self, specs=None, combine="max"):
+        # specs=None → jen jiná kombinace skóre; nová sada detektorů začíná s čistým stavem (zahřátí)
+        if specs is None: self.ids.set_combine(combine)
+        else: self.ids=IdsPipeline(specs, combine)
+        self._invalidate()
+
+    def cache_stats(self):
+        total=self.ids_hits+self.ids_misses
+        return {"gen":self._gen, "hits":self.ids_hits, "misses":self.ids_misses,
+                "hit_rate":round(self.ids_hits/total,3) if total else 0.0}
+
+    def ddos_start(self, rate, target, bots=None, zipf=1.0, syn_mix=1.0):
+        # bots=None → velikost botnetu podle rate (1 bot na 50 req/s, max 4096)
+        rate=max(1, int(rate * self.diff.ddos_mult))
+        net=botnet(rate, max(1, min(rate//50, 4096)) if bots is None else int(bots), float(zipf), float(syn_mix))
+        self._invalidate(); self._flush_talkers()
+        self.ddos_active=True; self.ddos_rate=rate; self.botnet=net
+        self.ddos_target=target
+        self.log("[NET-SIM] DDoS emulace zapnuta")
+
+    def ddos_stop(self):
+        self._invalidate(); self._flush_talkers()
+        self.ddos_active=False; self.ddos_rate=0; self.ddos_target=None; self.botnet=None
+        self.log("[NET-SIM] DDoS emulace vypnuta")
+
+    def _flush_talkers(self):
+        if self._bot_ticks and self.botnet:
+            b=self.botnet; self.talkers.add_batch(b.ids, b.hashes, b.counts, times=self._bot_ticks)
+        self._bot_ticks=0
+        pend=self._legit_pend; ids=[i for i,c in enumerate(pend) if c]
+        if ids:
+            self.talkers.add_batch(ids, self.flows.hashes(ids), [pend[i] for i in ids])
+            for i in ids: pend[i]=0
+
+    def top_talkers(self, k=5):
+        self._flush_talkers()
+        return [(source_ip(sid), est) for sid,est in self.talkers.top(k)]
+
+    def set_rate_limit(self, limit):
+        self._invalidate()
+        if limit is None:
+            self.rate_limit=None; self.log("[FIREWALL] Rate-limit zrušen")
+        else:
+            self.rate_limit=max(1,int(limit)); self.log(f"[FIREWALL] Rate-limit {self.rate_limit} req/s")
+
+    def arp_spoof_enable(self, target_ip):
+        # útočník (poslední seedovaný host) odpovídá za cíl svou MAC → dup MAC + vazba cíle nesedí
+        victim=ip_to_int(target_ip); lo,hi=self.arp.seeded
+        attacker=hi-1 if hi-1!=victim else hi-2
+        self.arp_spoof_on=True; self.arp_spoof_ip=target_ip
+        self.arp.set(victim, self.arp.ip2mac.get(attacker, 0x02FACEFACE00))
+        self.log(f"[NET-SIM] ARP spoof emulace na {target_ip}")
+
+    def arp_spoof_disable(self):
+        if self.arp_spoof_on and self.arp_spoof_ip:
+            victim=ip_to_int(self.arp_spoof_ip); exp=self.arp.expected(victim)
+            if exp is None: self.arp.remove(victim)
+            else: self.arp.set(victim, exp)
+        self.arp_spoof_on=False; self.log("[SEC] ARP spoof emulace vypnuta")
+
+    def tick(self):
+        rng=self.rng
+        base=int(max(50, rng.gauss(self.baseline_rate,10)))
+        add=self.ddos_rate if self.ddos_active else 0
+        eff=base+add
+        if self.rate_limit is not None: eff=min(eff,self.rate_limit)
+        ids,hashes,counts=self.flows.legit(base, self.req_history.n)
+        hll=self.hll; pend=self._legit_pend
+        for i,c in zip(ids, counts): pend[i]+=c
+        if self.ddos_active: hll.load(self.botnet.hll); self._bot_ticks+=1
+        else: hll.clear()
+        hll.add_hashes(hashes); uniq=hll.estimate()
+        mix=self.botnet.syn_mix if self.ddos_active else 0.0
+        syn=max(1,int(eff*(0.5+0.3*mix+rng.uniform(-0.05,0.05))))
+        ack=max(1,int(eff*(0.5-0.2*mix+rng.uniform(-0.05,0.05))))
+        self.req_history.append(eff); self.uniq_history.append(int(uniq))
+        self.syn_history.append(syn); self.ack_history.append(ack)
+        self.ids.update({"req":eff, "uniq":uniq, "ratio":syn/ack})
+        self._invalidate()
+        verdict,_=self.detect_ddos()
+        self.clean_stable_ticks=0 if verdict else min(9999,self.clean_stable_ticks+1)
+
+    def snapshot(self, window=5):
+        hit=self._snap_cache.get(window)
+        if hit is not None: return hit
+        snap=self._snap_cache[window]=self._snapshot(window)
+        return snap
+
+    def _snapshot(self, window):
+        w=max(1,min(window,len(self.req_history)))
+        req=self.req_history.sum_last(w)/w
+        uniq=self.uniq_history.sum_last(w)/w
+        syn=self.syn_history.sum_last(w)
+        ack=self.ack_history.sum_last(w)
+        ratio=syn/max(1,ack)
+        return {"req_s":int(req), "uniq_src":int(uniq), "syn_ack":round(ratio,2)}
+
+    def detect_ddos(self):
+        if self._verdict_gen==self._gen:
+            self.ids_hits+=1; return self._verdict
+        self.ids_misses+=1
+        snap=self.snapshot(10)
+        verdict,self.ids_score=self.ids.evaluate(self, snap)
+        self._verdict=(verdict, snap); self._verdict_gen=self._gen
+        return self._verdict
+
+    def arp_status(self):
+        # kolize se udržují při zápisu → O(počet kolizí), ne O(velikost tabulky)
+        return [(int_to_ip(ip), int_to_mac(mac)) for ip,mac,_ in self.arp.collisions()]
+
+    def series_req(self,n=60): return self.req_history.last(n)
+    def series_ratio(self,n=60):
+        syn=self.syn_history.last(n); ack=self.ack_history.last(n)
+        return [sv/float(av if av>0 else 1) for sv,av in zip(syn,ack)]
+
+# ========== okno série pro graf (min/max + downsampling) ==========
+class SeriesWindow:
+    # posledních `cap` hodnot; min/max okna přes monotónní deque (amortizovaně O(1) na append),
+    # version roste s každou změnou → kreslení pozná, že se data nezměnila
+    __slots__ = ("cap", "vals", "_lo", "_hi", "_i", "version", "_ds")
+    def __init__(self, cap=600):
+        self.cap = max(2, int(cap)); self.vals = collections.deque(maxlen=self.cap)
+        self._lo = collections.deque(); self._hi = collections.deque()   # (index, hodnota)
+        self._i = 0; self.version = 0; self._ds = None
+
+    def __len__(self): return len(self.vals)
+
+    def clear(self):
+        self.vals.clear(); self._lo.clear(); self._hi.clear(); self.version += 1
+
+    def append(self, v):
+        i = self._i; self._i += 1; self.vals.append(v)
+        lo = self._lo; hi = self._hi
+        while lo and lo[-1][1] >= v: lo.pop()
+        lo.append((i, v))
+        while hi and hi[-1][1] <= v: hi.pop()
+        hi.append((i, v))
+        start = i - self.cap + 1        # index nejstarší hodnoty, která je ještě v okně
+        if lo[0][0] < start: lo.popleft()
+        if hi[0][0] < start: hi.popleft()
+        self.version += 1
+
+    def extend(self, vs):
+        for v in vs: self.append(v)
+
+    def min(self, default=0): return self._lo[0][1] if self._lo else default
+    def max(self, default=0): return self._hi[0][1] if self._hi else default
+
+    def downsample(self, buckets):
+        # [(index, hodnota)] s nejvýš 2 body na bucket (min a max v pořadí výskytu) → špičky zůstanou vidět;
+        # výsledek se cachuje do další změny dat
+        buckets = max(1, int(buckets)); key = (self.version, buckets)
+        if self._ds and self._ds[0] == key: return self._ds[1]
+        vals = list(self.vals); n = len(vals)
+        if n <= 2 * buckets:
+            out = list(enumerate(vals))
+        else:
+            out = []; step = n / buckets
+            for b in range(buckets):
+                a = int(b * step); e = int((b + 1) * step)
+                lo = hi = a
+                for k in range(a + 1, e):
+                    v = vals[k]
+                    if v < vals[lo]: lo = k
+                    elif v > vals[hi]: hi = k
+                if lo == hi: out.append((lo, vals[lo]))
+                elif lo < hi: out.append((lo, vals[lo])); out.append((hi, vals[hi]))
+                else: out.append((hi, vals[hi])); out.append((lo, vals[lo]))
+        self._ds = (key, out)
+        return out
+
+# ========== dávkový simulátor (numpy, N instancí najednou) ==========
+class BatchSimEngine:
+    # N nezávislých sítí jako sloupce 2-D polí (win × N); tick() posune všechny najednou
+    METRICS = ("req", "uniq", "syn", "ack")
+
+    def __init__(self, n, diff, win=120, seed=None):
+        global np
+        if np is None:
+            try: import numpy as np
+            except ImportError: raise RuntimeError("BatchSimEngine vyžaduje numpy")
+        self.n = int(n); self.diff = diff; self.win = max(10, int(win)); self.baseline_rate = 150
+        self.thr_req_mult = 4.0; self.thr_uniq = 300; self.thr_ratio = 2.5
+        self.rng = np.random.default_rng(seed)
+        self.ddos_active = np.zeros(self.n, dtype=bool)
+        self.ddos_rate = np.zeros(self.n, dtype=np.int64)
+        self.rate_limit = np.full(self.n, -1, dtype=np.int64)     # -1 = bez limitu
+        self.clean_stable_ticks = np.zeros(self.n, dtype=np.int64)
+        # kruh hodnot + kruh prefixových součtů po řádcích (viz RingSeries)
+        self._vals = {m: np.zeros((self.win, self.n), dtype=np.int64) for m in self.METRICS}
+        self._cum = {m: np.zeros((self.win + 1, self.n), dtype=np.int64) for m in self.METRICS}
+        self.count = 0
+
+    def _sel(self, idx):
+        return slice(None) if idx is None else idx
+
+    def ddos_start(self, rate, idx=None):
+        i = self._sel(idx)
+        self.ddos_active[i] = True
+        self.ddos_rate[i] = max(1, int(rate * self.diff.ddos_mult))
+
+    def ddos_stop(self, idx=None):
+        i = self._sel(idx)
+        self.ddos_active[i] = False; self.ddos_rate[i] = 0
+
+    def set_rate_limit(self, limit, idx=None):
+        self.rate_limit[self._sel(idx)] = -1 if limit is None else max(1, int(limit))
+
+    def _append(self, m, row):
+        c = self.win + 1
+        self._vals[m][self.count % self.win] = row
+        self._cum[m][(self.count + 1) % c] = self._cum[m][self.count % c] + row
+
+    def _sum_last(self, m, w):
+        c = self.win + 1
+        return self._cum[m][self.count % c] - self._cum[m][(self.count - w) % c]
+
+    def tick(self):
+        rng = self.rng; act = self.ddos_active
+        base = np.maximum(50, rng.normal(self.baseline_rate, 10, self.n)).astype(np.int64)
+        eff = base + np.where(act, self.ddos_rate, 0)
+        eff = np.where(self.rate_limit >= 0, np.minimum(eff, self.rate_limit), eff)
+        uniq = np.minimum(60, base // 3) + np.where(act, np.minimum(self.ddos_rate // 50, 4096), 0)
+        syn = np.maximum(1, (eff * (0.5 + 0.3 * act + rng.uniform(-0.05, 0.05, self.n))).astype(np.int64))
+        ack = np.maximum(1, (eff * (0.5 - 0.2 * act + rng.uniform(-0.05, 0.05, self.n))).astype(np.int64))
+        for m, row in zip(self.METRICS, (eff, uniq, syn, ack)): self._append(m, row)
+        self.count += 1
+        verdict, _ = self.detect_ddos()
+        self.clean_stable_ticks = np.where(verdict, 0, np.minimum(9999, self.clean_stable_ticks + 1))
+        return verdict
+
+    def snapshot(self, window=5):
+        w = max(1, min(int(window), self.count, self.win))
+        filled = min(self.count, self.win)
+        if not filled:
+            z = np.zeros(self.n, dtype=np.int64)
+            return {"req_s": z, "uniq_src": z.copy(), "syn_ack": np.zeros(self.n)}
+        ratio = self._sum_last("syn", w) / np.maximum(1, self._sum_last("ack", w))
+        return {"req_s": (self._sum_last("req", w) / w).astype(np.int64),
+                "uniq_src": (self._sum_last("uniq", w) / w).astype(np.int64),
+                "syn_ack": np.round(ratio, 2)}
+
+    def detect_ddos(self):
+        snap = self.snapshot(10); s = self.diff.detect_sensitivity
+        verdict = ((snap["req_s"] > self.baseline_rate * self.thr_req_mult * s)
+                   | (snap["uniq_src"] > self.thr_uniq * s)
+                   | (snap["syn_ack"] > self.thr_ratio * s))
+        return verdict, snap
+
+    def series_req(self, n=60, idx=0):
+        k = max(0, min(int(n), self.count, self.win))
+        rows = [(self.count - k + j) % self.win for j in range(k)]
+        return self._vals["req"][rows, idx].tolist()
+
+def batch_parity(n=256, ticks=60, seed=0, rate=5000, limit=None, diff_name="Normal"):
+    # statistické srovnání BatchSimEngine vs. N× SimEngine pro stejný scénář a seed
+    diff = get_diff(diff_name); half = n // 2
+    def summary(req, uniq, ratio, verdict, clean):
+        return {"req_s": sum(req)/len(req), "uniq_src": sum(uniq)/len(uniq),
+                "syn_ack": sum(ratio)/len(ratio), "verdict_rate": sum(verdict)/len(verdict),
+                "clean_stable": sum(clean)/len(clean)}
+    rng = random.Random(seed)
+    engines = [SimEngine(lambda s: None, diff, rng=rng) for _ in range(n)]
+    for e in engines[:half]:
+        e.ddos_start(rate, "base-ops")
+        if limit is not None: e.set_rate_limit(limit)
+    for _ in range(ticks):
+        for e in engines: e.tick()
+    snaps = [e.detect_ddos() for e in engines]
+    scalar = summary([s["req_s"] for _, s in snaps], [s["uniq_src"] for _, s in snaps],
+                     [s["syn_ack"] for _, s in snaps], [v for v, _ in snaps],
+                     [e.clean_stable_ticks for e in engines])
+    b = BatchSimEngine(n, diff, seed=seed)
+    b.ddos_start(rate, idx=slice(0, half))
+    if limit is not None: b.set_rate_limit(limit, idx=slice(0, half))
+    for _ in range(ticks): b.tick()
+    v, s = b.detect_ddos()
+    batch = summary(s["req_s"].tolist(), s["uniq_src"].tolist(), s["syn_ack"].tolist(),
+                    v.tolist(), b.clean_stable_ticks.tolist())
+    return {"scalar": scalar, "batch": batch}
+
+# ========== Phishing simulátor ==========
+_BUILTIN_MAIL=(
+    ("M-100","hr@internal.test","Rozpis směn","Ahoj, přikládám přepracovaný rozpis směn.",False),
+    ("M-1337","no-reply@secure-update.test","Nutná změna hesla","Vaše heslo vyprší. Ověřte účet na https://secure-update.test/reset.",True),
+    ("M-205","it@corp.test","Údržba VPN","V pátek 22:00 krátká odstávka VPN.",False),
+)
+
+class MailSim:
+    # inbox nad MailStore: vestavěné zprávy mise + volitelně korpusy (mbox / adresář .eml), které se čtou líně
+    def __init__(self, corpus=(), builtin=True):
+        self.box=MailStore()
+        if builtin:
+            for m in _BUILTIN_MAIL: self.box.add(*m)
+        for p in corpus: self.box.add_source(p)
+        self.flagged=set(); self.blocked_domains=set()
+    @classmethod
+    def from_setup(cls, cfg):
+        # setup "mail": true | {"corpus": ["velky.mbox", "eml/"], "builtin": true}; relativní cesty vůči packs/
+        if not isinstance(cfg, dict): return cls()
+        paths=cfg.get("corpus",())
+        if isinstance(paths,str): paths=[paths]
+        return cls([os.path.join(MISSIONS_DIR,p) for p in paths], builtin=cfg.get("builtin",True))
+    def _line(self, m):
+        sender,subj=self.box.header(m); return f"{m.id}  From: {sender}   Subj: {subj}"
+    def list_inbox(self, page=1, size=20):
+        # → (řádky stránky, celkem | None dokud se korpus dočítá); formátuje se jen stránka
+        msgs,total=self.box.page(page,size); return [self._line(m) for m in msgs], total
+    def view(self, mid):
+        m=self.box.get(mid)
+        if m is None:
+            if self.box.complete: return "Email nenalezen."
+            return f"Email {mid} zatím nenalezen – korpus se dočítá (známo {len(self.box)} zpráv), zkus za chvíli."
+        sender,subj=self.box.header(m)
+        return f"{mid} | {sender} | {subj}\n---\n{self.box.text(m)}"
+    def flag(self,mid): self.flagged.add(mid); return f"Zpráva {mid} označena."
+    def block(self, domain, page=1, size=20):
+        # → (hláška, řádky zasažených zpráv na stránce, počet zasažených | None dokud se korpus dočítá)
+        self.blocked_domains.add(domain); hit=self.box.from_domain(domain)
+        msgs=self.box.msgs; lo=(page-1)*size; lines=[self._line(msgs[n]) for n in hit[lo:lo+size]]
+        if self.box.complete: return f"Doména {domain} blokována.", lines, len(hit)
+        return f"Doména {domain} blokována (zatím zasaženo {len(hit)}, blok platí i pro zbytek korpusu).", lines, None
+    def search(self, query, page=1, size=20):
+        # AND slov v odesílateli, předmětu a těle → (řádky, celkem | None dokud se index staví);
+        # ValueError u prázdného dotazu
+        hit=self.box.search(query)
+        if hit is None: return [], None
+        msgs=self.box.msgs; lo=(page-1)*size
+        return [self._line(msgs[n]) for n in hit[lo:lo+size]], len(hit)
+    def warm(self):
+        # krok dočítání / indexace na pozadí (plánuje GameState); True = hotovo
+        return self.box.warm()
+    def is_phish(self,mid):
+        m=self.box.get(mid)
+        return bool(m and m.phish)
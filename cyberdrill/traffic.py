@@ -0,0 +1,209 @@
+# cyberdrill/traffic.py – syntetické toky (legit klienti + botnet se Zipf rozdělením a SYN mixem)
+# a skeče pro IDS: HyperLogLog (unikátní zdroje) a count-min (top talkers); paměť nezávisí na velikosti floodu
+import math, time, functools
+
+np = None   # numpy jen pro vektorový generátor (generate_flows) – jádro ho nepotřebuje
+
+_M64 = (1 << 64) - 1
+BOT_BASE = 1 << 20          # id zdrojů: < BOT_BASE legit klienti, ≥ BOT_BASE boti
+
+def hash64(x):
+    # splitmix64 – rychlé promíchání id zdroje na 64 bitů
+    z = (x + 0x9E3779B97F4A7C15) & _M64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _M64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _M64
+    return z ^ (z >> 31)
+
+def _hash64_np(x):
+    z = x.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+def source_ip(sid):
+    if sid < BOT_BASE: return f"192.168.{(sid >> 8) + 1}.{sid & 255}"
+    i = sid - BOT_BASE + 257
+    return f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+
+# ========== skeče ==========
+_POW2 = [2.0 ** -i for i in range(66)]
+
+class HyperLogLog:
+    # 2^p jednobajtových registrů; p=10 → 1 KiB, chyba ~1.04/sqrt(1024) ≈ 3 %.
+    # Součet 2^-reg a počet nul se drží průběžně → estimate() je O(1)
+    __slots__ = ("p", "m", "reg", "_shift", "_mask", "_inv", "_zeros")
+    def __init__(self, p=10):
+        if not 4 <= p <= 16: raise ValueError(f"HyperLogLog p: {p}")
+        self.p = p; self.m = 1 << p; self.reg = bytearray(self.m)
+        self._shift = 64 - p; self._mask = (1 << self._shift) - 1
+        self._inv = float(self.m); self._zeros = self.m
+
+    def clear(self):
+        self.reg[:] = bytes(self.m); self._inv = float(self.m); self._zeros = self.m
+    def load(self, other):
+        self.reg[:] = other.reg; self._inv = other._inv; self._zeros = other._zeros
+
+    def _recount(self):
+        self._inv = sum(map(_POW2.__getitem__, self.reg)); self._zeros = self.reg.count(0)
+
+    def add_hash(self, h): self.add_hashes((h,))
+
+    def add_hashes(self, hs):
+        reg = self.reg; sh = self._shift; mask = self._mask
+        for h in hs:
+            i = h >> sh; r = sh - (h & mask).bit_length() + 1; old = reg[i]
+            if r > old:
+                reg[i] = r; self._inv += _POW2[r] - _POW2[old]
+                if not old: self._zeros -= 1
+
+    def add_hashes_np(self, hs):
+        # hs: np.uint64 pole; float log2 může u 2^k-1 (k>53) o jedna přestřelit – pro skeč zanedbatelné
+        idx = (hs >> np.uint64(self._shift)).astype(np.intp)
+        rest = (hs & np.uint64(self._mask)).astype(np.float64)
+        bl = np.where(rest > 0, np.floor(np.log2(np.maximum(rest, 1.0))) + 1, 0).astype(np.int64)
+        rho = (self._shift - bl + 1).astype(np.uint8)
+        reg = np.frombuffer(self.reg, dtype=np.uint8)
+        np.maximum.at(reg, idx, rho); self._recount()
+
+    def merge(self, other):
+        if other.p != self.p: raise ValueError("HyperLogLog: různé p")
+        self.reg[:] = bytes(map(max, self.reg, other.reg)); self._recount()
+
+    def estimate(self):
+        m = self.m; zeros = self._zeros
+        e = (0.7213 / (1 + 1.079 / m)) * m * m / self._inv
+        if e <= 2.5 * m and zeros: e = m * math.log(m / zeros)      # linear counting pro malé množiny
+        return int(round(e))
+
+class CountMinSketch:
+    # depth řádků × width čítačů (width = mocnina 2, řádky berou po 16 bitech z jednoho hash64);
+    # kandidáti na top talkers: nejvýš 4·k zdrojů s nejvyšším odhadem
+    def __init__(self, width=1024, depth=4, k=8):
+        if width & (width - 1) or not 16 <= width <= 65536: raise ValueError(f"CountMinSketch width: {width}")
+        if not 1 <= depth <= 4: raise ValueError(f"CountMinSketch depth: {depth}")
+        self.width = width; self.depth = depth; self.k = k; self.total = 0
+        self.rows = [[0] * width for _ in range(depth)]
+        self._cand = {}             # id zdroje -> odhad při poslední aktualizaci
+
+    def clear(self):
+        for row in self.rows: row[:] = [0] * self.width
+        self._cand.clear(); self.total = 0
+
+    def estimate_hash(self, h):
+        mask = self.width - 1
+        return min(row[(h >> (16 * d)) & mask] for d,row in enumerate(self.rows))
+
+    def add_batch(self, ids, hashes, counts, times=1):
+        mask = self.width - 1; rows = list(enumerate(self.rows)); cand = self._cand
+        for sid,h,c in zip(ids, hashes, counts):
+            c *= times; est = None
+            for d,row in rows:
+                j = (h >> (16 * d)) & mask; v = row[j] + c; row[j] = v
+                if est is None or v < est: est = v
+            cand[sid] = est; self.total += c
+        if len(cand) > 8 * self.k: self._trim()
+
+    def add_np(self, ids, hashes, counts, head=None):
+        # vektorová varianta add_batch (np pole, každý zdroj jednou); do kandidátů jde jen `head` největších
+        mask = np.uint64(self.width - 1)
+        for d,row in enumerate(self.rows):
+            arr = np.asarray(row, dtype=np.int64)
+            np.add.at(arr, ((hashes >> np.uint64(16 * d)) & mask).astype(np.intp), counts)
+            self.rows[d] = arr.tolist()
+        self.total += int(counts.sum())
+        for i in np.argsort(counts)[-(head or 4 * self.k):].tolist():
+            self._cand[int(ids[i])] = self.estimate_hash(int(hashes[i]))
+        if len(self._cand) > 8 * self.k: self._trim()
+
+    def _trim(self):
+        keep = sorted(self._cand.items(), key=lambda kv: -kv[1])[:4 * self.k]
+        self._cand = dict(keep)
+
+    def top(self, k=None):
+        k = k or self.k
+        return sorted(self._cand.items(), key=lambda kv: -kv[1])[:k]
+
+    def nbytes(self): return self.depth * self.width * 8 + len(self._cand) * 16
+
+# ========== generátor toků ==========
+class Botnet:
+    # statická konfigurace floodu: podíl i-tého bota ∝ 1/i^zipf, součet = rate req/s;
+    # syn_mix = podíl floodu, který jsou holé SYN (bez dokončeného handshaku)
+    def __init__(self, rate, bots, zipf=1.0, syn_mix=1.0):
+        rate = max(1, int(rate)); bots = max(1, min(int(bots), 1 << 16))
+        zipf = float(zipf); syn_mix = float(syn_mix)
+        if not 0.0 <= zipf <= 4.0: raise ValueError(f"zipf mimo 0..4: {zipf}")
+        if not 0.0 <= syn_mix <= 1.0: raise ValueError(f"syn mix mimo 0..1: {syn_mix}")
+        w = [i ** -zipf for i in range(1, bots + 1)]; tot = sum(w)
+        raw = [rate * x / tot for x in w]; counts = [int(x) for x in raw]
+        # largest remainder → součet přesně rate
+        for i in sorted(range(bots), key=lambda i: counts[i] - raw[i])[:rate - sum(counts)]: counts[i] += 1
+        live = [i for i in range(bots) if counts[i] > 0]
+        self.rate = rate; self.bots = bots; self.zipf = zipf; self.syn_mix = syn_mix
+        self.ids = [BOT_BASE + i for i in live]; self.counts = [counts[i] for i in live]
+        self.hashes = [hash64(s) for s in self.ids]
+        self.hll = HyperLogLog(); self.hll.add_hashes(self.hashes)   # registry botnetu – každý tick stejné
+
+@functools.lru_cache(maxsize=64)
+def botnet(rate, bots, zipf=1.0, syn_mix=1.0):
+    # sdílené mezi relacemi (server místností): stejná konfigurace → jeden předpočet
+    return Botnet(rate, bots, zipf, syn_mix)
+
+_LEGIT_HASH = []
+
+class FlowGenerator:
+    # toky jednoho ticku jako dávky po zdrojích: legit klienti (okno rotující nad poolem) + botnet;
+    # bez vlastního RNG – náhodnost base/SYN/ACK zůstává v SimEngine (deterministické přehrání)
+    def __init__(self, pool=2000):
+        self.pool = int(pool)
+        if len(_LEGIT_HASH) < self.pool: _LEGIT_HASH.extend(hash64(i) for i in range(len(_LEGIT_HASH), self.pool))
+
+    def legit(self, base, tick):
+        # → (ids, hashes, counts); ids jsou indexy do poolu
+        n = max(1, min(60, base // 3)); start = (tick * 7) % self.pool
+        ids = [(start + j) % self.pool for j in range(n)]
+        q, r = divmod(base, n)
+        return ids, [_LEGIT_HASH[i] for i in ids], [q + (1 if j < r else 0) for j in range(n)]
+
+    def hashes(self, ids): return [_LEGIT_HASH[i] for i in ids]
+
+def generate_flows(ticks, rate, bots, zipf=1.0, syn_mix=1.0, base=150, pool=2000, seed=None):
+    # vektorový generátor: jednotlivé toky (zdroj, SYN-only) po ticích, agregované do dávek po zdrojích;
+    # yield (ids, counts, syn_only) jako np pole pro každý tick
+    global np
+    if np is None:
+        try: import numpy as np
+        except ImportError: raise RuntimeError("generate_flows vyžaduje numpy")
+    rng = np.random.default_rng(seed)
+    cdf = np.cumsum(np.arange(1, int(bots) + 1, dtype=np.float64) ** -float(zipf)); cdf /= cdf[-1]
+    for _ in range(int(ticks)):
+        n_bot = rng.poisson(rate); n_leg = max(1, int(rng.normal(base, 10)))
+        src = np.empty(n_bot + n_leg, dtype=np.int64)
+        src[:n_bot] = BOT_BASE + np.searchsorted(cdf, rng.random(n_bot))
+        src[n_bot:] = rng.integers(0, pool, n_leg)
+        syn = np.zeros(src.size, dtype=bool); syn[:n_bot] = rng.random(n_bot) < syn_mix
+        ids, inv = np.unique(src, return_inverse=True)
+        yield ids, np.bincount(inv, minlength=ids.size), np.bincount(inv, weights=syn, minlength=ids.size).astype(np.int64)
+
+def sketch_flows(ticks=10, rate=200000, bots=50000, zipf=1.1, syn_mix=0.8, k=10, seed=0):
+    # generátor + skeče nad vektorovými dávkami; vrací propustnost a přesnost proti přesným hodnotám
+    # přesné hodnoty (slovník přes všechny zdroje) se počítají mimo měřený čas – jen pro kontrolu skečů
+    hll = HyperLogLog(); cms = CountMinSketch(width=4096, k=k)
+    exact = {}; flows = 0; syn_total = 0; wall = 0.0; t_sketch = 0.0
+    gen = generate_flows(ticks, rate, bots, zipf, syn_mix, seed=seed)
+    while True:
+        t0 = time.perf_counter()
+        batch = next(gen, None)
+        if batch is None: break
+        ids, counts, syn = batch; t1 = time.perf_counter()
+        hs = _hash64_np(ids); hll.add_hashes_np(hs); cms.add_np(ids, hs, counts)
+        t2 = time.perf_counter(); wall += t2 - t0; t_sketch += t2 - t1
+        flows += int(counts.sum()); syn_total += int(syn.sum())
+        for s,c in zip(ids.tolist(), counts.tolist()): exact[s] = exact.get(s, 0) + c
+    true_top = {s for s,_ in sorted(exact.items(), key=lambda kv: -kv[1])[:k]}
+    got_top = {s for s,_ in cms.top(k)}
+    return {"flows": flows, "ticks": int(ticks), "wall_s": wall, "flows_per_s": flows / wall if wall > 0 else float("inf"),
+            "sketch_s": t_sketch, "uniq_exact": len(exact), "uniq_hll": hll.estimate(),
+            "hll_err": abs(hll.estimate() - len(exact)) / max(1, len(exact)),
+            "topk_recall": len(true_top & got_top) / max(1, len(true_top)), "syn_share": syn_total / max(1, flows),
+            "sketch_bytes": hll.m + cms.nbytes()}
@@ -0,0 +1,25 @@
+# cyberdrill/util.py – drobné pomocné funkce (bez UI)
+import os, datetime
+
+# ========== utils ==========
+def err_str(e):
+    try:
+        import traceback   # až při chybě – traceback táhne tokenize/linecache (~10 ms importu)
+        return "".join(traceback.format_exception_only(type(e), e)).strip()
+    except Exception:
+        return str(e)
+
+def clamp(x, lo, hi): return max(lo, min(hi, x))
+
+def as_int(v, default):
+    try: return int(v)
+    except Exception: return default
+
+def data_dir(*parts):
+    # data aplikace (cache, indexy) vedle deníku v ~/Documents – mimo stromy, které hra skenuje nebo ověřuje
+    d = os.path.join(os.path.expanduser('~/Documents'), 'CyberDrill_data', *parts)
+    os.makedirs(d, exist_ok=True)
+    return d
+
+def now_stamp():
+    return datetime.datetime.now().strftime("%Y%m%d_%H%M%S")